@@ -1,8 +1,15 @@
 import streamlit as st
 import openai
-import time
 import os
 from dotenv import load_dotenv
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from assistant_client import AssistantClient
+from chat_threads import session_thread
+from message_sync import session_mirror
+from chat_history import render_history
 
 # Load environmental variables. 
 load_dotenv()
@@ -24,37 +31,15 @@ st.title("🤖 My AI Chatbot")
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-# Replace these with your own Assistant ID and Thread ID
+# Replace this with your own Assistant ID; each chat session gets its own thread
 ASSISTANT_ID = 'asst_mgnLV1tlOpmytiq1eUCixZ0N'
-THREAD_ID = 'thread_MrXMPr9grJQmFWNgnvcRkzpK'
-
-def wait_for_run_complete(client, thread_id, run_id):
-    while True:
-        run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
-        if run.completed_at:
-            return run.status
-        time.sleep(1)
 
-def get_assistant_response(client, user_input):
+def get_assistant_response(client, user_input, placeholder=None):
     try:
-        # Add the user's message to the thread
-        client.beta.threads.messages.create(
-            thread_id=THREAD_ID,
-            role='user',
-            content=user_input
-        )
-        # Create a run
-        run = client.beta.threads.runs.create(
-            thread_id=THREAD_ID,
-            assistant_id=ASSISTANT_ID
-        )
-        # Wait for the run to complete
-        wait_for_run_complete(client, THREAD_ID, run.id)
-        # Retrieve the assistant's messages
-        messages = client.beta.threads.messages.list(thread_id=THREAD_ID)
-        
-        # Return the latest assistant message
-        return messages.data[0].content[0].text.value
+        # Add the user's message and stream the assistant's reply into the placeholder
+        assistant = AssistantClient(client, ASSISTANT_ID)
+        thread_id = session_thread(client, ASSISTANT_ID)
+        return assistant.respond(thread_id, user_input, placeholder, session_mirror(thread_id)).text
     except openai.BadRequestError as e:
         st.error(f"BadRequestError: {str(e)}")
         return "I'm sorry, but there was an error processing your request."
@@ -63,9 +48,7 @@ def get_assistant_response(client, user_input):
         return "I'm sorry, but an unexpected error occurred."
 
 # Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+render_history(st.session_state.messages)
 
 # Chat input
 if api_key:
@@ -77,7 +60,7 @@ if api_key:
         with st.chat_message("assistant"):
             message_placeholder = st.empty()
             try:
-                full_response = get_assistant_response(client, prompt)
+                full_response = get_assistant_response(client, prompt, message_placeholder)
                 message_placeholder.markdown(full_response)
                 st.session_state.messages.append({"role": "assistant", "content": full_response})
             except Exception as e:
@@ -1,13 +1,19 @@
 import streamlit as st
 import openai
-import time
 import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from assistant_client import AssistantClient
+from chat_threads import session_thread
+from message_sync import session_mirror
+from chat_history import render_history
 
 # Streamlit page config
 st.set_page_config(page_title="AI Chatbot", page_icon="🤖", layout="wide")
 
 ASSISTANT_ID='asst_etfqF0fCZ4pxXIwuiwy6kqfL'
-THREAD_ID='thread_eODfW5yPUYFxjbd7WBEL09L6'
 
 # Initialize OpenAI client
 
@@ -18,6 +24,7 @@ if not api_key:
     st.stop()
 
 client = openai.OpenAI(api_key=api_key)
+THREAD_ID = session_thread(client, ASSISTANT_ID)
     
 
 # Main chat interface
@@ -26,40 +33,16 @@ st.title("🤖 AI Chatbot")
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-def get_assistant_response(assistant_id, thread_id, user_input):
+def get_assistant_response(assistant_id, thread_id, user_input, placeholder=None):
     try:
-        # Add the user's message to the thread
-        client.beta.threads.messages.create(
-            thread_id=thread_id,
-            role="user",
-            content=user_input
-        )
-
-        # Create a run
-        run = client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=assistant_id
-        )
-
-        # Wait for the run to complete
-        while True:
-            run_status = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
-            if run_status.status == 'completed':
-                break
-            time.sleep(1)
-
-        # Retrieve the assistant's messages
-        messages = client.beta.threads.messages.list(thread_id=thread_id)
-        
-        # Return the latest assistant message
-        return messages.data[0].content[0].text.value
+        # Add the user's message and stream the assistant's reply into the placeholder
+        assistant = AssistantClient(client, assistant_id)
+        return assistant.respond(thread_id, user_input, placeholder, session_mirror(thread_id)).text
     except Exception as e:
         st.error(f"Error getting assistant response: {str(e)}")
         return "I'm sorry, but an error occurred while processing your request."
 # Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+render_history(st.session_state.messages)
 
 # Chat input
 
@@ -74,7 +57,8 @@ if prompt:
         full_response = get_assistant_response(
             ASSISTANT_ID,
             THREAD_ID,  
-            prompt
+            prompt,
+            message_placeholder
         )
         message_placeholder.markdown(full_response)
     st.session_state.messages.append({"role": "assistant", "content": full_response})
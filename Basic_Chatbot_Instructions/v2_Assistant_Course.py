@@ -4,6 +4,19 @@ import streamlit as st
 import base64
 from streamlit_ace import st_ace
 import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from render_cache import interactive
+
+
+@interactive
+def celebrate(label, message):
+    """A button that only reruns itself, not the lesson text around it."""
+    if st.button(label):
+        st.markdown(message)
+        st.balloons()
 
 def main():
     st.set_page_config(page_title="AI Chatbot Project Explorer", page_icon="🤖", layout="wide")
@@ -143,9 +156,8 @@ echo Thumbs.db >> .gitignore""", language="bash")
     st.write("Great job! You've now set up your project environment using the command prompt. You're ready to start building your chatbot! 🚀")
 
     # Add an interactive element
-    if st.button("🎉 Project Setup Complete!"):
-        st.write("Congratulations! You've successfully set up your project environment using the command prompt. You're now ready to start coding your AI chatbot!")
-        st.balloons()
+    celebrate("🎉 Project Setup Complete!",
+              "Congratulations! You've successfully set up your project environment using the command prompt. You're now ready to start coding your AI chatbot!")
 
 def setting_up():
     st.header("Setting Up the Project 🛠️")
@@ -268,9 +280,8 @@ if __name__ == '__main__':
     st.write("And that's it! We've now set up our environment, created an AI assistant that thinks it's Kaiba, and started a new conversation thread. We're ready to start chatting with our AI!")
 
     # Add an interactive element
-    if st.button("🎉 Create Your Own Kaiba Assistant!"):
-        st.write("Congratulations! You've just created your very own Kaiba-themed AI assistant!")
-        st.balloons()
+    celebrate("🎉 Create Your Own Kaiba Assistant!",
+              "Congratulations! You've just created your very own Kaiba-themed AI assistant!")
 
 
 def building_interface():
@@ -411,9 +422,8 @@ st.sidebar.write(f"Thread ID: {THREAD_ID}")
     st.write("And that's our whole chatbot interface! It lets us talk to our AI assistant in a fun and interactive way. 😎")
 
     # Add an interactive element
-    if st.button("🚀 Launch the Chatbot"):
-        st.write("Awesome job! You've just learned how a real AI chatbot interface works. Why not try talking to it?")
-        st.balloons()
+    celebrate("🚀 Launch the Chatbot",
+              "Awesome job! You've just learned how a real AI chatbot interface works. Why not try talking to it?")
 
 # ... (rest of the code remains the same)
 def how_it_works():
@@ -511,6 +521,12 @@ def quiz_time():
     if 'quiz_completed' not in st.session_state:
         st.session_state.quiz_completed = False
 
+    # Answering a question reruns only the quiz, not the whole page.
+    quiz_body(questions)
+
+
+@interactive
+def quiz_body(questions):
     def check_answer():
         if st.session_state.user_answer == questions[st.session_state.current_question]["correct"]:
             st.session_state.quiz_score += 1
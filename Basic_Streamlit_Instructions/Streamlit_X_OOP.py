@@ -1,4 +1,9 @@
 import streamlit as st
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from render_cache import interactive
 
 
 def intro_page():
@@ -134,34 +139,38 @@ def classes_explained():
                 self.has_weapon = True
         """)
 
-        if st.button("Run This Code"):
-            st.write("Let's see what happens when we create a survivor:")
+        @interactive
+        def run_example():
+            if st.button("Run This Code"):
+                st.write("Let's see what happens when we create a survivor:")
+
+                class GameCharacter:
+                    def __init__(self):
+                        self.health = 100
+                        self.is_alive = True
 
-            class GameCharacter:
-                def __init__(self):
-                    self.health = 100
-                    self.is_alive = True
+                    def take_damage(self, amount):
+                        self.health -= amount
+                        if self.health <= 0:
+                            self.is_alive = False
 
-                def take_damage(self, amount):
-                    self.health -= amount
-                    if self.health <= 0:
-                        self.is_alive = False
+                class Survivor(GameCharacter):
+                    def __init__(self):
+                        super().__init__()
+                        self.has_weapon = False
 
-            class Survivor(GameCharacter):
-                def __init__(self):
-                    super().__init__()
-                    self.has_weapon = False
+                    def find_weapon(self):
+                        self.has_weapon = True
 
-                def find_weapon(self):
-                    self.has_weapon = True
+                survivor = Survivor()
+                st.write(f"Health: {survivor.health}")
+                st.write(f"Is Alive: {survivor.is_alive}")
+                st.write(f"Has Weapon: {survivor.has_weapon}")
 
-            survivor = Survivor()
-            st.write(f"Health: {survivor.health}")
-            st.write(f"Is Alive: {survivor.is_alive}")
-            st.write(f"Has Weapon: {survivor.has_weapon}")
+                st.success(
+                    "See how our Survivor got basic features (health, is_alive) from GameCharacter AND its own feature (has_weapon)?")
 
-            st.success(
-                "See how our Survivor got basic features (health, is_alive) from GameCharacter AND its own feature (has_weapon)?")
+        run_example()
 
 
 def game_state_management():
@@ -226,14 +235,18 @@ def game_state_management():
             # This remembers its value!
             """)
 
-        if "demo_counter" not in st.session_state:
-            st.session_state.demo_counter = 0
+        @interactive
+        def counter_demo():
+            if "demo_counter" not in st.session_state:
+                st.session_state.demo_counter = 0
+
+            if st.button("Add 1 to counter"):
+                st.session_state.demo_counter += 1
 
-        if st.button("Add 1 to counter"):
-            st.session_state.demo_counter += 1
+            st.write(f"Current count: {st.session_state.demo_counter}")
+            st.write("(Try clicking the button - the number stays even when other sections change!)")
 
-        st.write(f"Current count: {st.session_state.demo_counter}")
-        st.write("(Try clicking the button - the number stays even when other sections change!)")
+        counter_demo()
 
     with tabs[2]:
         st.header("Tracking Events and Changes")
@@ -269,18 +282,22 @@ def game_state_management():
         st.header("Try It Yourself!")
         st.write("Let's create a simple inventory system:")
 
-        if "practice_inventory" not in st.session_state:
-            st.session_state.practice_inventory = []
+        @interactive
+        def inventory_practice():
+            if "practice_inventory" not in st.session_state:
+                st.session_state.practice_inventory = []
 
-        item = st.text_input("Enter an item to add:")
-        if st.button("Add to Inventory"):
-            if item:
-                st.session_state.practice_inventory.append(item)
+            item = st.text_input("Enter an item to add:")
+            if st.button("Add to Inventory"):
+                if item:
+                    st.session_state.practice_inventory.append(item)
 
-        st.write("Your inventory:", st.session_state.practice_inventory)
+            st.write("Your inventory:", st.session_state.practice_inventory)
 
-        if st.button("Clear Inventory"):
-            st.session_state.practice_inventory = []
+            if st.button("Clear Inventory"):
+                st.session_state.practice_inventory = []
+
+        inventory_practice()
 
 
 def rooms_and_navigation():
@@ -378,32 +395,36 @@ def rooms_and_navigation():
         st.header("Build Your Own Room!")
         st.write("Let's create a room together:")
 
-        room_name = st.text_input("Room Name:")
-        description = st.text_area("Description:")
+        @interactive
+        def room_builder():
+            room_name = st.text_input("Room Name:")
+            description = st.text_area("Description:")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                has_north = st.checkbox("Exit to North?")
+                has_south = st.checkbox("Exit to South?")
+            with col2:
+                has_east = st.checkbox("Exit to East?")
+                has_west = st.checkbox("Exit to West?")
+
+            if st.button("Create Room"):
+                exits = {}
+                if has_north: exits['up'] = "North Room"
+                if has_south: exits['down'] = "South Room"
+                if has_east: exits['right'] = "East Room"
+                if has_west: exits['left'] = "West Room"
+
+                room = {
+                    'exits': exits,
+                    'description': description,
+                    'image': "placeholder.jpg"
+                }
 
-        col1, col2 = st.columns(2)
-        with col1:
-            has_north = st.checkbox("Exit to North?")
-            has_south = st.checkbox("Exit to South?")
-        with col2:
-            has_east = st.checkbox("Exit to East?")
-            has_west = st.checkbox("Exit to West?")
-
-        if st.button("Create Room"):
-            exits = {}
-            if has_north: exits['up'] = "North Room"
-            if has_south: exits['down'] = "South Room"
-            if has_east: exits['right'] = "East Room"
-            if has_west: exits['left'] = "West Room"
-
-            room = {
-                'exits': exits,
-                'description': description,
-                'image': "placeholder.jpg"
-            }
+                st.code(f"{room_name} = {str(room)}")
+                st.success("Room created! This is how it would look in your game's code.")
 
-            st.code(f"{room_name} = {str(room)}")
-            st.success("Room created! This is how it would look in your game's code.")
+        room_builder()
 
 
 def events_and_minigames():
@@ -522,44 +543,48 @@ def events_and_minigames():
         st.header("Design Your Own Event!")
         st.write("Let's create a custom event:")
 
-        event_type = st.selectbox("Event Type:",
-                                  ["Survivor Encounter", "Mini-game Challenge"])
+        @interactive
+        def event_designer():
+            event_type = st.selectbox("Event Type:",
+                                      ["Survivor Encounter", "Mini-game Challenge"])
 
-        if event_type == "Survivor Encounter":
-            name = st.text_input("Survivor Name:")
-            time = st.number_input("Time Cost:", 1, 5)
-            story = st.text_area("Survivor's Story:")
+            if event_type == "Survivor Encounter":
+                name = st.text_input("Survivor Name:")
+                time = st.number_input("Time Cost:", 1, 5)
+                story = st.text_area("Survivor's Story:")
 
-            if st.button("Create Survivor Event"):
-                event = {
-                    'type': 'survivor',
-                    'survivor': {
-                        'name': name,
-                        'time_cost': time,
-                        'story': story
+                if st.button("Create Survivor Event"):
+                    event = {
+                        'type': 'survivor',
+                        'survivor': {
+                            'name': name,
+                            'time_cost': time,
+                            'story': story
+                        }
                     }
-                }
-                st.code(str(event))
-                st.success("Survivor event created!")
-
-        else:
-            challenge = st.text_input("Challenge Name:")
-            attempts = st.number_input("Allowed Attempts:", 1, 10)
-            success_msg = st.text_input("Success Message:")
-            fail_msg = st.text_input("Failure Message:")
-
-            if st.button("Create Mini-game"):
-                game = {
-                    'type': 'minigame',
-                    'game': {
-                        'name': challenge,
-                        'attempts': attempts,
-                        'success_message': success_msg,
-                        'failure_message': fail_msg
+                    st.code(str(event))
+                    st.success("Survivor event created!")
+
+            else:
+                challenge = st.text_input("Challenge Name:")
+                attempts = st.number_input("Allowed Attempts:", 1, 10)
+                success_msg = st.text_input("Success Message:")
+                fail_msg = st.text_input("Failure Message:")
+
+                if st.button("Create Mini-game"):
+                    game = {
+                        'type': 'minigame',
+                        'game': {
+                            'name': challenge,
+                            'attempts': attempts,
+                            'success_message': success_msg,
+                            'failure_message': fail_msg
+                        }
                     }
-                }
-                st.code(str(game))
-                st.success("Mini-game created!")
+                    st.code(str(game))
+                    st.success("Mini-game created!")
+
+        event_designer()
 
 
 def putting_it_all_together():
@@ -659,8 +684,12 @@ def putting_it_all_together():
             """
         }
 
-        step = st.selectbox("Select step to examine:", list(code_steps.keys()))
-        st.code(code_steps[step])
+        @interactive
+        def step_viewer():
+            step = st.selectbox("Select step to examine:", list(code_steps.keys()))
+            st.code(code_steps[step])
+
+        step_viewer()
 
     with tabs[2]:
         st.header("Visual Game Map")
@@ -680,45 +709,47 @@ def putting_it_all_together():
         st.header("Build A Mini Feature")
         st.write("Let's practice putting concepts together by adding a new feature!")
 
-        feature_type = st.selectbox(
-            "What would you like to add?",
-            ["New Room", "New Survivor", "New Mini-game"]
-        )
-
-        if feature_type == "New Room":
-            st.write("Create a new room that connects to existing rooms:")
-            room_name = st.text_input("Room Name")
-            description = st.text_area("Description")
-            has_survivor = st.checkbox("Has Survivor?")
-            has_zombies = st.checkbox("Has Zombie Horde?")
-
-            if st.button("Generate Room Code"):
-                room_code = {
-                    'exits': {'left': 'Previous Room'},
-                    'description': description,
-                    'image': "placeholder.jpg"
-                }
-                if has_survivor:
-                    room_code['event'] = {
-                        'type': 'survivor',
-                        'survivor': 'NewSurvivor'
-                    }
-                if has_zombies:
-                    room_code['event'] = {
-                        'type': 'minigame',
-                        'game': 'ZombieHorde'
+        @interactive
+        def feature_builder():
+            feature_type = st.selectbox(
+                "What would you like to add?",
+                ["New Room", "New Survivor", "New Mini-game"]
+            )
+
+            if feature_type == "New Room":
+                st.write("Create a new room that connects to existing rooms:")
+                room_name = st.text_input("Room Name")
+                description = st.text_area("Description")
+                has_survivor = st.checkbox("Has Survivor?")
+                has_zombies = st.checkbox("Has Zombie Horde?")
+
+                if st.button("Generate Room Code"):
+                    room_code = {
+                        'exits': {'left': 'Previous Room'},
+                        'description': description,
+                        'image': "placeholder.jpg"
                     }
-                st.code(f"{room_name} = {str(room_code)}")
-
-        elif feature_type == "New Survivor":
-            # Add survivor creation interface
-            st.write("Create a new survivor to add to a room:")
-            survivor_name = st.text_input("Survivor Name")
-            time_cost = st.number_input("Time to Save", 1, 5)
-            story = st.text_area("Survivor's Story")
-
-            if st.button("Generate Survivor Code"):
-                st.code(f"""
+                    if has_survivor:
+                        room_code['event'] = {
+                            'type': 'survivor',
+                            'survivor': 'NewSurvivor'
+                        }
+                    if has_zombies:
+                        room_code['event'] = {
+                            'type': 'minigame',
+                            'game': 'ZombieHorde'
+                        }
+                    st.code(f"{room_name} = {str(room_code)}")
+
+            elif feature_type == "New Survivor":
+                # Add survivor creation interface
+                st.write("Create a new survivor to add to a room:")
+                survivor_name = st.text_input("Survivor Name")
+                time_cost = st.number_input("Time to Save", 1, 5)
+                story = st.text_area("Survivor's Story")
+
+                if st.button("Generate Survivor Code"):
+                    st.code(f"""
                 new_survivor = SurvivorEvent("{survivor_name}", {time_cost})
                 # Add to room:
                 room['event'] = {{
@@ -728,13 +759,13 @@ def putting_it_all_together():
                 }}
                 """)
 
-        elif feature_type == "New Mini-game":
-            st.write("Design a new mini-game:")
-            game_name = st.text_input("Game Name")
-            attempts = st.number_input("Number of Attempts", 1, 10)
+            elif feature_type == "New Mini-game":
+                st.write("Design a new mini-game:")
+                game_name = st.text_input("Game Name")
+                attempts = st.number_input("Number of Attempts", 1, 10)
 
-            if st.button("Generate Mini-game Template"):
-                st.code(f"""
+                if st.button("Generate Mini-game Template"):
+                    st.code(f"""
                 class {game_name}(MiniGame):
                     def __init__(self):
                         super().__init__()
@@ -756,6 +787,8 @@ def putting_it_all_together():
                         pass
                 """)
 
+        feature_builder()
+
 
 def main():
     st.sidebar.title("🧟‍♂️ Game Code Tutorial")
@@ -1,6 +1,13 @@
 import streamlit as st
-import time
 import openai
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from assistant_client import AssistantClient
+from chat_history import render_history
+from chat_threads import session_thread
+from message_sync import session_mirror
 
 # Streamlit Fundamentals Library 
 from src.streamlit_fundamentals.landing_1 import landing_page
@@ -27,28 +34,11 @@ st.set_page_config(
 
 # Chatbot functions
 ASSISTANT_ID = 'asst_mgnLV1tlOpmytiq1eUCixZ0N'
-THREAD_ID = 'thread_gpesqxGVn0zvniW08rTWhitW'
-
-def wait_for_run_complete(client, thread_id, run_id):
-    while True:
-        run = client.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
-        if run.completed_at:
-            return run.status
-        time.sleep(1)
-
-def get_assistant_response(client, user_input):
-    client.threads.messages.create(
-        thread_id=THREAD_ID,
-        role='user',
-        content=user_input
-    )
-    run = client.threads.runs.create(
-        thread_id=THREAD_ID,
-        assistant_id=ASSISTANT_ID
-    )
-    wait_for_run_complete(client, THREAD_ID, run.id)
-    messages = client.threads.messages.list(thread_id=THREAD_ID)
-    return messages.data[0].content[0].text.value
+
+def get_assistant_response(client, user_input, placeholder=None):
+    assistant = AssistantClient(client, ASSISTANT_ID)
+    thread_id = session_thread(client, ASSISTANT_ID)
+    return assistant.respond(thread_id, user_input, placeholder, session_mirror(thread_id)).text
 
 def display_chatbot():
     st.title("🤖 AI Assistant")
@@ -56,9 +46,7 @@ def display_chatbot():
     if "messages" not in st.session_state:
         st.session_state.messages = []
 
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    render_history(st.session_state.messages)
 
     if "openai_api_key" in st.session_state and st.session_state.openai_api_key:
         client = openai.OpenAI(api_key=st.session_state.openai_api_key)
@@ -69,7 +57,7 @@ def display_chatbot():
                 st.markdown(prompt)
             with st.chat_message("assistant"):
                 message_placeholder = st.empty()
-                full_response = get_assistant_response(client, prompt)
+                full_response = get_assistant_response(client, prompt, message_placeholder)
                 message_placeholder.markdown(full_response)
             st.session_state.messages.append({"role": "assistant", "content": full_response})
     else:
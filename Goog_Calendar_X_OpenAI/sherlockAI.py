@@ -1,27 +1,34 @@
 import streamlit as st
 import openai
-import time
-import json
 import os
 import datetime
-from google_auth_oauthlib.flow import Flow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
+import sys
+from pathlib import Path
 from googleapiclient.discovery import build
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from chat_threads import session_thread
+from message_sync import session_mirror
+from run_waiter import RunWaiter
+from tool_dispatch import ToolRegistry, per_thread
+
 # Streamlit page config
 st.set_page_config(page_title="Sherlock Holmes Chatbot", page_icon="🕵️", layout="wide")
 
 # OpenAI and Google Calendar setup
 ASSISTANT_ID = 'asst_OUgnR5TbpMHivgAvdaG28t3I'
-THREAD_ID = 'thread_Pt1GEInDiECkbOIMMM6AJwBj'
 SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
 
 # Initialize OpenAI client
 client = openai.OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
 
 # Google Calendar Functions
-def get_calendar_service():
+def get_calendar_credentials():
+    # The OAuth stack is only needed when a calendar is connected.
+    from google_auth_oauthlib.flow import Flow
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
     creds = None
     if os.path.exists('../token.json'):
         creds = Credentials.from_authorized_user_file('token.json', SCOPES)
@@ -37,7 +44,7 @@ def get_calendar_service():
         with open('../token.json', 'w') as token:
             token.write(creds.to_json())
 
-    return build('calendar', 'v3', credentials=creds)
+    return creds
 
 def get_calendar_events(service, days=7, max_results=10):
     now = datetime.datetime.utcnow()
@@ -62,71 +69,64 @@ def get_calendar_events(service, days=7, max_results=10):
     
     return event_list
 
+# Tools the assistant may call during a run
+TOOLS = [{
+    "type": "function",
+    "function": {
+        "name": "get_calendar_events",
+        "description": "Get the user's calendar events",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "days": {
+                    "type": "integer",
+                    "description": "Number of days to fetch events for"
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of events to return"
+                }
+            },
+            "required": ["days", "max_results"]
+        }
+    }
+}]
+
 # Sherlock Holmes AI Function
 def get_assistant_response(assistant_id, thread_id, user_input):
     try:
-        # Add the user's message to the thread
-        client.beta.threads.messages.create(
+        # Add the user's message to the thread, remembering it as the last one seen
+        mirror = session_mirror(thread_id)
+        mirror.add(client.beta.threads.messages.create(
             thread_id=thread_id,
             role="user",
             content=user_input
-        )
+        ))
 
         # Create a run with function calling
         run = client.beta.threads.runs.create(
             thread_id=thread_id,
             assistant_id=assistant_id,
-            tools=[{
-                "type": "function",
-                "function": {
-                    "name": "get_calendar_events",
-                    "description": "Get the user's calendar events",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "days": {
-                                "type": "integer",
-                                "description": "Number of days to fetch events for"
-                            },
-                            "max_results": {
-                                "type": "integer",
-                                "description": "Maximum number of events to return"
-                            }
-                        },
-                        "required": ["days", "max_results"]
-                    }
-                }
-            }]
+            tools=TOOLS
         )
 
-        # Wait for the run to complete
-        while True:
-            run_status = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
-            if run_status.status == 'completed':
-                break
-            elif run_status.status == 'requires_action':
-                # Handle function calling
-                for tool_call in run_status.required_action.submit_tool_outputs.tool_calls:
-                    if tool_call.function.name == "get_calendar_events":
-                        arguments = json.loads(tool_call.function.arguments)
-                        events = get_calendar_events(st.session_state.service, 
-                                                     days=arguments['days'], 
-                                                     max_results=arguments['max_results'])
-                        client.beta.threads.runs.submit_tool_outputs(
-                            thread_id=thread_id,
-                            run_id=run.id,
-                            tool_outputs=[{
-                                "tool_call_id": tool_call.id,
-                                "output": json.dumps(events)
-                            }]
-                        )
-            time.sleep(1)
-
-        # Retrieve the assistant's messages
-        messages = client.beta.threads.messages.list(thread_id=thread_id)
-        
-        # Return the latest assistant message
-        return messages.data[0].content[0].text.value
+        # Handle function calling while waiting for the run to complete. The
+        # calls run concurrently on worker threads, each with its own client
+        # built from this session's credentials.
+        credentials = st.session_state.calendar_credentials
+        worker_service = per_thread(lambda: build('calendar', 'v3', credentials=credentials, cache_discovery=False))
+        tools = ToolRegistry.from_specs(TOOLS, {
+            'get_calendar_events': lambda days, max_results: get_calendar_events(
+                worker_service(), days=days, max_results=max_results)})
+
+        def answer_tools(run_status):
+            return tools.dispatch(run_status.required_action.submit_tool_outputs.tool_calls)
+
+        RunWaiter(client).wait(thread_id, run.id, handle_action=answer_tools)
+
+        # Fetch only this run's reply, added after the user's message
+        reply = mirror.reply(client, run.id)
+        return reply.text if reply else ''
     except Exception as e:
         st.error(f"Error getting assistant response: {str(e)}")
         return "I'm afraid an error has occurred in our communication, Watson. Let us try again."
@@ -144,7 +144,8 @@ if 'service' not in st.session_state:
 # Google Calendar Connection
 if st.session_state.service is None:
     if st.sidebar.button('Connect to Google Calendar'):
-        st.session_state.service = get_calendar_service()
+        st.session_state.calendar_credentials = get_calendar_credentials()
+        st.session_state.service = build('calendar', 'v3', credentials=st.session_state.calendar_credentials)
         st.sidebar.success('Successfully connected to Google Calendar!')
         st.rerun()
 
@@ -163,7 +164,7 @@ if st.session_state.service:
         
         with st.chat_message("assistant"):
             message_placeholder = st.empty()
-            full_response = get_assistant_response(ASSISTANT_ID, THREAD_ID, prompt)
+            full_response = get_assistant_response(ASSISTANT_ID, session_thread(client, ASSISTANT_ID), prompt)
             message_placeholder.markdown(full_response)
         st.session_state.messages.append({"role": "assistant", "content": full_response})
 else:
@@ -1,16 +1,18 @@
 import streamlit as st
 import openai
-import time
-import json
 import os
 import datetime
-from google_auth_oauthlib.flow import Flow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+import sys
+from pathlib import Path
 import pytz
 from dateutil import parser
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from assistant_client import AssistantClient
+from chat_history import render_history
+from chat_threads import session_thread
+from message_sync import session_mirror
+from tool_dispatch import ToolRegistry, per_thread
 # from notion_client import Client
 
 
@@ -19,7 +21,6 @@ st.set_page_config(page_title="Sherlock Holmes Chatbot", page_icon="🕵️", la
 
 # OpenAI and Google Calendar setup
 ASSISTANT_ID = 'asst_OUgnR5TbpMHivgAvdaG28t3I'
-THREAD_ID = 'thread_a9hmNenXCeOMVGl9K0Cuk4lr'
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
 # Initialize OpenAI client
@@ -46,7 +47,12 @@ def get_current_date_info():
     }
 
 # Google Calendar Functions
-def get_calendar_service():
+def get_calendar_credentials():
+    # The Google client stack is imported when a calendar is first connected.
+    from google_auth_oauthlib.flow import Flow
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
     creds = None
     if os.path.exists('../token.json'):
         creds = Credentials.from_authorized_user_file('token.json', SCOPES)
@@ -61,7 +67,11 @@ def get_calendar_service():
         with open('../token.json', 'w') as token:
             token.write(creds.to_json())
 
-    return build('calendar', 'v3', credentials=creds)
+    return creds
+
+def build_calendar_service(credentials):
+    from googleapiclient.discovery import build
+    return build('calendar', 'v3', credentials=credentials, cache_discovery=False)
 
 def get_calendar_events(service, days=7, max_results=10):
     now = datetime.datetime.utcnow()
@@ -129,6 +139,7 @@ def create_calendar_event(service, summary, start_time, end_time, description=''
         return None
 
 def delete_calendar_event(service, event_id):
+    from googleapiclient.errors import HttpError
     try:
         print(f"Attempting to delete event with ID: {event_id}")
         service.events().delete(calendarId='primary', eventId=event_id).execute()
@@ -144,122 +155,87 @@ def delete_calendar_event(service, event_id):
         print(f"An unexpected error occurred while deleting the event: {e}")
         return False
 
+# Tools the assistant may call, and the local functions behind them
+TOOLS = [{
+    "type": "function",
+    "function": {
+        "name": "get_calendar_events",
+        "description": "Get the user's calendar events",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "days": {"type": "integer", "description": "Number of days to fetch events for"},
+                "max_results": {"type": "integer", "description": "Maximum number of events to return"}
+            },
+            "required": ["days", "max_results"]
+        }
+    }
+},
+{
+    'type': 'function',
+    'function': {
+        'name': 'create_calendar_event',
+        'description': 'Create a new calendar event',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'summary': {'type': 'string', 'description': 'Title of the event'},
+                'start_time': {'type': 'string', 'description': 'Start time of the event'},
+                'end_time': {'type': 'string', 'description': 'End time of the event'},
+                'description': {'type': 'string', 'description': 'Description of the event'},
+                'location': {'type': 'string', 'description': 'Location of the event'}
+            },
+            'required': ['summary', 'start_time', 'end_time']
+        }
+    }
+},
+{
+    'type': 'function',
+    'function': {
+        'name': 'delete_calendar_event',
+        'description': 'Delete a calendar event',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'event_id': {'type': 'string', 'description': 'ID of the event to delete'}
+            },
+            'required': ['event_id']
+        }
+    }
+}]
+
+
+def calendar_tools(credentials):
+    # Tool calls run concurrently, and a Google API client must not be shared
+    # between threads, so each worker builds its own from the session's credentials.
+    worker_service = per_thread(lambda: build_calendar_service(credentials))
+
+    return ToolRegistry.from_specs(TOOLS, {
+        'get_calendar_events': lambda days, max_results: get_calendar_events(
+            worker_service(), days=days, max_results=max_results),
+        'create_calendar_event': lambda summary, start_time, end_time, description='', location='': {
+            'event_link': create_calendar_event(worker_service(), summary=summary, start_time=start_time,
+                                                end_time=end_time, description=description,
+                                                location=location)},
+        'delete_calendar_event': lambda event_id: {
+            'success': delete_calendar_event(worker_service(), event_id=event_id)},
+    })
+
+
 # Sherlock Holmes AI Function
-def get_assistant_response(assistant_id, thread_id, user_input):
+def get_assistant_response(assistant_id, thread_id, user_input, placeholder=None):
     try:
         date_info = get_current_date_info() 
 
-        client.beta.threads.messages.create(
-            thread_id=thread_id,
-            role="user",
-            content=f"Current date: {date_info['current_date']}, Day: {date_info['current_day']}, Time: {date_info['current_time']}\n\nUser message: {user_input}"
-        )
-
-        run = client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=assistant_id,
-            tools=[{
-                "type": "function",
-                "function": {
-                    "name": "get_calendar_events",
-                    "description": "Get the user's calendar events",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "days": {"type": "integer", "description": "Number of days to fetch events for"},
-                            "max_results": {"type": "integer", "description": "Maximum number of events to return"}
-                        },
-                        "required": ["days", "max_results"]
-                    }
-                }
-            },
-            {
-                'type': 'function',
-                'function': {
-                    'name': 'create_calendar_event',
-                    'description': 'Create a new calendar event',
-                    'parameters': {
-                        'type': 'object',
-                        'properties': {
-                            'summary': {'type': 'string', 'description': 'Title of the event'},
-                            'start_time': {'type': 'string', 'description': 'Start time of the event'},
-                            'end_time': {'type': 'string', 'description': 'End time of the event'},
-                            'description': {'type': 'string', 'description': 'Description of the event'},
-                            'location': {'type': 'string', 'description': 'Location of the event'}
-                        },
-                        'required': ['summary', 'start_time', 'end_time']
-                    }
-                }
-            },
-            {
-                'type': 'function',
-                'function': {
-                    'name': 'delete_calendar_event',
-                    'description': 'Delete a calendar event',
-                    'parameters': {
-                        'type': 'object',
-                        'properties': {
-                            'event_id': {'type': 'string', 'description': 'ID of the event to delete'}
-                        },
-                        'required': ['event_id']
-                    }
-                }
-            }]
-        )
-
-        while True:
-            run_status = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
-            if run_status.status == 'completed':
-                break
-            elif run_status.status == 'requires_action':
-                tool_outputs = []
-                for tool_call in run_status.required_action.submit_tool_outputs.tool_calls:
-                    if tool_call.function.name == "get_calendar_events":
-                        arguments = json.loads(tool_call.function.arguments)
-                        events = get_calendar_events(st.session_state.service, 
-                                                     days=arguments['days'], 
-                                                     max_results=arguments['max_results'])
-                        tool_outputs.append({
-                            "tool_call_id": tool_call.id,
-                            "output": json.dumps(events)
-                        })
-                    elif tool_call.function.name == 'create_calendar_event':
-                        arguments = json.loads(tool_call.function.arguments)
-                        event_link = create_calendar_event(
-                            st.session_state.service,
-                            summary=arguments['summary'],
-                            start_time=arguments['start_time'],
-                            end_time=arguments['end_time'],
-                            description=arguments.get('description', ''),
-                            location=arguments.get('location', '')
-                        )
-                        tool_outputs.append({
-                            'tool_call_id': tool_call.id,
-                            'output': json.dumps({'event_link': event_link})
-                        })
-                    elif tool_call.function.name == 'delete_calendar_event':
-                        arguments = json.loads(tool_call.function.arguments)
-                        event_id = arguments['event_id']
-                        print(f"Assistant is attempting to delete event with ID: {event_id}")
-                        success = delete_calendar_event(
-                            st.session_state.service,
-                            event_id=event_id
-                        )
-                        tool_outputs.append({
-                            'tool_call_id': tool_call.id,
-                            'output': json.dumps({'success': success})
-                        })
-                        print(f"Delete operation for event {event_id} {'succeeded' if success else 'failed'}")
-                
-                client.beta.threads.runs.submit_tool_outputs(
-                    thread_id=thread_id,
-                    run_id=run.id,
-                    tool_outputs=tool_outputs
-                )
-            time.sleep(1)
-
-        messages = client.beta.threads.messages.list(thread_id=thread_id)
-        return messages.data[0].content[0].text.value
+        # Stream the reply; calendar tool calls are answered as soon as the run asks
+        assistant = AssistantClient(client, assistant_id, tools=calendar_tools(st.session_state.calendar_credentials),
+                                    tool_specs=TOOLS)
+        return assistant.respond(
+            thread_id,
+            f"Current date: {date_info['current_date']}, Day: {date_info['current_day']}, Time: {date_info['current_time']}\n\nUser message: {user_input}",
+            placeholder,
+            session_mirror(thread_id)
+        ).text
     except Exception as e:
         st.error(f"Error getting assistant response: {str(e)}")
         return "I'm afraid an error has occurred in our communication, Watson. Let us try again."
@@ -283,14 +259,13 @@ if 'service' not in st.session_state:
 # Google Calendar Connection
 if st.session_state.service is None:
     if st.sidebar.button('Connect to Google Calendar'):
-        st.session_state.service = get_calendar_service()
+        st.session_state.calendar_credentials = get_calendar_credentials()
+        st.session_state.service = build_calendar_service(st.session_state.calendar_credentials)
         st.sidebar.success('Successfully connected to Google Calendar!')
         st.experimental_rerun()
 
 # Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+render_history(st.session_state.messages)
 
 # Chat input
 if st.session_state.service:
@@ -302,7 +277,8 @@ if st.session_state.service:
 
         with st.chat_message("assistant"):
             message_placeholder = st.empty()
-            full_response = get_assistant_response(ASSISTANT_ID, THREAD_ID, prompt)
+            full_response = get_assistant_response(ASSISTANT_ID, session_thread(client, ASSISTANT_ID), prompt,
+                                                   message_placeholder)
             message_placeholder.markdown(full_response)
         st.session_state.messages.append({"role": "assistant", "content": full_response})
 else:
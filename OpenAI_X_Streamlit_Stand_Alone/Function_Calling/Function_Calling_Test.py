@@ -1,7 +1,15 @@
 import openai
 import streamlit as st
-import json
-import time
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from assistant_client import AssistantClient
+from chat_history import render_history
+from chat_threads import session_thread
+from message_sync import session_mirror
+from run_waiter import RunWaiter
+from tool_dispatch import ToolRegistry
 
 api_key = st.secrets['OPENAI_API_KEY']
 client = openai.OpenAI(api_key=api_key)
@@ -10,95 +18,49 @@ if 'messages' not in st.session_state:
     st.session_state.messages = []
 
 ASSISTANT_ID = 'asst_OUgnR5TbpMHivgAvdaG28t3I'
-THREAD_ID = 'thread_HsRMBEiRx5uOBn0x5IcZnsEt'
+
+TOOLS = [{
+    'type': 'function',
+    'function': {
+        'name': 'get_current_temperature',
+        'description': 'Get the current temperature for a specific location.',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'location': {
+                    'type': 'string',
+                    'description': 'The city and state, e.g., San Francisco, CA'
+                },
+                'unit': {
+                    'type': 'string',
+                    'enum': ['Celsius', 'Fahrenheit'],
+                    'description': 'The temperature unit to use'
+                }
+            },
+            'required': ['location', 'unit']
+        }
+    }
+}]
 
 
 def get_current_temperature(location: str, unit: str) -> str:
     return f'75°{unit[0]}'
 
 
-def get_assistant_response(assistant_id, thread_id, user_input):
-    try:
-        # Create message
-        client.beta.threads.messages.create(
-            thread_id=thread_id,
-            role='user',
-            content=user_input
-        )
-
-        # Check for active runs
-        runs = client.beta.threads.runs.list(thread_id=thread_id)
-        active_run = next((run for run in runs.data if run.status == "in_progress"), None)
-
-        if active_run:
-            while active_run.status == "in_progress":
-                time.sleep(1)
-                active_run = client.beta.threads.runs.retrieve(
-                    thread_id=thread_id,
-                    run_id=active_run.id
-                )
+TOOL_REGISTRY = ToolRegistry.from_specs(TOOLS, {
+    'get_current_temperature': lambda location, unit: {
+        'temperature': get_current_temperature(location=location, unit=unit)},
+})
 
-        # Create new run
-        run = client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=assistant_id,
-            tools=[{
-                'type': 'function',
-                'function': {
-                    'name': 'get_current_temperature',
-                    'description': 'Get the current temperature for a specific location.',
-                    'parameters': {
-                        'type': 'object',
-                        'properties': {
-                            'location': {
-                                'type': 'string',
-                                'description': 'The city and state, e.g., San Francisco, CA'
-                            },
-                            'unit': {
-                                'type': 'string',
-                                'enum': ['Celsius', 'Fahrenheit'],
-                                'description': 'The temperature unit to use'
-                            }
-                        },
-                        'required': ['location', 'unit']
-                    }
-                }
-            }]
-        )
-
-        # Wait for run completion
-        while True:
-            run = client.beta.threads.runs.retrieve(
-                thread_id=thread_id,
-                run_id=run.id
-            )
-
-            if run.status == 'completed':
-                break
-            elif run.status == 'requires_action':
-                tool_outputs = []
-                for tool_call in run.required_action.submit_tool_outputs.tool_calls:
-                    if tool_call.function.name == 'get_current_temperature':
-                        arguments = json.loads(tool_call.function.arguments)
-                        temperature = get_current_temperature(
-                            location=arguments['location'],
-                            unit=arguments['unit']
-                        )
-                        tool_outputs.append({
-                            'tool_call_id': tool_call.id,
-                            'output': json.dumps({'temperature': temperature})
-                        })
-
-                client.beta.threads.runs.submit_tool_outputs(
-                    thread_id=thread_id,
-                    run_id=run.id,
-                    tool_outputs=tool_outputs
-                )
 
-            time.sleep(1)
+def get_assistant_response(assistant_id, thread_id, user_input, placeholder=None):
+    try:
+        # The thread is this session's own, so only a run left over from an interrupted rerun can still be active
+        RunWaiter(client).clear(thread_id)
 
-        messages = client.beta.threads.messages.list(thread_id=thread_id)
-        return messages.data[0].content[0].text.value
+        # Add the message and stream the new run; temperature lookups are answered as soon as it asks
+        assistant = AssistantClient(client, assistant_id, tools=TOOL_REGISTRY, tool_specs=TOOLS)
+        return assistant.respond(thread_id, user_input, placeholder, session_mirror(thread_id)).text
 
     except Exception as e:
         st.error(f'Error getting assistant response: {str(e)}')
@@ -108,9 +70,7 @@ def main():
     st.title("🌤️ Weather Assistant")
     st.markdown("*Ask me about the weather in any location!*")
 
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    render_history(st.session_state.messages)
 
     if prompt := st.chat_input("Ask about the weather..."):
         st.session_state.messages.append({"role": "user", "content": prompt})
@@ -122,8 +82,9 @@ def main():
             with st.spinner('Getting response...'):  # Added spinner
                 full_response = get_assistant_response(
                     ASSISTANT_ID,
-                    THREAD_ID,
-                    prompt
+                    session_thread(client, ASSISTANT_ID),
+                    prompt,
+                    message_placeholder
                 )
             message_placeholder.markdown(full_response)
         st.session_state.messages.append({"role": "assistant", "content": full_response})
@@ -1,7 +1,12 @@
 import openai
 import streamlit as st
 import json
-import time
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from message_sync import session_mirror
+from run_waiter import RunWaiter
 
 # Page configuration
 st.set_page_config(page_title="OpenAI Assistant Tutorial", layout="wide")
@@ -24,24 +29,16 @@ if 'messages' not in st.session_state:
 # Your actual assistant implementation
 def get_assistant_response(assistant_id, thread_id, user_input):
     try:
+        # Let any run still active on the thread finish first
+        RunWaiter(client).clear(thread_id)
+
         # Create message
-        client.beta.threads.messages.create(
+        mirror = session_mirror(thread_id)
+        mirror.add(client.beta.threads.messages.create(
             thread_id=thread_id,
             role="user",
             content=user_input
-        )
-
-        # Check for active runs
-        runs = client.beta.threads.runs.list(thread_id=thread_id)
-        active_run = next((run for run in runs.data if run.status == "in_progress"), None)
-
-        if active_run:
-            while active_run.status == "in_progress":
-                time.sleep(1)
-                active_run = client.beta.threads.runs.retrieve(
-                    thread_id=thread_id,
-                    run_id=active_run.id
-                )
+        ))
 
         # Create new run
         run = client.beta.threads.runs.create(
@@ -50,15 +47,10 @@ def get_assistant_response(assistant_id, thread_id, user_input):
         )
 
         # Wait for completion
-        while run.status == "in_progress":
-            run = client.beta.threads.runs.retrieve(
-                thread_id=thread_id,
-                run_id=run.id
-            )
-            time.sleep(1)
+        RunWaiter(client).wait(thread_id, run.id)
 
-        messages = client.beta.threads.messages.list(thread_id=thread_id)
-        return messages.data[0].content[0].text.value
+        reply = mirror.reply(client, run.id)
+        return reply.text if reply else ''
 
     except Exception as e:
         st.error(f"Error getting assistant response: {str(e)}")
@@ -1,22 +1,26 @@
 import streamlit as st
-import sounddevice as sd
-import numpy as np
-import openai
-import websockets
 import json
 import base64
 import asyncio
-from scipy import signal
-from pydub import AudioSegment
 import io
 
+from assets import play_audio
+from chat_history import render_history
+from lazy_imports import lazy_import
+
+# Audio and networking stacks are only needed once the user starts recording.
+sd = lazy_import('sounddevice')
+np = lazy_import('numpy')
+websockets = lazy_import('websockets')
+pydub = lazy_import('pydub')
+
 # Initialize OpenAI client
 api_key = st.secrets['OPENAI_API_KEY']
 
 # Audio recording parameters
 SAMPLE_RATE = 24000
 CHANNELS = 1
-DTYPE = np.int16
+DTYPE = 'int16'
 
 class AudioRecorder:
     def __init__(self):
@@ -60,6 +64,8 @@ class AudioRecorder:
 def process_audio(audio_data):
     """Convert audio data to 24kHz mono PCM16 little-endian"""
     try:
+        from scipy import signal
+
         audio_data = audio_data.flatten()
         audio_data = audio_data.astype(np.float32) / 32768.0
 
@@ -208,7 +214,7 @@ async def send_to_openai(audio_base64):
                         # Play combined audio
                         if current_response["audio_chunks"]:
                             combined_audio = b''.join(current_response["audio_chunks"])
-                            audio_segment = AudioSegment.from_raw(
+                            audio_segment = pydub.AudioSegment.from_raw(
                                 io.BytesIO(combined_audio),
                                 sample_width=2,
                                 frame_rate=24000,
@@ -216,14 +222,7 @@ async def send_to_openai(audio_base64):
                             )
                             audio_buffer = io.BytesIO()
                             audio_segment.export(audio_buffer, format="wav")
-                            audio_bytes = audio_buffer.getvalue()
-
-                            audio_html = f"""
-                            <audio autoplay>
-                                <source src="data:audio/wav;base64,{base64.b64encode(audio_bytes).decode()}" type="audio/wav">
-                            </audio>
-                            """
-                            st.markdown(audio_html, unsafe_allow_html=True)
+                            play_audio(audio_buffer.getvalue(), format="audio/wav")
                         break
 
                 except websockets.exceptions.ConnectionClosed:
@@ -256,9 +255,7 @@ def main():
         st.session_state.recording = False
 
     # Display chat history
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.write(message["content"])
+    render_history(st.session_state.messages)
 
     # Recording controls
     col1, col2 = st.columns([1, 3])
@@ -5,11 +5,15 @@ import numpy as np
 import altair as alt
 import time
 import plotly.express as px
-import base64
 import os
+import sys
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from assets import image_url
+
 # Set page config
 st.set_page_config(layout="wide", page_title="Streamlit Scavenger Hunt", page_icon="🔍")
 
@@ -115,11 +119,11 @@ elements = [
     ("st.markdown", "Renders Markdown text", lambda: st.markdown("**Bold** and *italic* text")),
 ]
 
-def get_sidebar_style(sidebar_image_base64):
+def get_sidebar_style(sidebar_image_url):
     return f"""
     <style>
     [data-testid="stSidebar"] {{
-        background-image: url("data:image/png;base64,{sidebar_image_base64}");
+        background-image: url("{sidebar_image_url}");
         background-size: cover;
         background-position: center;
         background-repeat: no-repeat;
@@ -127,11 +131,6 @@ def get_sidebar_style(sidebar_image_base64):
     </style>
     """
 
-def get_base64_of_bin_file(bin_file):
-    with open(bin_file, 'rb') as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
-
 def init_game():
     st.title("🚀 Streamlit Scavenger Hunt!")
     st.subheader("Enter Player Names")
@@ -231,9 +230,10 @@ def end_game():
         st.rerun()
 
 # Main game loop
-sidebar_image_path = os.path.join(os.path.dirname(__file__), "images", "blanky.png")
-sidebar_image_base64 = get_base64_of_bin_file(sidebar_image_path)
-st.markdown(get_sidebar_style(sidebar_image_base64), unsafe_allow_html=True)
+# Encoded and written to ./static once per process; reruns only send the URL.
+sidebar_image_path = os.path.join(ROOT, "images", "blanky.png")
+sidebar_image = image_url(sidebar_image_path, os.path.join(os.path.dirname(__file__), "static"))
+st.markdown(get_sidebar_style(sidebar_image), unsafe_allow_html=True)
 
 if 'game_state' not in st.session_state:
     st.session_state.game_state = 'init'
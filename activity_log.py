@@ -0,0 +1,181 @@
+import atexit
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from portal_db import SQL_TOUCH_ACTIVITY, current_database, get_pool
+
+LOGIN = 'login'
+SECTION_VIEW = 'section_view'
+COMPLETION = 'completion'
+QUIZ_ANSWER = 'quiz_answer'
+
+# Raw events are kept this long; the daily counters are kept forever.
+RETENTION_DAYS = 14
+
+SQL_INSERT_EVENT = '''
+    INSERT INTO activity_events (username, kind, detail, occurred_at) VALUES (?, ?, ?, ?)
+'''
+SQL_ROLLUP_EVENT = '''
+    INSERT INTO activity_daily (username, day, kind, events) VALUES (?, ?, ?, ?)
+    ON CONFLICT (username, day, kind) DO UPDATE SET events = events + excluded.events
+'''
+
+
+class ActivityLog:
+    """Buffered, append-only log of student activity.
+
+    record() only appends to an in-memory buffer. A background thread flushes
+    the buffer every flush_interval seconds (or as soon as it holds
+    max_buffer events): one transaction appends the raw events, adds them to
+    the activity_daily counters and advances each student's streak in
+    student_stats. Raw events older than RETENTION_DAYS are pruned every
+    compact_interval seconds, so the log stays bounded while the counters
+    keep the full history. At most one flush interval of events is lost if
+    the process dies without running its exit handlers.
+
+    Each event is written to the database that was current for the thread
+    recording it (see portal_db.use_partition), one transaction per database.
+    """
+
+    def __init__(self, flush_interval: float = 1.0, max_buffer: int = 5000,
+                 compact_interval: float = 3600.0):
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.compact_interval = compact_interval
+        self._buffer = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._last_compact = time.monotonic()
+        self._databases = set()
+        self.recorded = 0
+        self.flushed = 0
+        self.flushes = 0
+
+    def record(self, username: str, kind: str, detail: str = None):
+        """Queue one event; never blocks on the database."""
+        event = (current_database(),
+                 (username, kind, detail, datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')))
+        with self._cond:
+            if self._closed:
+                return
+            self._buffer.append(event)
+            self.recorded += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='activity-log', daemon=True)
+                self._thread.start()
+            if len(self._buffer) >= self.max_buffer:
+                self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._buffer) < self.max_buffer:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            try:
+                self.flush()
+            except sqlite3.Error:
+                if closed:
+                    return
+                continue
+            if time.monotonic() - self._last_compact >= self.compact_interval:
+                self.compact()
+            if closed:
+                return
+
+    def flush(self):
+        """Write buffered events and fold them into the daily counters."""
+        with self._cond:
+            buffered, self._buffer = self._buffer, []
+        if not buffered:
+            return
+
+        by_database = {}
+        for path, event in buffered:
+            by_database.setdefault(path, []).append(event)
+
+        failed = []
+        for path, events in by_database.items():
+            try:
+                self._write(path, events)
+            except sqlite3.Error:
+                failed.extend((path, event) for event in events)
+                continue
+            self._databases.add(path)
+            self.flushed += len(events)
+        self.flushes += 1
+        if failed:
+            # Put the events back in front of anything recorded meanwhile.
+            with self._cond:
+                self._buffer[:0] = failed
+            raise sqlite3.OperationalError(f"{len(failed)} activity events not written")
+
+    @staticmethod
+    def _write(path: str, events):
+        counts = {}
+        for username, kind, _, occurred_at in events:
+            key = (username, occurred_at[:10], kind)
+            counts[key] = counts.get(key, 0) + 1
+        active_days = sorted({(username, day) for username, day, _ in counts})
+
+        with get_pool(path).transaction() as conn:
+            conn.executemany(SQL_INSERT_EVENT, events)
+            conn.executemany(SQL_ROLLUP_EVENT, [key + (n,) for key, n in counts.items()])
+            conn.executemany(SQL_TOUCH_ACTIVITY,
+                             [{'username': u, 'day': d} for u, d in active_days])
+
+    def compact(self, retention_days: int = RETENTION_DAYS) -> int:
+        """Drop raw events that are already counted and past retention."""
+        cutoff = (datetime.utcnow() - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+        deleted = 0
+        for path in self._databases | {current_database()}:
+            with get_pool(path).transaction() as conn:
+                deleted += conn.execute(
+                    "DELETE FROM activity_events WHERE occurred_at < ?", (cutoff,)
+                ).rowcount
+        self._last_compact = time.monotonic()
+        return deleted
+
+    def close(self):
+        """Flush what is buffered and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        else:
+            self.flush()
+
+
+activity_log = ActivityLog()
+atexit.register(activity_log.close)
+
+
+def record(username: str, kind: str, detail: str = None):
+    activity_log.record(username, kind, detail)
+
+
+def daily_activity(username: str, start_day: str, end_day: str) -> dict:
+    """Total events per day between two 'YYYY-MM-DD' days, inclusive.
+
+    A single range scan over the activity_daily primary key.
+    """
+    return dict(get_pool().connection().execute('''
+        SELECT day, SUM(events) FROM activity_daily
+        WHERE username = ? AND day BETWEEN ? AND ?
+        GROUP BY day
+    ''', (username, start_day, end_day)).fetchall())
+
+
+def current_week(username: str):
+    """[(weekday abbreviation, event count)] for Monday..Sunday of this week."""
+    today = datetime.utcnow().date()
+    monday = today - timedelta(days=today.weekday())
+    days = [monday + timedelta(days=i) for i in range(7)]
+    counts = daily_activity(username, days[0].isoformat(), days[-1].isoformat())
+    return [(day.strftime('%a'), counts.get(day.isoformat(), 0)) for day in days]
@@ -0,0 +1,105 @@
+# Instructor analytics. Everything here reads the agg_* tables that portal_db's
+# triggers keep up to date on every progress write, so page cost depends on
+# the size of the curriculum, not the size of the cohort.
+import os
+from datetime import datetime, timedelta
+
+from portal_db import get_pool
+
+# Usernames allowed to open the Class Analytics page, comma separated.
+INSTRUCTORS = {
+    name.strip()
+    for name in os.environ.get('PORTAL_INSTRUCTORS', '').split(',')
+    if name.strip()
+}
+
+# A student is at risk below this average test score...
+AT_RISK_SCORE = 60
+# ...or after this many days without completing a section.
+AT_RISK_INACTIVE_DAYS = 7
+
+
+def is_instructor(username: str) -> bool:
+    return username in INSTRUCTORS
+
+
+def module_summary():
+    """Average progress and completion counts per module."""
+    rows = get_pool().connection().execute('''
+        SELECT module, students, total_progress, started, completed
+        FROM agg_module_progress ORDER BY module
+    ''').fetchall()
+    return [
+        {
+            'module': module,
+            'students': students,
+            'average_progress': round(total / students, 1) if students else 0,
+            'started': started,
+            'completed': completed,
+        }
+        for module, students, total, started, completed in rows
+    ]
+
+
+def student_count() -> int:
+    result = get_pool().connection().execute(
+        "SELECT MAX(students) FROM agg_module_progress"
+    ).fetchone()
+    return result[0] or 0
+
+
+def section_completion_rates(course):
+    """Completion count and rate for every section of a CourseRegistry, in course order."""
+    counts = {
+        (level, section): completions
+        for level, section, completions in get_pool().connection().execute(
+            "SELECT level, section, completions FROM agg_section_completions")
+    }
+    students = student_count()
+    rates = []
+    for level in course.levels:
+        for section in course.titles(level):
+            completions = counts.get((level, section), 0)
+            rates.append({
+                'level': level,
+                'section': section,
+                'completions': completions,
+                'rate': completions / students if students else 0.0,
+            })
+    return rates
+
+
+def score_distribution():
+    """Number of test scores in each 10-point bucket (90 covers 90-100)."""
+    counts = dict(get_pool().connection().execute(
+        "SELECT bucket, scores FROM agg_score_buckets"
+    ).fetchall())
+    return {f"{bucket}-{bucket + 9 if bucket < 90 else 100}": counts.get(bucket, 0)
+            for bucket in range(0, 100, 10)}
+
+
+def at_risk_students(limit: int = 50):
+    """Students with a low average score or no recent completions.
+
+    Both lookups are range scans on indexes of agg_student_summary.
+    """
+    conn = get_pool().connection()
+    cutoff = (datetime.utcnow() - timedelta(days=AT_RISK_INACTIVE_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+    flagged = {}
+
+    for username, average in conn.execute('''
+        SELECT username, score_total / tests_taken FROM agg_student_summary
+        WHERE tests_taken > 0 AND score_total / tests_taken < ?
+        ORDER BY score_total / tests_taken LIMIT ?
+    ''', (AT_RISK_SCORE, limit)):
+        flagged[username] = {'username': username, 'reason': f"Average score {average:.0f}"}
+
+    for username, last in conn.execute('''
+        SELECT username, last_completed_at FROM agg_student_summary
+        WHERE last_completed_at IS NULL OR last_completed_at < ?
+        ORDER BY last_completed_at LIMIT ?
+    ''', (cutoff, limit)):
+        reason = "No sections completed yet" if last is None else f"Inactive since {last[:10]}"
+        flagged.setdefault(username, {'username': username, 'reason': reason})
+
+    return list(flagged.values())[:limit]
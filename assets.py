@@ -0,0 +1,155 @@
+"""Images written once as content-addressed static files and served by URL, with an in-memory LRU."""
+import argparse
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+
+STATIC_URL = 'app/static'
+ASSET_DIR = 'assets'
+
+# WebP quality used when re-encoding images; 0 keeps the original bytes.
+IMAGE_QUALITY = int(os.environ.get('ASSET_IMAGE_QUALITY', '80'))
+
+
+def _optimize_image(data: bytes, ext: str):
+    """Return (data, ext), re-encoded to WebP if that is smaller."""
+    if not IMAGE_QUALITY or ext not in ('.png', '.jpg', '.jpeg'):
+        return data, ext
+    try:
+        from PIL import Image
+    except ImportError:
+        return data, ext
+    out = io.BytesIO()
+    Image.open(io.BytesIO(data)).save(out, 'WEBP', quality=IMAGE_QUALITY, method=6)
+    if out.tell() < len(data):
+        return out.getvalue(), '.webp'
+    return data, ext
+
+
+class AssetStore:
+    """Content-addressed asset files under static_dir/assets, with an LRU of URLs."""
+
+    def __init__(self, static_dir: str, max_entries: int = 128):
+        self.static_dir = static_dir
+        self.max_entries = max_entries
+        self._urls = OrderedDict()
+        self._data_uris = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, cache: OrderedDict, key, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_entries:
+                cache.popitem(last=False)
+
+    def _lookup(self, cache: OrderedDict, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                cache.move_to_end(key)
+            return value
+
+    def _write(self, data: bytes, ext: str) -> str:
+        name = hashlib.sha256(data).hexdigest()[:20] + ext
+        directory = os.path.join(self.static_dir, ASSET_DIR)
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return name
+
+    @staticmethod
+    def _key(path: str):
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    def url(self, path: str) -> str:
+        """Publish a file (once per version of it) and return its static URL."""
+        key = self._key(path)
+        url = self._lookup(self._urls, key)
+        if url is None:
+            with open(path, 'rb') as f:
+                data, ext = _optimize_image(f.read(), os.path.splitext(path)[1].lower())
+            url = f"{STATIC_URL}/{ASSET_DIR}/{self._write(data, ext)}"
+            self._remember(self._urls, key, url)
+        return url
+
+    def data_uri(self, path: str) -> str:
+        """The file as a data: URI, for when static serving is off."""
+        key = self._key(path)
+        uri = self._lookup(self._data_uris, key)
+        if uri is None:
+            with open(path, 'rb') as f:
+                data, ext = _optimize_image(f.read(), os.path.splitext(path)[1].lower())
+            mime = mimetypes.types_map.get(ext, 'application/octet-stream')
+            uri = f"data:{mime};base64,{base64.b64encode(data).decode()}"
+            self._remember(self._data_uris, key, uri)
+        return uri
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_asset_store(static_dir: str) -> AssetStore:
+    """Return the process-wide store for an app's static folder."""
+    static_dir = os.path.abspath(static_dir)
+    store = _stores.get(static_dir)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(static_dir, AssetStore(static_dir))
+    return store
+
+
+def static_serving_enabled() -> bool:
+    import streamlit as st
+    try:
+        return bool(st.get_option('server.enableStaticServing'))
+    except RuntimeError:  # Streamlit older than 1.18
+        return False
+
+
+def image_url(path: str, static_dir: str) -> str:
+    """URL to use for an image in CSS or HTML on this page."""
+    store = get_asset_store(static_dir)
+    if static_serving_enabled():
+        return store.url(path)
+    return store.data_uri(path)
+
+
+def play_audio(data: bytes, format: str = 'audio/wav'):
+    """Autoplay generated audio through Streamlit's media endpoint, not a data URI.
+
+    st.audio stores the bytes once under a content hash and the browser
+    fetches them by URL.
+    """
+    import streamlit as st
+    st.audio(data, format=format, autoplay=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-build static assets for an app.")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--static-dir', required=True, help="the app's static/ folder")
+    args = parser.parse_args()
+
+    store = get_asset_store(args.static_dir)
+    for path in args.files:
+        print(f"{path} -> {store.url(path)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Streamed assistant replies, with tool calls answered as the run asks for them."""
+import time
+from collections import namedtuple
+
+from message_sync import ThreadMirror
+from run_waiter import RunFailed, RunWaiter
+from tool_dispatch import ToolRegistry
+
+# Minimum seconds between placeholder redraws while text streams in.
+REFRESH_INTERVAL = 0.05
+CURSOR = '▌'
+
+Reply = namedtuple('Reply', ['text', 'run_id', 'message_id', 'first_token_ms', 'total_ms'])
+
+_FAILED = {'thread.run.failed', 'thread.run.cancelled', 'thread.run.expired'}
+
+
+class AssistantClient:
+    """Runs an assistant on a thread and streams its reply."""
+
+    def __init__(self, client, assistant_id: str, tools=None, tool_specs: list = None,
+                 stream: bool = None):
+        """`tools` is a ToolRegistry, or a name -> function dict validated against `tool_specs`."""
+        self.client = client
+        self.assistant_id = assistant_id
+        self.tools = tools if isinstance(tools, ToolRegistry) else ToolRegistry.from_specs(tool_specs, tools or {})
+        self.tool_specs = tool_specs
+        self.stream = hasattr(client.beta.threads.runs, 'stream') if stream is None else stream
+
+    def run_tools(self, tool_calls) -> list:
+        """Call the local functions behind the tool calls, concurrently; returns tool_outputs."""
+        return self.tools.dispatch(tool_calls)
+
+    def respond(self, thread_id: str, user_input: str, placeholder=None, mirror: ThreadMirror = None) -> Reply:
+        """Add the user's message, run the assistant and stream the reply.
+
+        `placeholder` is anything with a markdown() method, usually st.empty().
+        `mirror` (e.g. message_sync.session_mirror(thread_id)) records the
+        turn's messages; without one a throwaway mirror is used.
+        """
+        start = time.perf_counter()
+        runs = self.client.beta.threads.runs
+        mirror = mirror or ThreadMirror(thread_id)
+        mirror.add(self.client.beta.threads.messages.create(thread_id=thread_id, role='user', content=user_input))
+        if not self.stream:
+            return self._respond_polled(thread_id, placeholder, start, mirror)
+
+        first_token = None
+        last_draw = 0.0
+        parts, message_id, run_id = [], None, None
+        extra = {'tools': self.tool_specs} if self.tool_specs else {}
+        stream = runs.stream(thread_id=thread_id, assistant_id=self.assistant_id, **extra)
+
+        while stream is not None:
+            tool_calls = None
+            with stream as events:
+                for event in events:
+                    if event.event == 'thread.run.created':
+                        run_id = event.data.id
+                    elif event.event == 'thread.message.created':
+                        message_id = event.data.id
+                    elif event.event == 'thread.message.delta':
+                        for block in event.data.delta.content or ():
+                            if block.type == 'text' and block.text and block.text.value:
+                                parts.append(block.text.value)
+                        if first_token is None and parts:
+                            first_token = time.perf_counter()
+                        now = time.perf_counter()
+                        if placeholder is not None and now - last_draw >= REFRESH_INTERVAL:
+                            placeholder.markdown(''.join(parts) + CURSOR)
+                            last_draw = now
+                    elif event.event == 'thread.message.completed':
+                        mirror.add(event.data)
+                    elif event.event == 'thread.run.requires_action':
+                        tool_calls = event.data.required_action.submit_tool_outputs.tool_calls
+                    elif event.event in _FAILED:
+                        raise RunFailed(event.data.status, event.data.last_error)
+
+            # The run is paused until it gets the tool outputs; its reply
+            # continues on the stream that submits them.
+            stream = None
+            if tool_calls:
+                stream = runs.submit_tool_outputs_stream(thread_id=thread_id, run_id=run_id,
+                                                         tool_outputs=self.run_tools(tool_calls))
+
+        text = ''.join(parts)
+        if placeholder is not None:
+            placeholder.markdown(text)
+        end = time.perf_counter()
+        return Reply(text, run_id, message_id,
+                     (first_token - start) * 1000 if first_token else None, (end - start) * 1000)
+
+    def _respond_polled(self, thread_id: str, placeholder, start: float, mirror: ThreadMirror) -> Reply:
+        extra = {'tools': self.tool_specs} if self.tool_specs else {}
+        run = self.client.beta.threads.runs.create(thread_id=thread_id, assistant_id=self.assistant_id, **extra)
+        RunWaiter(self.client).wait(thread_id, run.id, handle_action=lambda run: self.run_tools(
+            run.required_action.submit_tool_outputs.tool_calls))
+
+        message = mirror.reply(self.client, run.id)
+        text = message.text if message else ''
+        if placeholder is not None:
+            placeholder.markdown(text)
+        elapsed = (time.perf_counter() - start) * 1000
+        return Reply(text, run.id, message.id if message else None, elapsed, elapsed)
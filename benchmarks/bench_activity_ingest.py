@@ -0,0 +1,89 @@
+"""Load test for the buffered activity log.
+
+Simulates hundreds of sessions, each recording section views, quiz answers
+and completions at a steady rate, for a fixed duration. Reports sustained
+ingestion rate, record() latency seen by the script threads, flush count,
+and the size of the raw log and the daily rollups afterwards.
+
+Usage:
+    python benchmarks/bench_activity_ingest.py --sessions 300 --seconds 10 --rate 5
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('SCRYPT_N', '16')
+import activity_log  # noqa: E402
+import portal_db  # noqa: E402
+
+KINDS = (activity_log.SECTION_VIEW, activity_log.QUIZ_ANSWER, activity_log.COMPLETION)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=os.path.join(ROOT, 'users.db'))
+    parser.add_argument('--sessions', type=int, default=300)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--rate', type=float, default=5, help="events per second per session")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_activity_')
+    try:
+        path = os.path.join(workdir, 'users.db')
+        shutil.copyfile(args.db, path)
+        pool = portal_db.use_database(path)
+        portal_db.init_db()
+        portal_db.add_users_bulk((f'bench_{i}', 'x', None) for i in range(args.sessions))
+
+        log = activity_log.ActivityLog()
+        latencies = []
+        lock = threading.Lock()
+        stop = time.monotonic() + args.seconds
+
+        def session(username):
+            local = []
+            interval = 1 / args.rate
+            while time.monotonic() < stop:
+                t0 = time.perf_counter()
+                log.record(username, random.choice(KINDS), 'bench')
+                local.append((time.perf_counter() - t0) * 1e6)
+                time.sleep(random.uniform(0.5, 1.5) * interval)
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=session, args=(f'bench_{i}',))
+                   for i in range(args.sessions)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        log.close()
+        elapsed = time.perf_counter() - t0
+
+        conn = pool.connection()
+        events = conn.execute("SELECT COUNT(*) FROM activity_events").fetchone()[0]
+        rollups = conn.execute("SELECT COUNT(*), TOTAL(events) FROM activity_daily").fetchone()
+        cuts = statistics.quantiles(latencies, n=100)
+        print(f"{args.sessions} sessions x {args.rate}/s for {args.seconds:.0f} s")
+        print(f"ingested {log.flushed} events in {elapsed:.2f} s "
+              f"({log.flushed / elapsed:.0f} events/s) over {log.flushes} flushes")
+        print(f"record() latency p50={cuts[49]:.1f} us p99={cuts[98]:.1f} us")
+        print(f"raw events: {events}, daily rollup rows: {rollups[0]} "
+              f"covering {int(rollups[1])} events")
+        print(f"compacting all raw events (counters kept) removed {log.compact(retention_days=-1)} raw events")
+        pool.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Time-to-first-token of the old polling loop versus streamed runs.
+
+Both modes talk to benchmarks/fake_assistant_server.py through the real
+openai client, one chat turn at a time:
+
+    polling    - messages.create, runs.create, runs.retrieve every second
+                 until the run ends, then messages.list (the pattern the
+                 chatbot pages used); the first token is seen at the end
+    streaming  - AssistantClient.respond()
+
+With --outcome failed (or expired, ...) no turn produces a reply; the
+table then shows how long each mode took to notice, and how the turns
+ended.
+
+Usage:
+    python benchmarks/bench_assistant_latency.py --turns 5 --think 0.5 --tool lookup
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import openai  # noqa: E402
+
+from assistant_client import AssistantClient  # noqa: E402
+from fake_assistant_server import FakeAssistants, add_arguments, serve  # noqa: E402
+from run_waiter import TERMINAL, RunFailed  # noqa: E402
+
+
+def lookup(**arguments):
+    return {'ok': True}
+
+
+def polling_turn(client, thread_id, assistant_id, prompt, tools):
+    start = time.perf_counter()
+    client.beta.threads.messages.create(thread_id=thread_id, role='user', content=prompt)
+    run = client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id)
+    while True:
+        run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+        if run.status in TERMINAL:
+            break
+        if run.status == 'requires_action':
+            outputs = [{'tool_call_id': call.id,
+                        'output': json.dumps(tools[call.function.name](**json.loads(call.function.arguments)))}
+                       for call in run.required_action.submit_tool_outputs.tool_calls]
+            client.beta.threads.runs.submit_tool_outputs(thread_id=thread_id, run_id=run.id,
+                                                         tool_outputs=outputs)
+        time.sleep(1)
+    if run.status == 'completed':
+        client.beta.threads.messages.list(thread_id=thread_id)
+    elapsed = (time.perf_counter() - start) * 1000
+    return (elapsed if run.status == 'completed' else None), elapsed, run.status
+
+
+def streaming_turn(client, thread_id, assistant_id, prompt, tools):
+    start = time.perf_counter()
+    try:
+        reply = AssistantClient(client, assistant_id, tools=tools).respond(thread_id, prompt)
+    except RunFailed as error:
+        return None, (time.perf_counter() - start) * 1000, error.status
+    return reply.first_token_ms, reply.total_ms, 'completed'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--turns', type=int, default=5)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    api = FakeAssistants(args.think, args.tokens, args.token_delay, args.tool,
+                         outcome=args.outcome, latency=args.latency, tool_calls=args.tool_calls)
+    server = serve(api)
+    client = openai.OpenAI(api_key='fake', base_url=f"http://127.0.0.1:{server.server_port}/v1")
+    tools = {args.tool: lookup} if args.tool else {}
+
+    print(f"{'mode':10} {'first token ms':>15} {'end ms':>7} {'requests/turn':>14}  turns ended")
+    for name, turn in (('polling', polling_turn), ('streaming', streaming_turn)):
+        thread_id = client.beta.threads.create().id
+        api.requests = 0
+        results = [turn(client, thread_id, 'asst_fake', f"Question {i}", tools) for i in range(args.turns)]
+        first = [r[0] for r in results if r[0] is not None]
+        ended = Counter(r[2] for r in results)
+        print(f"{name:10} {f'{statistics.median(first):.0f}' if first else '-':>15} "
+              f"{statistics.median(r[1] for r in results):7.0f} {api.requests / args.turns:14.1f}  "
+              + ', '.join(f"{status} x{count}" for status, count in ended.items()))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
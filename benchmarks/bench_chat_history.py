@@ -0,0 +1,79 @@
+"""Rerun cost of a chat page as the conversation grows.
+
+A minimal chat page is loaded in Streamlit's AppTest harness with a
+transcript of N messages already in session state, and rerun --reruns
+times. "before" draws every message as a chat bubble, the way the chatbot
+pages did; "after" uses chat_history.render_history(). We record wall
+time per rerun and the serialized size of the elements sent.
+
+Usage:
+    python benchmarks/bench_chat_history.py --lengths 20 200 1000 --reruns 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def sent_bytes(node) -> int:
+    proto = getattr(node, 'proto', None)
+    total = len(proto.SerializeToString()) if proto is not None else 0
+    for child in getattr(node, 'children', {}).values():
+        total += sent_bytes(child)
+    return total
+
+BEFORE = '''
+import streamlit as st
+for message in st.session_state.messages:
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+'''
+
+AFTER = f'''
+import sys
+sys.path.insert(0, {ROOT!r})
+import streamlit as st
+from chat_history import render_history
+render_history(st.session_state.messages)
+'''
+
+
+def transcript(length: int) -> list:
+    return [{'role': 'user' if i % 2 == 0 else 'assistant',
+             'content': f"Message {i}: how do **for loops** work?\n\n```python\nfor i in range(3):\n    print(i)\n```"}
+            for i in range(length)]
+
+
+def measure(script: str, length: int, reruns: int):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(script, default_timeout=30)
+    at.session_state.messages = transcript(length)
+    at.run()
+    times = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, sent_bytes(at.main)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[20, 200, 1000])
+    parser.add_argument('--reruns', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'messages':>8} {'ms before':>10} {'ms after':>10} {'bytes before':>13} {'bytes after':>12}")
+    for length in args.lengths:
+        before_ms, before_bytes = measure(BEFORE, length, args.reruns)
+        after_ms, after_bytes = measure(AFTER, length, args.reruns)
+        print(f"{length:8} {before_ms:10.1f} {after_ms:10.1f} {before_bytes:13} {after_bytes:12}")
+
+
+if __name__ == '__main__':
+    main()
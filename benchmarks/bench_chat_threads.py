@@ -0,0 +1,74 @@
+"""First-turn thread allocation, with and without the warm pool of spares.
+
+New chat sessions arrive one every --arrival seconds and ask ThreadManager
+for their thread, against benchmarks/fake_assistant_server.py with
+--latency seconds added to every request (the round trip to the real
+API). With no spares each new session waits on threads.create; with
+spares it takes one from the local table while the pool refills in the
+background. Also reports a returning session (served from memory) and a
+session resumed after a restart (served from the chat_threads table), on
+a scratch database.
+
+Usage:
+    python benchmarks/bench_chat_threads.py --sessions 20 --latency 0.3 --arrival 0.5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import openai  # noqa: E402
+
+from chat_threads import ThreadManager  # noqa: E402
+from fake_assistant_server import FakeAssistants, serve  # noqa: E402
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--arrival', type=float, default=0.5)
+    args = parser.parse_args()
+
+    api = FakeAssistants(latency=args.latency)
+    server = serve(api)
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    workdir = tempfile.mkdtemp(prefix='bench_threads_')
+    try:
+        print(f"{'spares':>6} {'first turn ms':>14} {'max ms':>7} {'returning ms':>13} {'resumed ms':>11}")
+        for spares in (0, 4):
+            path = os.path.join(workdir, f'spares_{spares}.db')
+            client = openai.OpenAI(api_key=f'fake-{spares}', base_url=base_url)
+            manager = ThreadManager(client, spares=spares, path=path)
+            manager.refill()
+            time.sleep(args.latency * spares + 0.2)
+
+            first = []
+            for i in range(args.sessions):
+                first.append(timed(manager.thread_for, f'session_{i}', 'asst_fake')[0])
+                time.sleep(args.arrival)
+            returning = [timed(manager.thread_for, f'session_{i}', 'asst_fake')[0] for i in range(args.sessions)]
+            restarted = ThreadManager(client, spares=0, path=path)
+            resumed = [timed(restarted.thread_for, f'session_{i}', 'asst_fake')[0] for i in range(args.sessions)]
+            print(f"{spares:6d} {statistics.median(first):14.1f} {max(first):7.1f} "
+                  f"{statistics.median(returning):13.3f} {statistics.median(resumed):11.3f}")
+            manager.pool.close()
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
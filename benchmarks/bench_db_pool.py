@@ -0,0 +1,167 @@
+"""Replay concurrent logins and "Mark Complete" updates against the portal database.
+
+Runs the same workload twice, each on a scratch database created by
+portal_db.init_db() (so it always has the current schema) and seeded with
+--students accounts:
+
+    before  - one sqlite3.connect() per call, default journal (old login_combo)
+    after   - portal_db's pooled, WAL-mode connections
+
+Usage:
+    python benchmarks/bench_db_pool.py --students 200 --rounds 5
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep KDF cost out of the database numbers; bench_password_cost.py covers it.
+os.environ.setdefault('SCRYPT_N', '16')
+
+import portal_db  # noqa: E402
+
+
+def legacy_verify_user(path, username, password):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("SELECT password_hash FROM users WHERE username = ?", (username,))
+    result = c.fetchone()
+    conn.close()
+    return result is not None and result[0] == hashlib.sha256(password.encode()).hexdigest()
+
+
+def legacy_get_student_data(path, username):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("SELECT progress, achievements, current_module, test_scores "
+              "FROM student_data WHERE username = ?", (username,))
+    result = c.fetchone()
+    conn.close()
+    return {'progress': json.loads(result[0]), 'achievements': json.loads(result[1])}
+
+
+def legacy_update_student_data(path, username, data_type, new_data):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    try:
+        c.execute(f"UPDATE student_data SET {data_type} = ? WHERE username = ?",
+                  (json.dumps(new_data), username))
+        conn.commit()
+        return True
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+
+
+def scratch_database(path, students):
+    """Create a migrated portal database at path with students bench_0, bench_1, ...
+
+    Each student has a legacy SHA-256 password hash, the JSON columns the old
+    code read, and the normalized progress rows portal_db reads.
+    """
+    pool = portal_db.use_database(path)
+    portal_db.init_db()
+    names = [f'bench_{i}' for i in range(students)]
+    password_hash = hashlib.sha256(b'password').hexdigest()
+    progress = json.dumps(portal_db.INITIAL_PROGRESS)
+    with pool.transaction() as conn:
+        conn.executemany(portal_db.SQL_INSERT_USER, [(name, password_hash) for name in names])
+        conn.executemany("INSERT INTO student_data (username, progress, achievements, current_module, test_scores) "
+                         "VALUES (?, ?, '[]', ?, '[]')",
+                         [(name, progress, portal_db.INITIAL_MODULE) for name in names])
+        conn.executemany(portal_db.SQL_UPSERT_PROGRESS,
+                         [(name, module, value) for name in names
+                          for module, value in portal_db.INITIAL_PROGRESS.items()])
+    return pool
+
+
+def replay(students, rounds, login, load, update):
+    """Run one thread per student; return (latencies in ms, error count)."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(students)
+
+    def session(username):
+        local, failed = [], 0
+        start.wait()
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            try:
+                login(username, 'password')
+                student = load(username)
+                student['progress']['python_basics'] += 8.33
+                if not update(username, 'progress', student['progress']):
+                    failed += 1
+            except sqlite3.OperationalError:
+                failed += 1
+            local.append((time.perf_counter() - t0) * 1000)
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=session, args=(f'bench_{i}',)) for i in range(students)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, sum(errors)
+
+
+def report(label, latencies, errors, elapsed):
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{label:<8} p50={cuts[49]:8.2f} ms  p99={cuts[98]:8.2f} ms  "
+          f"ops={len(latencies)}  errors={errors}  wall={elapsed:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_db_pool_')
+    try:
+        before_db = os.path.join(workdir, 'before.db')
+        after_db = os.path.join(workdir, 'after.db')
+        scratch_database(before_db, args.students).close()
+        # The old code ran on SQLite's default rollback journal.
+        conn = sqlite3.connect(before_db)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+
+        t0 = time.perf_counter()
+        latencies, errors = replay(
+            args.students, args.rounds,
+            lambda u, p: legacy_verify_user(before_db, u, p),
+            lambda u: legacy_get_student_data(before_db, u),
+            lambda u, t, d: legacy_update_student_data(before_db, u, t, d),
+        )
+        report('before', latencies, errors, time.perf_counter() - t0)
+
+        pool = scratch_database(after_db, args.students)
+        t0 = time.perf_counter()
+        latencies, errors = replay(
+            args.students, args.rounds,
+            portal_db.verify_user, portal_db.get_student_data, portal_db.update_student_data,
+        )
+        report('after', latencies, errors, time.perf_counter() - t0)
+        print(f"pooled connections opened: {pool.opened}")
+        pool.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Fetching a run's reply: messages.list + data[0] versus ThreadMirror.
+
+Both modes run polled turns against benchmarks/fake_assistant_server.py
+and report the bytes the reply fetch downloaded as the thread grows. With
+--interleave, another writer adds a message to the thread after each run
+(as a second tab or a shared thread would), and the number of turns whose
+fetched reply was not the run's own is counted.
+
+Usage:
+    python benchmarks/bench_message_sync.py --turns 40 --interleave
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx  # noqa: E402
+import openai  # noqa: E402
+
+from fake_assistant_server import FakeAssistants, serve  # noqa: E402
+from message_sync import ThreadMirror, message_text  # noqa: E402
+from run_waiter import RunWaiter  # noqa: E402
+
+
+def list_latest(client, mirror, run_id):
+    messages = client.beta.threads.messages.list(thread_id=mirror.thread_id)
+    return messages.data[0].id, message_text(messages.data[0])
+
+
+def mirror_reply(client, mirror, run_id):
+    reply = mirror.reply(client, run_id)
+    return reply.id, reply.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--turns', type=int, default=40)
+    parser.add_argument('--interleave', action='store_true')
+    args = parser.parse_args()
+
+    api = FakeAssistants(think=0, tokens=40, token_delay=0)
+    server = serve(api)
+    received = [0]
+
+    def count(response):
+        response.read()
+        received[0] += len(response.content)
+
+    client = openai.OpenAI(api_key='fake', base_url=f"http://127.0.0.1:{server.server_port}/v1",
+                           http_client=httpx.Client(event_hooks={'response': [count]}))
+    checkpoints = {n for n in (1, 5, 10, args.turns) if n <= args.turns}
+
+    print(f"{'mode':12} " + ' '.join(f"{f'turn {n} B':>10}" for n in sorted(checkpoints)) + f" {'wrong':>6}")
+    for name, fetch in (('list+data[0]', list_latest), ('mirror', mirror_reply)):
+        thread_id = client.beta.threads.create().id
+        mirror = ThreadMirror(thread_id)
+        sizes, wrong = {}, 0
+        for turn in range(1, args.turns + 1):
+            mirror.add(client.beta.threads.messages.create(thread_id=thread_id, role='user', content=f"Q{turn}"))
+            run = client.beta.threads.runs.create(thread_id=thread_id, assistant_id='asst_fake')
+            RunWaiter(client, first_delay=0.01).wait(thread_id, run.id)
+            if args.interleave:
+                api.add_message(thread_id, 'assistant', 'a reply from another run', 'run_other', 'asst_fake')
+            received[0] = 0
+            message_id, _ = fetch(client, mirror, run.id)
+            if turn in checkpoints:
+                sizes[turn] = received[0]
+            own = [m['id'] for m in api.threads[thread_id] if m['run_id'] == run.id]
+            wrong += message_id not in own
+        print(f"{name:12} " + ' '.join(f"{sizes[n]:10d}" for n in sorted(checkpoints)) + f" {wrong:6d}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Pick scrypt cost parameters for a target p99 login time under load.
+
+Simulates N students logging in at the same moment: each login is one
+verify_password() call pushed through the bounded HashingPool. For each
+candidate SCRYPT_N it reports p50/p99 login latency, then recommends the
+largest N whose p99 stays under the target.
+
+Usage:
+    python benchmarks/bench_password_cost.py --concurrent 30 --target-ms 1500
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import passwords  # noqa: E402
+
+
+def login_storm(pool, stored, concurrent):
+    latencies = []
+    lock = threading.Lock()
+    start = threading.Barrier(concurrent)
+
+    def login():
+        start.wait()
+        t0 = time.perf_counter()
+        pool.verify('correct horse', stored)
+        with lock:
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=login) for _ in range(concurrent)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrent', type=int, default=30)
+    parser.add_argument('--target-ms', type=float, default=1500)
+    parser.add_argument('--workers', type=int, default=passwords.WORKERS)
+    parser.add_argument('--r', type=int, default=passwords.SCRYPT_R)
+    parser.add_argument('--p', type=int, default=passwords.SCRYPT_P)
+    parser.add_argument('--min-log2n', type=int, default=12)
+    parser.add_argument('--max-log2n', type=int, default=17)
+    args = parser.parse_args()
+
+    pool = passwords.HashingPool(args.workers)
+    passwords.SCRYPT_R, passwords.SCRYPT_P = args.r, args.p
+    print(f"{args.concurrent} concurrent logins, {args.workers} hashing workers, "
+          f"r={args.r} p={args.p}")
+    best = None
+    for log2n in range(args.min_log2n, args.max_log2n + 1):
+        passwords.SCRYPT_N = 2 ** log2n
+        stored = passwords.hash_password('correct horse', 'scrypt')
+        latencies = login_storm(pool, stored, args.concurrent)
+        cuts = statistics.quantiles(latencies, n=100)
+        ok = cuts[98] <= args.target_ms
+        print(f"N=2**{log2n:<3} p50={cuts[49]:8.1f} ms  p99={cuts[98]:8.1f} ms  "
+              f"{'ok' if ok else 'over target'}")
+        if ok:
+            best = log2n
+        else:
+            break
+    pool.shutdown()
+
+    if best is None:
+        print("No candidate met the target; raise --target-ms or add workers.")
+    else:
+        print(f"Recommended: SCRYPT_N={2 ** best} SCRYPT_R={args.r} SCRYPT_P={args.p} "
+              f"PASSWORD_WORKERS={args.workers}")
+
+
+if __name__ == '__main__':
+    main()
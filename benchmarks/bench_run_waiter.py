@@ -0,0 +1,74 @@
+"""Fixed one-second polling versus RunWaiter, on runs of different lengths.
+
+Each mode waits for runs on benchmarks/fake_assistant_server.py through
+the real openai client. "Lag" is how long after the run finished the
+waiter noticed; "requests" counts runs.retrieve calls per run. A final
+pass checks that a failing run ends the wait instead of spinning.
+
+Usage:
+    python benchmarks/bench_run_waiter.py --durations 0.3 2.5 8.5 30.5 --runs 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import openai  # noqa: E402
+
+from fake_assistant_server import FakeAssistants, serve  # noqa: E402
+from run_waiter import RUN_LATENCY, RunFailed, RunWaiter  # noqa: E402
+
+
+def fixed_wait(client, thread_id, run_id):
+    while True:
+        run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+        if run.status == 'completed':
+            return run
+        time.sleep(1)
+
+
+def adaptive_wait(client, thread_id, run_id):
+    return RunWaiter(client).wait(thread_id, run_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--durations', type=float, nargs='+', default=[0.3, 2.5, 8.5, 30.5])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    api = FakeAssistants(tokens=0)
+    server = serve(api)
+    client = openai.OpenAI(api_key='fake', base_url=f"http://127.0.0.1:{server.server_port}/v1")
+    thread_id = client.beta.threads.create().id
+
+    print(f"{'run s':>6} {'mode':9} {'lag ms':>8} {'requests':>9}")
+    for duration in args.durations:
+        api.think = duration
+        for name, wait in (('fixed 1s', fixed_wait), ('adaptive', adaptive_wait)):
+            lags, requests = [], []
+            for _ in range(args.runs):
+                run = client.beta.threads.runs.create(thread_id=thread_id, assistant_id='asst_fake')
+                start = time.perf_counter()
+                api.requests = 0
+                wait(client, thread_id, run.id)
+                lags.append((time.perf_counter() - start - duration) * 1000)
+                requests.append(api.requests)
+            print(f"{duration:6.1f} {name:9} {statistics.median(lags):8.0f} {statistics.median(requests):9.0f}")
+
+    api.think, api.outcome = 0.3, 'failed'
+    run = client.beta.threads.runs.create(thread_id=thread_id, assistant_id='asst_fake')
+    try:
+        RunWaiter(client).wait(thread_id, run.id)
+    except RunFailed as error:
+        print(f"failing run stopped the wait: {error}")
+    print("histogram:", RUN_LATENCY.summary())
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Time-to-first-render and per-rerun start-up overhead of combo.py.
+
+Each mode runs in a fresh process on its own scratch copy of users.db:
+
+    before  - init_db() at the top of every rerun; lessons, session secret
+              and connections are loaded lazily by the first page that
+              needs them
+    after   - bootstrap() once, then only the cached Runtime per rerun
+
+"First render" is what a returning student's first page needs: resume the
+session, load the profile and open a lesson, on a new script thread as
+Streamlit would run it. Reruns are also replayed on fresh threads.
+
+Usage:
+    python benchmarks/bench_startup.py --reruns 500
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+START = time.perf_counter()
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def on_new_thread(func):
+    result = {}
+
+    def run():
+        start = time.perf_counter()
+        func()
+        result['seconds'] = time.perf_counter() - start
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    return result['seconds']
+
+
+def child(mode: str, reruns: int):
+    sys.path.insert(0, ROOT)
+    import portal_db
+    from bootstrap import bootstrap
+    from lesson_store import get_lesson_store
+    from sessions import get_session_store
+
+    username = portal_db.get_pool().connection().execute(
+        "SELECT username FROM users LIMIT 1").fetchone()[0]
+
+    def first_render():
+        if mode == 'before':
+            portal_db.init_db()
+        else:
+            bootstrap()
+        get_session_store().validate('unknown.token')
+        portal_db.get_student_data(username)
+        get_lesson_store().get('1.1')
+
+    on_new_thread(first_render)
+    first_render_ms = (time.perf_counter() - START) * 1000
+
+    per_rerun = portal_db.init_db if mode == 'before' else bootstrap
+    rerun_us = statistics.median(on_new_thread(per_rerun) for _ in range(reruns)) * 1e6
+    print(json.dumps({'first_render_ms': first_render_ms, 'rerun_us': rerun_us}))
+
+
+def run_mode(mode: str, reruns: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'users.db')
+        shutil.copy(os.path.join(ROOT, 'users.db'), db)
+        env = dict(os.environ, USERS_DB_PATH=db, SESSION_SECRET='bench')
+        out = subprocess.run([sys.executable, __file__, '--child', mode, '--reruns', str(reruns)],
+                             env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reruns', type=int, default=500)
+    parser.add_argument('--child', choices=['before', 'after'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.reruns)
+        return
+
+    before, after = run_mode('before', args.reruns), run_mode('after', args.reruns)
+    print(f"{'':8} {'first render ms':>16} {'per-rerun us':>13}")
+    for name, row in (('before', before), ('after', after)):
+        print(f"{name:8} {row['first_render_ms']:16.1f} {row['rerun_us']:13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Cost of a widget click on the long tutorial pages, with and without fragments.
+
+Each page is served by a real `streamlit run` and driven over its websocket
+the way the browser does: open the page, pick the section named below from
+the sidebar, then press the listed button --clicks times. For every click
+we record the time until the script run finished and the bytes the server
+sent. With RENDER_CACHE=0 the button reruns the whole page (every markdown
+and code block of the section is re-sent); with fragments on, only the
+@interactive block around the button reruns.
+
+The client acks every frame at once (TCP_QUICKACK, on Linux): with delayed
+ACKs, Nagle on the server side adds ~40 ms stalls to loopback round trips
+that have nothing to do with the page.
+
+basic_chatbot_instructions.py has no widgets besides its section picker,
+which has to rerun the page, so it is measured on that and shows the same
+cost in both modes.
+
+Usage:
+    python benchmarks/bench_static_pages.py --clicks 20
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# page, (sidebar radio label, section), label of the button to click (None: switch sections)
+PAGES = [
+    ('Basic_Streamlit_Instructions/Streamlit_X_OOP.py',
+     ('Choose a section:', 'Game State Management'), 'Add 1 to counter'),
+    ('Basic_Chatbot_Instructions/v2_Assistant_Course.py',
+     ('Choose a topic:', 'Project Setup'), '🎉 Project Setup Complete!'),
+    ('Basic_Chatbot_Instructions/basic_chatbot_instructions.py',
+     ('Navigation', 'Full Code'), None),
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(page: str, enabled: bool):
+    port = free_port()
+    env = dict(os.environ, RENDER_CACHE='1' if enabled else '0')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', os.path.join(ROOT, page), '--server.headless', 'true',
+         '--server.port', str(port), '--server.enableXsrfProtection', 'false',
+         '--browser.gatherUsageStats', 'false', '--global.developmentMode', 'false'],
+        cwd=os.path.dirname(os.path.join(ROOT, page)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(200):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"streamlit did not start for {page}")
+
+
+class Browser:
+    """Just enough of the Streamlit frontend to rerun a script and see what it sent."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.page_script_hash = ''
+        self.widgets = {}       # label -> (widget proto, fragment_id)
+        self.values = {}        # widget id -> WidgetState kept across reruns
+
+    async def rerun(self, trigger=None, fragment_id=''):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = self.page_script_hash
+        msg.rerun_script.fragment_id = fragment_id
+        states = list(self.values.values()) + ([trigger] if trigger is not None else [])
+        msg.rerun_script.widget_states.widgets.extend(states)
+        start = time.perf_counter()
+        await self.connection.write_message(msg.SerializeToString(), binary=True)
+        received = 0
+        while True:
+            data = await self.connection.read_message()
+            if hasattr(socket, 'TCP_QUICKACK'):
+                self.connection.stream.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+            received += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'new_session':
+                self.page_script_hash = forward.new_session.page_script_hash
+            elif kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                widget = getattr(element, element.WhichOneof('type'))
+                if hasattr(widget, 'label') and hasattr(widget, 'id'):
+                    self.widgets[widget.label] = (widget, forward.delta.fragment_id)
+            elif kind == 'script_finished':
+                return (time.perf_counter() - start) * 1000, received
+
+    def state(self, label: str):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        return WidgetState(id=self.widgets[label][0].id)
+
+    async def choose(self, label: str, option: str):
+        state = self.state(label)
+        state.int_value = list(self.widgets[label][0].options).index(option)
+        self.values[state.id] = state
+        return await self.rerun()
+
+    async def click(self, label: str):
+        state = self.state(label)
+        state.trigger_value = True
+        return await self.rerun(state, self.widgets[label][1])
+
+
+async def drive(port: int, picker, button, clicks: int):
+    from tornado.websocket import websocket_connect
+
+    connection = await websocket_connect(f"ws://127.0.0.1:{port}/_stcore/stream")
+    connection.stream.set_nodelay(True)
+    browser = Browser(connection)
+    await browser.rerun()
+    await browser.choose(*picker)
+    results = []
+    for i in range(clicks):
+        if button is None:
+            label, option = picker
+            options = list(browser.widgets[label][0].options)
+            results.append(await browser.choose(label, options[(options.index(option) + i + 1) % len(options)]))
+        else:
+            results.append(await browser.click(button))
+    connection.close()
+    return statistics.median(ms for ms, _ in results), statistics.mean(size for _, size in results)
+
+
+def measure(page: str, picker, button, clicks: int, enabled: bool):
+    process, port = start_server(page, enabled)
+    try:
+        return asyncio.run(drive(port, picker, button, clicks))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clicks', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'page':58} {'ms before':>10} {'ms after':>9} {'bytes before':>13} {'bytes after':>12}")
+    for page, picker, button in PAGES:
+        before = measure(page, picker, button, args.clicks, enabled=False)
+        after = measure(page, picker, button, args.clicks, enabled=True)
+        print(f"{page:58} {before[0]:10.1f} {after[0]:9.1f} {before[1]:13.0f} {after[1]:12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Sequential tool calls versus ToolRegistry.dispatch, on multi-tool turns.
+
+Each streamed turn on benchmarks/fake_assistant_server.py stops once for
+--tool-calls calls to a tool that blocks for --tool-latency seconds (a
+Google Calendar request, say). "sequential" answers them one after another
+as the pages used to; "concurrent" is AssistantClient's registry. A last
+pass shows that invalid arguments and a tool past its timeout come back as
+error outputs instead of failing the turn.
+
+Usage:
+    python benchmarks/bench_tool_dispatch.py --tool-calls 3 --tool-latency 0.4 --turns 3
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import openai  # noqa: E402
+
+from assistant_client import AssistantClient  # noqa: E402
+from fake_assistant_server import FakeAssistants, serve  # noqa: E402
+from tool_dispatch import ToolRegistry  # noqa: E402
+
+SPECS = [{'type': 'function', 'function': {'name': 'lookup', 'parameters': {
+    'type': 'object', 'properties': {'days': {'type': 'integer'}}, 'required': ['days']}}}]
+
+
+class SequentialClient(AssistantClient):
+    """AssistantClient with the old run_tools loop: one call after another."""
+    functions = {}
+
+    def run_tools(self, tool_calls):
+        return [{'tool_call_id': call.id,
+                 'output': json.dumps(self.functions[call.function.name](**json.loads(call.function.arguments)))}
+                for call in tool_calls]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tool-calls', type=int, default=3)
+    parser.add_argument('--tool-latency', type=float, default=0.4)
+    parser.add_argument('--turns', type=int, default=3)
+    args = parser.parse_args()
+
+    def lookup(days):
+        time.sleep(args.tool_latency)
+        return {'events': days}
+
+    api = FakeAssistants(think=0.1, tokens=5, token_delay=0.01, tool='lookup',
+                         tool_arguments='{"days": 7}', tool_calls=args.tool_calls)
+    server = serve(api)
+    client = openai.OpenAI(api_key='fake', base_url=f"http://127.0.0.1:{server.server_port}/v1")
+    registry = ToolRegistry.from_specs(SPECS, {'lookup': lookup})
+
+    SequentialClient.functions = {'lookup': lookup}
+
+    print(f"{'mode':11} {'reply ms':>9}")
+    for name, assistant in (('sequential', SequentialClient(client, 'asst_fake', tool_specs=SPECS)),
+                            ('concurrent', AssistantClient(client, 'asst_fake', tools=registry, tool_specs=SPECS))):
+        thread_id = client.beta.threads.create().id
+        totals = [assistant.respond(thread_id, f"Question {i}").total_ms for i in range(args.turns)]
+        print(f"{name:11} {statistics.median(totals):9.0f}")
+    server.shutdown()
+
+    registry.register('slow', lambda: time.sleep(1), timeout=0.2)
+    calls = [SimpleNamespace(id=f'call_{i}', function=SimpleNamespace(name=tool, arguments=arguments))
+             for i, (tool, arguments) in enumerate((('lookup', '{"days": "seven"}'), ('lookup', '{}'),
+                                                    ('slow', '{}'), ('missing', '{}')))]
+    for output in registry.dispatch(calls):
+        print(f"{output['tool_call_id']}: {output['output']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""End-of-workshop burst: every student clicks "Mark Complete" at once.
+
+Compares one transaction per write (the old update_student_data path)
+with portal_db's group-commit writer, each on a scratch database created
+by portal_db.init_db(), and reports commits issued and wall time, plus the latency of a lone write
+when nobody else is writing.
+
+Usage:
+    python benchmarks/bench_write_coalescing.py --students 200
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import portal_db  # noqa: E402
+
+
+def mark_complete(username):
+    with portal_db.student_writes(username):
+        portal_db.complete_section(username, "Level 1: Python Basics", "1.1 Introduction to IDLE")
+        portal_db.set_module_progress(username, 'python_basics', 8.33)
+        portal_db.add_achievement(username, "First Python Program")
+
+
+def mark_complete_uncoalesced(username):
+    # One transaction per write, as combo.py did before.
+    pool = portal_db.get_pool()
+    for sql, params in (
+        (portal_db.SQL_INSERT_SECTION_COMPLETION,
+         (username, "Level 1: Python Basics", "1.1 Introduction to IDLE")),
+        (portal_db.SQL_UPSERT_PROGRESS, (username, 'python_basics', 8.33)),
+        (portal_db.SQL_INSERT_ACHIEVEMENT, (username, "First Python Program")),
+    ):
+        with pool.transaction() as conn:
+            conn.execute(sql, params)
+            conn.execute(portal_db.SQL_BUMP_STUDENT_VERSION, (username,))
+
+
+def burst(students, action):
+    start = threading.Barrier(students)
+
+    def click(username):
+        start.wait()
+        action(username)
+
+    threads = [threading.Thread(target=click, args=(f'bench_{i}',)) for i in range(students)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_coalesce_')
+    try:
+        for label, action in (('per-write', mark_complete_uncoalesced), ('coalesced', mark_complete)):
+            pool = portal_db.use_database(os.path.join(workdir, f'{label}.db'))
+            portal_db.init_db()
+            password_hash = portal_db.get_hashing_pool().hash('password')
+            portal_db.add_users_bulk([(f'bench_{i}', password_hash, None) for i in range(args.students)])
+            writer = portal_db.get_writer()
+
+            elapsed = burst(args.students, action)
+            commits = args.students * 3 if label == 'per-write' else writer.commits
+            lone = []
+            for i in range(50):
+                t0 = time.perf_counter()
+                action(f'bench_{i % args.students}')
+                lone.append((time.perf_counter() - t0) * 1000)
+            print(f"{label:<10} commits={commits:5d}  wall={elapsed * 1000:8.1f} ms  "
+                  f"lone write p50={statistics.median(lone):6.2f} ms")
+            writer.close()
+            pool.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+"""A local stand-in for the OpenAI Assistants API, for offline benchmarks.
+
+Implements just enough of /v1/threads for the chatbot pages: creating and
+updating threads, creating and listing messages, creating, retrieving,
+cancelling and listing runs, submitting tool outputs, and streaming runs
+as server-sent events. A run "thinks" for --think seconds, optionally stops
+once for --tool-calls parallel calls to --tool, then writes --tokens tokens --token-delay seconds
+apart, or ends with --outcome (failed, expired, ...) instead. Polled runs
+follow the same timeline, so streaming and polling can be compared on
+equal terms. --latency adds a fixed delay to every request, standing in
+for the round trip to the real API.
+
+    python benchmarks/fake_assistant_server.py --port 8765 --tool get_current_temperature
+
+    client = openai.OpenAI(api_key='fake', base_url='http://127.0.0.1:8765/v1')
+"""
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+_ids = itertools.count(1)
+
+
+def new_id(prefix: str) -> str:
+    return f"{prefix}_{next(_ids):012d}"
+
+
+class FakeAssistants:
+    """In-memory threads, messages and runs with a scripted timeline."""
+
+    def __init__(self, think=0.5, tokens=40, token_delay=0.02, tool=None, tool_arguments='{}',
+                 outcome='completed', latency=0.0, tool_calls=1):
+        self.think = think
+        self.latency = latency
+        self.outcome = outcome
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.tool = tool
+        self.tool_arguments = tool_arguments
+        self.tool_calls = tool_calls
+        self.threads = {}
+        self.runs = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    # -- objects ---------------------------------------------------------
+
+    def create_thread(self) -> dict:
+        thread = {'id': new_id('thread'), 'object': 'thread', 'created_at': int(time.time()),
+                  'metadata': {}, 'tool_resources': None}
+        with self.lock:
+            self.threads[thread['id']] = []
+        return thread
+
+    def add_message(self, thread_id, role, text, run_id=None, assistant_id=None) -> dict:
+        message = {'id': new_id('msg'), 'object': 'thread.message', 'created_at': int(time.time()),
+                   'thread_id': thread_id, 'role': role, 'status': 'completed',
+                   'content': [{'type': 'text', 'text': {'value': text, 'annotations': []}}],
+                   'run_id': run_id, 'assistant_id': assistant_id, 'attachments': [], 'metadata': {}}
+        with self.lock:
+            self.threads.setdefault(thread_id, []).append(message)
+        return message
+
+    def reply_tokens(self, run):
+        return [f"token{i} " for i in range(self.tokens)]
+
+    def create_run(self, thread_id, assistant_id) -> dict:
+        run = {'id': new_id('run'), 'object': 'thread.run', 'created_at': int(time.time()),
+               'thread_id': thread_id, 'assistant_id': assistant_id, 'status': 'queued',
+               'required_action': None, 'last_error': None, 'completed_at': None,
+               'cancelled_at': None, 'failed_at': None, 'expires_at': None, 'started_at': None,
+               'instructions': '', 'model': 'fake', 'tools': [], 'metadata': {}, 'usage': None,
+               # Timeline bookkeeping, stripped from responses.
+               '_phase_start': time.monotonic(), '_needs_tool': bool(self.tool)}
+        with self.lock:
+            self.runs[run['id']] = run
+        return run
+
+    @staticmethod
+    def public(run) -> dict:
+        return {key: value for key, value in run.items() if not key.startswith('_')}
+
+    def _tool_action(self):
+        return {'type': 'submit_tool_outputs', 'submit_tool_outputs': {'tool_calls': [
+            {'id': new_id('call'), 'type': 'function',
+             'function': {'name': self.tool, 'arguments': self.tool_arguments}}
+            for _ in range(self.tool_calls)]}}
+
+    def advance(self, run) -> dict:
+        """Move a polled run along its timeline; returns the public run."""
+        with self.lock:
+            status = run['status']
+        if status in ('queued', 'in_progress'):
+            elapsed = time.monotonic() - run['_phase_start']
+            writing = self.tokens * self.token_delay
+            if elapsed < self.think:
+                run['status'] = 'in_progress'
+            elif run['_needs_tool']:
+                run['status'], run['required_action'] = 'requires_action', self._tool_action()
+            elif self.outcome != 'completed':
+                run['status'] = self.outcome
+                run['last_error'] = {'code': 'server_error', 'message': f"Run {self.outcome}"}
+            elif elapsed >= self.think + writing:
+                self.add_message(run['thread_id'], 'assistant', ''.join(self.reply_tokens(run)),
+                                 run['id'], run['assistant_id'])
+                run['status'], run['completed_at'] = 'completed', int(time.time())
+            else:
+                run['status'] = 'in_progress'
+        return self.public(run)
+
+    def submit_tool_outputs(self, run) -> dict:
+        run['_needs_tool'] = False
+        run['required_action'] = None
+        run['status'] = 'queued'
+        run['_phase_start'] = time.monotonic()
+        return self.public(run)
+
+    # -- streaming -------------------------------------------------------
+
+    def stream_run(self, run, send):
+        """Play a run's timeline as server-sent events."""
+        public = self.public
+        if run['status'] == 'queued' and not run.get('_streamed'):
+            run['_streamed'] = True
+            send('thread.run.created', public(run))
+        send('thread.run.queued', public(run))
+        run['status'] = 'in_progress'
+        send('thread.run.in_progress', public(run))
+        time.sleep(self.think)
+
+        if run['_needs_tool']:
+            run['status'], run['required_action'] = 'requires_action', self._tool_action()
+            send('thread.run.requires_action', public(run))
+            return
+        if self.outcome != 'completed':
+            run['status'] = self.outcome
+            run['last_error'] = {'code': 'server_error', 'message': f"Run {self.outcome}"}
+            send(f"thread.run.{self.outcome}", public(run))
+            return
+
+        message = {'id': new_id('msg'), 'object': 'thread.message', 'created_at': int(time.time()),
+                   'thread_id': run['thread_id'], 'role': 'assistant', 'status': 'in_progress',
+                   'content': [], 'run_id': run['id'], 'assistant_id': run['assistant_id'],
+                   'attachments': [], 'metadata': {}}
+        send('thread.message.created', message)
+        send('thread.message.in_progress', message)
+        tokens = self.reply_tokens(run)
+        for token in tokens:
+            time.sleep(self.token_delay)
+            send('thread.message.delta', {'id': message['id'], 'object': 'thread.message.delta',
+                                          'delta': {'content': [{'index': 0, 'type': 'text',
+                                                                 'text': {'value': token, 'annotations': []}}]}})
+        completed = self.add_message(run['thread_id'], 'assistant', ''.join(tokens),
+                                     run['id'], run['assistant_id'])
+        completed['id'] = message['id']
+        send('thread.message.completed', completed)
+        run['status'], run['completed_at'] = 'completed', int(time.time())
+        send('thread.run.completed', public(run))
+
+
+def make_handler(api: FakeAssistants):
+    routes = []
+
+    def route(method, pattern):
+        def register(func):
+            routes.append((method, re.compile(f"^/v1{pattern}$"), func))
+            return func
+        return register
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _body(self) -> dict:
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+        def _json(self, payload, status=200):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, run):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            def send(event, data):
+                chunk = f"event: {event}\ndata: {data if isinstance(data, str) else json.dumps(data)}\n\n".encode()
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.flush()
+
+            api.stream_run(run, send)
+            send('done', '[DONE]')
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _query(self) -> dict:
+            return {name: values[0] for name, values in parse_qs(urlsplit(self.path).query).items()}
+
+        def _dispatch(self, method):
+            api.requests += 1
+            if api.latency:
+                time.sleep(api.latency)
+            path = urlsplit(self.path).path
+            for route_method, pattern, func in routes:
+                match = pattern.match(path)
+                if route_method == method and match:
+                    return func(self, *match.groups())
+            self._body()
+            self._json({'error': {'message': f"No route for {method} {path}"}}, 404)
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+    @route('POST', '/threads')
+    def create_thread(handler):
+        handler._body()
+        handler._json(api.create_thread())
+
+    @route('POST', r'/threads/([^/]+)')
+    def update_thread(handler, thread_id):
+        body = handler._body()
+        handler._json({'id': thread_id, 'object': 'thread', 'created_at': int(time.time()),
+                       'metadata': body.get('metadata', {}), 'tool_resources': None})
+
+    @route('POST', r'/threads/([^/]+)/messages')
+    def create_message(handler, thread_id):
+        body = handler._body()
+        handler._json(api.add_message(thread_id, body.get('role', 'user'), body.get('content', '')))
+
+    @route('GET', r'/threads/([^/]+)/messages')
+    def list_messages(handler, thread_id):
+        query = handler._query()
+        with api.lock:
+            data = list(api.threads.get(thread_id, []))
+        if query.get('order', 'desc') == 'desc':
+            data.reverse()
+        if 'after' in query:
+            ids = [message['id'] for message in data]
+            data = data[ids.index(query['after']) + 1:] if query['after'] in ids else data
+        if 'run_id' in query:
+            data = [message for message in data if message['run_id'] == query['run_id']]
+        data = data[:int(query.get('limit', 20))]
+        handler._json({'object': 'list', 'data': data, 'has_more': False,
+                       'first_id': data[0]['id'] if data else None,
+                       'last_id': data[-1]['id'] if data else None})
+
+    @route('POST', r'/threads/([^/]+)/runs')
+    def create_run(handler, thread_id):
+        body = handler._body()
+        run = api.create_run(thread_id, body.get('assistant_id'))
+        if body.get('stream'):
+            handler._stream(run)
+        else:
+            handler._json(api.public(run))
+
+    @route('GET', r'/threads/([^/]+)/runs')
+    def list_runs(handler, thread_id):
+        with api.lock:
+            runs = [run for run in api.runs.values() if run['thread_id'] == thread_id]
+        data = [api.advance(run) for run in reversed(runs)][:20]
+        handler._json({'object': 'list', 'data': data, 'has_more': False,
+                       'first_id': data[0]['id'] if data else None,
+                       'last_id': data[-1]['id'] if data else None})
+
+    @route('GET', r'/threads/([^/]+)/runs/([^/]+)')
+    def retrieve_run(handler, thread_id, run_id):
+        handler._json(api.advance(api.runs[run_id]))
+
+    @route('POST', r'/threads/([^/]+)/runs/([^/]+)/cancel')
+    def cancel_run(handler, thread_id, run_id):
+        handler._body()
+        run = api.runs[run_id]
+        run['status'], run['cancelled_at'] = 'cancelled', int(time.time())
+        handler._json(api.public(run))
+
+    @route('POST', r'/threads/([^/]+)/runs/([^/]+)/submit_tool_outputs')
+    def submit_tool_outputs(handler, thread_id, run_id):
+        body = handler._body()
+        run = api.runs[run_id]
+        api.submit_tool_outputs(run)
+        if body.get('stream'):
+            handler._stream(run)
+        else:
+            handler._json(api.public(run))
+
+    return Handler
+
+
+def serve(api: FakeAssistants, port: int = 0) -> ThreadingHTTPServer:
+    """Start the server on a background thread; server.server_port has the port."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(api))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_arguments(parser):
+    parser.add_argument('--think', type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument('--tokens', type=int, default=40)
+    parser.add_argument('--token-delay', type=float, default=0.02)
+    parser.add_argument('--tool', help="function name the run calls once before replying")
+    parser.add_argument('--tool-calls', type=int, default=1, help="parallel calls to --tool in that one stop")
+    parser.add_argument('--outcome', default='completed', help="final run status, e.g. failed or expired")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = serve(FakeAssistants(args.think, args.tokens, args.token_delay, args.tool,
+                                  outcome=args.outcome, latency=args.latency,
+                                  tool_calls=args.tool_calls), args.port)
+    print(f"Fake Assistants API on http://127.0.0.1:{server.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Import-time report for the app entry points.
+
+Streamlit entry points do UI work at module level, so they cannot simply
+be imported here. Instead the top-level import statements of each script
+(and its lazy_import() calls) are replayed under `python -X importtime`,
+and the cumulative time of each directly imported module is listed.
+
+Usage:
+    python benchmarks/profile_imports.py              # default entry points
+    python benchmarks/profile_imports.py combo.py --top 5
+"""
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = [
+    'Realtime_test.py',
+    'Basic_Chatbot_Instructions/chatbot_langchain.py',
+    'Goog_Calendar_X_OpenAI/sherlockAI2.py',
+    'combo.py',
+]
+
+_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def import_statements(path: str) -> list:
+    """Top-level imports and `x = lazy_import(...)` assignments, as source."""
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    statements = []
+    for node in ast.parse(source).body:
+        lazy = (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)
+                and getattr(node.value.func, 'id', None) == 'lazy_import')
+        if isinstance(node, (ast.Import, ast.ImportFrom)) or lazy:
+            statements.append(ast.get_source_segment(source, node))
+    return statements
+
+
+def importtime(code: str, cwd: str, env=None) -> str:
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=cwd, env=env, capture_output=True, text=True).stderr
+
+
+def profile(path: str, startup: set):
+    """Return ({module: cumulative ms}, [missing module messages]).
+
+    Modules in `startup` are loaded by the interpreter itself and skipped.
+    """
+    lines = ['import sys']
+    for statement in import_statements(path):
+        lines += ['try:', f'    {statement}', 'except ImportError as error:',
+                  '    print("MISSING", error, file=sys.stderr)']
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.environ.get('PYTHONPATH', '')]))
+    stderr = importtime('\n'.join(lines), os.path.dirname(path), env)
+
+    cumulative, missing = {}, []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        # Depth 0 means imported by the script itself.
+        if match and not match.group(3) and match.group(4) not in startup:
+            cumulative[match.group(4)] = int(match.group(2)) / 1000
+        elif line.startswith('MISSING'):
+            missing.append(line[len('MISSING '):])
+    return cumulative, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('entry_points', nargs='*', default=ENTRY_POINTS)
+    parser.add_argument('--top', type=int, default=10, help="modules listed per entry point")
+    args = parser.parse_args()
+
+    startup = {match.group(4) for match in map(_IMPORTTIME.match, importtime('pass', ROOT).splitlines())
+               if match}
+    for entry_point in args.entry_points:
+        cumulative, missing = profile(os.path.join(ROOT, entry_point), startup)
+        print(f"{entry_point}: {sum(cumulative.values()):.1f} ms")
+        for module, ms in sorted(cumulative.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {ms:9.1f} ms  {module}")
+        for message in missing:
+            print(f"    not installed: {message}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Start-up work for the student portal, done once per server process.
+
+Streamlit re-executes combo.py on every interaction, but imported modules
+stay loaded, so anything kept here survives across reruns and sessions.
+bootstrap() runs the schema migrations, parks warm database connections,
+parses every lesson and loads the session secret the first time it is
+called; later calls return the same Runtime without touching the database.
+Every cohort in the tenant directory gets the same treatment, so the first
+student of a cohort does not pay for its migrations or lesson parsing.
+"""
+import threading
+import time
+from collections import namedtuple
+
+import tenants
+from passwords import get_hashing_pool
+from portal_db import get_pool
+from sessions import get_session_store
+
+# Connections opened ahead of the first reruns.
+WARM_CONNECTIONS = 4
+
+Runtime = namedtuple('Runtime', ['pool', 'lessons', 'sessions', 'hashing', 'tenants', 'startup_ms'])
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def _start() -> Runtime:
+    start = time.perf_counter()
+    directory = tenants.get_directory()
+    preloaded = set()
+    for tenant in directory:
+        tenants.activate(tenant)
+        if id(tenant.lessons) not in preloaded:
+            tenant.lessons.preload()
+            preloaded.add(id(tenant.lessons))
+    tenants.activate(directory.default)
+    pool = get_pool()
+    pool.warm(WARM_CONNECTIONS)
+    sessions = get_session_store()
+    hashing = get_hashing_pool()
+    return Runtime(pool, directory.default.lessons, sessions, hashing, directory,
+                   (time.perf_counter() - start) * 1000)
+
+
+def bootstrap() -> Runtime:
+    """Return the process-wide Runtime, doing the start-up work on first call."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = _start()
+    return _runtime
@@ -0,0 +1,80 @@
+"""URL query parameters and cookies, across Streamlit versions.
+
+Query parameters are for things that are safe to share in a link (which
+cohort's login page to show). Anything that grants access, like a session
+token, goes in a cookie instead: it is not copied with the URL, kept in
+browser history or sent in Referer headers.
+
+Streamlit cannot set cookies from the server, so set_cookie() queues
+the write and write_cookies() renders it as a zero-height component that
+sets document.cookie on the app's page. Call write_cookies() on every run
+(the login page does), since a write queued just before st.rerun() is only
+rendered on the next run. Such cookies cannot be HttpOnly. They are
+SameSite=Strict, and Secure when the app is served over https. The server
+reads cookies from the request that opened the session's websocket, so a
+cookie written during a session is seen from the next page load on.
+"""
+import json
+from http.cookies import CookieError, SimpleCookie
+
+import streamlit as st
+
+_PENDING = '_browser_cookie_writes'
+
+
+def get_query_param(name: str):
+    """The first value of a URL query parameter, or None."""
+    if hasattr(st, 'query_params'):
+        return st.query_params.get(name)
+    return st.experimental_get_query_params().get(name, [None])[0]
+
+
+def set_query_params(**values):
+    """Set URL query parameters, removing those given as None."""
+    if hasattr(st, 'query_params'):
+        for name, value in values.items():
+            if value is None:
+                st.query_params.pop(name, None)
+            else:
+                st.query_params[name] = value
+    else:
+        params = {name: value[0] for name, value in st.experimental_get_query_params().items()}
+        params.update(values)
+        st.experimental_set_query_params(**{name: value for name, value in params.items() if value})
+
+
+def get_cookie(name: str):
+    """A cookie sent with the page load that started this session, or None."""
+    if hasattr(st, 'context'):
+        return st.context.cookies.get(name)
+    from streamlit.web.server.websocket_headers import _get_websocket_headers
+    headers = _get_websocket_headers() or {}
+    try:
+        morsel = SimpleCookie(headers.get('Cookie', '')).get(name)
+    except CookieError:
+        return None
+    return morsel.value if morsel else None
+
+
+def set_cookie(name: str, value: str, max_age: int):
+    """Queue a cookie for the browser; value None (or max_age 0) deletes it."""
+    st.session_state.setdefault(_PENDING, {})[name] = (value or '', max_age if value else 0)
+
+
+def delete_cookie(name: str):
+    set_cookie(name, None, 0)
+
+
+def write_cookies():
+    """Send the queued cookie writes to the browser."""
+    pending = st.session_state.pop(_PENDING, None)
+    if not pending:
+        return
+    import streamlit.components.v1 as components
+    lines = ''.join(
+        f"doc.cookie = {json.dumps(f'{name}={value}; Max-Age={max_age}; Path=/; SameSite=Strict')} + secure;"
+        for name, (value, max_age) in pending.items())
+    components.html(
+        "<script>const doc = window.parent.document;"
+        "const secure = window.parent.location.protocol === 'https:' ? '; Secure' : '';"
+        f"{lines}</script>", height=0)
@@ -0,0 +1,50 @@
+"""Chat transcript rendering: recent messages as bubbles, older ones in cached pages loaded on demand."""
+import functools
+import os
+
+import streamlit as st
+
+PAGE_SIZE = int(os.environ.get('CHAT_PAGE_SIZE', '20'))
+
+ROLE_LABELS = {'user': '🧑 **You**', 'assistant': '🤖 **Assistant**'}
+
+
+@functools.lru_cache(maxsize=512)
+def _page_markdown(page: tuple) -> str:
+    """One Markdown block for a page of (role, content) pairs."""
+    return '\n\n---\n\n'.join(f"{ROLE_LABELS.get(role, f'**{role}**')}\n\n{content}"
+                              for role, content in page)
+
+
+def _show_more(state_key: str):
+    st.session_state[state_key] = st.session_state.get(state_key, 0) + 1
+
+
+def window_start(count: int, page_size: int = PAGE_SIZE) -> int:
+    """Index of the first message drawn as a bubble.
+
+    At least one page worth of recent messages is always shown; the start
+    is rounded down to a page boundary so older pages stay fixed.
+    """
+    return max(0, (count - page_size) // page_size * page_size)
+
+
+def render_history(messages: list, key: str = 'chat', page_size: int = PAGE_SIZE):
+    """Draw the recent messages, plus however many older pages were requested."""
+    state_key = f'{key}_pages_shown'
+    start = window_start(len(messages), page_size)
+    hidden_pages = start // page_size
+    shown = min(st.session_state.get(state_key, 0), hidden_pages)
+
+    if shown < hidden_pages:
+        st.button(f"⬆ Show earlier messages ({start - shown * page_size} more)",
+                  key=f'{key}_show_more', on_click=_show_more, args=(state_key,))
+
+    for page_start in range(start - shown * page_size, start, page_size):
+        page = tuple((message['role'], message['content'])
+                     for message in messages[page_start:page_start + page_size])
+        st.markdown(_page_markdown(page))
+
+    for message in messages[start:]:
+        with st.chat_message(message['role']):
+            st.markdown(message['content'])
@@ -0,0 +1,209 @@
+"""One assistant thread per chat session, with a warm pool of spare threads and idle archiving."""
+import hashlib
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from browser_state import get_cookie, set_cookie, write_cookies
+from portal_db import get_pool
+
+log = logging.getLogger(__name__)
+
+# Path of the chat thread database. Override with CHAT_DB_PATH.
+CHAT_DB_PATH = os.path.abspath(os.environ.get(
+    'CHAT_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chat_threads.db')))
+# Empty threads kept ready per API key.
+SPARE_THREADS = 4
+# Seconds without a turn after which a session's thread is archived.
+IDLE_TIMEOUT = 6 * 3600
+# How often idle threads are looked for.
+SWEEP_INTERVAL = 600
+# last_used is written at most this often per session.
+TOUCH_INTERVAL = 60
+
+SESSION_COOKIE = 'chat_session'
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS chat_threads
+       (owner TEXT NOT NULL,
+        session_key TEXT NOT NULL,
+        assistant_id TEXT NOT NULL,
+        thread_id TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        archived_at REAL,
+        PRIMARY KEY (owner, session_key, assistant_id))''',
+    "CREATE INDEX IF NOT EXISTS idx_chat_threads_idle ON chat_threads (last_used) WHERE archived_at IS NULL",
+    '''CREATE TABLE IF NOT EXISTS chat_thread_spares
+       (thread_id TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        created_at REAL NOT NULL)''',
+    "CREATE INDEX IF NOT EXISTS idx_chat_thread_spares_owner ON chat_thread_spares (owner, created_at)",
+)
+
+
+class ThreadManager:
+    """Session -> thread map with a warm pool of spare threads, for one API key."""
+
+    def __init__(self, client, spares: int = SPARE_THREADS, idle_timeout: float = IDLE_TIMEOUT,
+                 sweep_interval: float = SWEEP_INTERVAL, path: str = CHAT_DB_PATH):
+        self.client = client
+        self.pool = get_pool(os.path.abspath(path))
+        self.owner = hashlib.sha256(client.api_key.encode()).hexdigest()[:16]
+        self.spares = spares
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._next_sweep = time.time() + sweep_interval
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chat-threads')
+        with self.pool.transaction() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def thread_for(self, session_key: str, assistant_id: str) -> str:
+        """The thread of this chat session, allocating one on first use."""
+        now = time.time()
+        key = (session_key, assistant_id)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and now - cached[1] < self.idle_timeout:
+            if now - cached[1] >= TOUCH_INTERVAL:
+                self._touch(key, cached[0], now)
+            self._maybe_sweep(now)
+            return cached[0]
+
+        row = self.pool.connection().execute(
+            "SELECT thread_id, last_used FROM chat_threads "
+            "WHERE owner = ? AND session_key = ? AND assistant_id = ? AND archived_at IS NULL",
+            (self.owner, session_key, assistant_id)).fetchone()
+        if row is not None and now - row[1] < self.idle_timeout:
+            self._touch(key, row[0], now)
+        else:
+            thread_id = self._take_spare() or self.client.beta.threads.create().id
+            with self.pool.transaction() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO chat_threads "
+                    "(owner, session_key, assistant_id, thread_id, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.owner, session_key, assistant_id, thread_id, now, now))
+            with self._lock:
+                self._cache[key] = (thread_id, now)
+            self.refill()
+            if row is not None:
+                self._background.submit(self._archive_remote, [row[0]])
+            row = (thread_id, now)
+        self._maybe_sweep(now)
+        return row[0]
+
+    def _touch(self, key, thread_id: str, now: float):
+        with self._lock:
+            self._cache[key] = (thread_id, now)
+        with self.pool.transaction() as conn:
+            conn.execute(
+                "UPDATE chat_threads SET last_used = ? WHERE owner = ? AND session_key = ? AND assistant_id = ?",
+                (now, self.owner) + key)
+
+    def _take_spare(self):
+        with self.pool.transaction() as conn:
+            row = conn.execute(
+                "SELECT thread_id FROM chat_thread_spares WHERE owner = ? ORDER BY created_at LIMIT 1",
+                (self.owner,)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM chat_thread_spares WHERE thread_id = ?", row)
+        return row and row[0]
+
+    def refill(self):
+        """Top the spare threads back up, on the background thread."""
+        with self._lock:
+            if self._refilling or not self.spares:
+                return
+            self._refilling = True
+        self._background.submit(self._refill)
+
+    def _refill(self):
+        try:
+            have = self.pool.connection().execute(
+                "SELECT COUNT(*) FROM chat_thread_spares WHERE owner = ?", (self.owner,)).fetchone()[0]
+            for _ in range(self.spares - have):
+                thread_id = self.client.beta.threads.create().id
+                with self.pool.transaction() as conn:
+                    conn.execute("INSERT INTO chat_thread_spares (thread_id, owner, created_at) VALUES (?, ?, ?)",
+                                 (thread_id, self.owner, time.time()))
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def _maybe_sweep(self, now: float):
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + self.sweep_interval
+        self._background.submit(self.archive_idle, now)
+
+    def archive_idle(self, now: float = None) -> int:
+        """Archive the threads of sessions idle for longer than idle_timeout."""
+        now = time.time() if now is None else now
+        cutoff = now - self.idle_timeout
+        with self.pool.transaction() as conn:
+            rows = conn.execute(
+                "SELECT session_key, assistant_id, thread_id FROM chat_threads "
+                "WHERE owner = ? AND archived_at IS NULL AND last_used < ?",
+                (self.owner, cutoff)).fetchall()
+            conn.execute(
+                "UPDATE chat_threads SET archived_at = ? WHERE owner = ? AND archived_at IS NULL AND last_used < ?",
+                (now, self.owner, cutoff))
+        with self._lock:
+            for session_key, assistant_id, _ in rows:
+                self._cache.pop((session_key, assistant_id), None)
+        self._archive_remote([thread_id for _, _, thread_id in rows])
+        return len(rows)
+
+    def _archive_remote(self, thread_ids):
+        for thread_id in thread_ids:
+            try:
+                self.client.beta.threads.update(thread_id, metadata={'archived': 'true'})
+            except Exception as e:
+                log.warning("Could not tag thread %s as archived: %s", thread_id, e)
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_thread_manager(client) -> ThreadManager:
+    """Return the process-wide manager for the client's API key."""
+    manager = _managers.get(client.api_key)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(client.api_key)
+            if manager is None:
+                manager = _managers[client.api_key] = ThreadManager(client)
+                manager.refill()
+    return manager
+
+
+def _session_key() -> str:
+    """This browser's chat key, scoped to the signed-in user if there is one.
+
+    The random part is kept in a cookie, not the URL, so a refresh keeps the
+    conversation without the link handing it to whoever it is shared with.
+    """
+    import streamlit as st
+    token = st.session_state.get('chat_session_token') or get_cookie(SESSION_COOKIE)
+    if not token:
+        token = secrets.token_urlsafe(16)
+        set_cookie(SESSION_COOKIE, token, max_age=int(IDLE_TIMEOUT))
+    st.session_state.chat_session_token = token
+    write_cookies()
+    username = st.session_state.get('username')
+    return f"{username}:{token}" if username else token
+
+
+def session_thread(client, assistant_id: str) -> str:
+    """The current Streamlit session's thread for an assistant."""
+    return get_thread_manager(client).thread_for(_session_key(), assistant_id)
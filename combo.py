@@ -1,9 +1,14 @@
 # app.py
 
 import streamlit as st
-from login_combo import init_db, login_page, update_student_data, get_student_data
+from bootstrap import bootstrap
+from login_combo import current_tenant, login_page, logout, get_student_data, tenant_scoped
+import activity_log
+import analytics
+from portal_db import add_achievement, complete_section, student_writes, get_student_stats
+from render_cache import SHOW_TIMINGS, record_timing, region
 import pandas as pd
-import random
+import time
 from datetime import datetime
 
 # Initialize session states
@@ -16,57 +21,34 @@ if 'current_level' not in st.session_state:
 if 'current_subsection' not in st.session_state:
     st.session_state.current_subsection = None
 
-# Course structure definition
-COURSE_STRUCTURE = {
-    "Level 1: Python Basics": {
-        "sections": [
-            "1.1 Introduction to IDLE",
-            "1.2 Variables and Data Types",
-            "1.3 Basic Operations",
-            "1.4 Input and Output",
-            "1.5 Conditional Statements",
-            "1.6 While Loops",
-            "1.7 For Loops",
-            "1.8 Lists",
-            "1.9 Dictionaries",
-            "1.10 Basic Functions",
-            "1.11 String Operations",
-            "1.12 File Operations"
-        ],
-        "description": "Fundamentals of Python programming"
-    },
-    "Level 2: Functions & Games": {
-        "sections": [
-            "2.1 Function Parameters",
-            "2.2 Return Values",
-            "2.3 Scope",
-            "2.4 Game Planning",
-            "2.5 Game Structure",
-            "2.6 Player Input",
-            "2.7 Game Logic",
-            "2.8 Game States",
-            "2.9 Error Handling",
-            "2.10 Game Testing"
-        ],
-        "description": "Advanced functions and game development"
-    },
-    "Level 3: Web Development": {
-        "sections": [
-            "3.1 Intro to Streamlit",
-            "3.2 Basic Layouts",
-            "3.3 User Input",
-            "3.4 Data Display",
-            "3.5 Charts and Graphs",
-            "3.6 File Upload/Download",
-            "3.7 Session State",
-            "3.8 App Deployment"
-        ],
-        "description": "Web application development with Streamlit"
-    }
-}
+def current_student():
+    """The signed-in student's profile, read from the shared profile cache.
+
+    Fragments call this instead of using st.session_state.student_data so a
+    fragment-only rerun still sees writes made since the last full run.
+    """
+    return get_student_data(st.session_state.username)
 
 
 # Portal Functions
+@region('portal')
+@tenant_scoped
+def render_portal():
+    """Navigation bar and the selected page; a nav click reruns only this"""
+    render_navigation()
+
+    if st.session_state.current_page == 'dashboard':
+        render_dashboard()
+    elif st.session_state.current_page == 'progress':
+        render_progress()
+    elif st.session_state.current_page == 'achievements':
+        render_achievements()
+    elif st.session_state.current_page == 'resources':
+        render_resources()
+    elif st.session_state.current_page == 'class_analytics':
+        render_class_analytics()
+
+
 def render_navigation():
     """Render the main portal navigation menu"""
     col1, col2, col3, col4 = st.columns(4)
@@ -82,11 +64,15 @@ def render_navigation():
     with col4:
         if st.button('Resources', use_container_width=True):
             st.session_state.current_page = 'resources'
+    if analytics.is_instructor(st.session_state.username):
+        if st.button('Class Analytics 📊', use_container_width=True):
+            st.session_state.current_page = 'class_analytics'
 
 
 def render_dashboard():
     """Render a youth-focused dashboard"""
-    student = st.session_state.student_data[st.session_state.username]
+    username = st.session_state.username
+    student = current_student()
 
     # Welcome Section with Time-based greeting
     current_hour = datetime.now().hour
@@ -96,36 +82,7 @@ def render_dashboard():
 
     st.header(f"{greeting} {student['name']}")
 
-    # Top Stats in Modern Cards
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown("""
-        <div style='padding: 20px; background-color: #f0f2f6; border-radius: 10px; text-align: center;'>
-            <h3>Coding Streak 🔥</h3>
-            <h2>5 Days</h2>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col2:
-        # Calculate level based on total progress
-        total_progress = sum(student['progress'].values())
-        level = int(total_progress / 100) + 1
-        st.markdown(f"""
-        <div style='padding: 20px; background-color: #f0f2f6; border-radius: 10px; text-align: center;'>
-            <h3>Coder Level 🚀</h3>
-            <h2>Level {level}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col3:
-        # Calculate achievements percentage
-        total_achievements = len(student['achievements'])
-        st.markdown(f"""
-        <div style='padding: 20px; background-color: #f0f2f6; border-radius: 10px; text-align: center;'>
-            <h3>Achievements 🏆</h3>
-            <h2>{total_achievements}</h2>
-        </div>
-        """, unsafe_allow_html=True)
+    render_stats_cards(username)
 
     st.divider()
 
@@ -134,27 +91,26 @@ def render_dashboard():
     with col1:
         st.subheader("🎯 Current Mission")
         current_module = student['current_module']
-        progress_value = student['progress'].get(
-            current_module.lower().replace(' ', '_'), 0
-        )
+        progress_value = student['progress'].get(current_tenant().course.module_key(current_module), 0)
 
         st.markdown(f"""
         ### {current_module}
-        Progress: {progress_value}%
+        Progress: {progress_value:.0f}%
         """)
         st.progress(progress_value / 100)
 
         # Next milestone
-        next_milestone = (progress_value // 10 + 1) * 10
+        next_milestone = int(progress_value // 10 + 1) * 10
         if progress_value < 100:
             st.caption(f"🎯 Next Milestone: {next_milestone}%")
 
     with col2:
         st.subheader("⭐ Quick Stats")
+        stats = get_student_stats(username)
         st.markdown(f"""
-        - 🏃‍♂️ Active Days: 12
-        - ✅ Tasks Completed: {int(total_progress / 10)}
-        - 📝 Lines of Code: {int(total_progress * 20)}
+        - 🏃‍♂️ Active Days: {stats['active_days']}
+        - ✅ Tasks Completed: {stats['tasks_completed']}
+        - 📝 Lines of Code: {int(stats['total_progress'] * 20)}
         """)
 
     # Recent Achievements
@@ -171,6 +127,64 @@ def render_dashboard():
     else:
         st.info("Complete lessons to earn your first achievement! 🎯")
 
+    render_skills(username)
+    render_quick_actions()
+
+    # Weekly Activity Calendar
+    st.subheader("📅 Weekly Activity")
+    cols = st.columns(7)
+    week = activity_log.current_week(username)
+    for col, (day, events) in zip(cols, week):
+        with col:
+            activity_level = '🟢' if events >= 5 else '🟡' if events > 0 else '⚪'
+            st.markdown(f"""
+            <div style='text-align: center;'>
+                <p>{day}</p>
+                <h3>{activity_level}</h3>
+            </div>
+            """, unsafe_allow_html=True)
+
+
+@region('stats cards')
+@tenant_scoped
+def render_stats_cards(username):
+    """Streak, level and achievement cards"""
+    stats = get_student_stats(username)
+
+    # Top Stats in Modern Cards
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        streak = stats['streak']
+        st.markdown(f"""
+        <div style='padding: 20px; background-color: #f0f2f6; border-radius: 10px; text-align: center;'>
+            <h3>Coding Streak 🔥</h3>
+            <h2>{streak} Day{'' if streak == 1 else 's'}</h2>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col2:
+        st.markdown(f"""
+        <div style='padding: 20px; background-color: #f0f2f6; border-radius: 10px; text-align: center;'>
+            <h3>Coder Level 🚀</h3>
+            <h2>Level {stats['level']}</h2>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col3:
+        st.markdown(f"""
+        <div style='padding: 20px; background-color: #f0f2f6; border-radius: 10px; text-align: center;'>
+            <h3>Achievements 🏆</h3>
+            <h2>{stats['achievements']}</h2>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+@region('skills')
+@tenant_scoped
+def render_skills(username):
+    """Skill progress bars"""
+    student = get_student_data(username)
+
     # Skill Progress Bars with Icons
     st.subheader("💪 Your Skills")
     skills_col1, skills_col2 = st.columns(2)
@@ -182,7 +196,7 @@ def render_dashboard():
                 icon = "🐍" if skill == "python_basics" else "⚡"
                 st.markdown(f"**{icon} {skill.replace('_', ' ').title()}**")
                 st.progress(progress / 100)
-                st.caption(f"{progress}% Mastered")
+                st.caption(f"{progress:.0f}% Mastered")
 
     with skills_col2:
         st.markdown("#### Advanced Skills")
@@ -191,9 +205,12 @@ def render_dashboard():
                 icon = "🌐" if skill == "web_dev" else "🤖"
                 st.markdown(f"**{icon} {skill.replace('_', ' ').title()}**")
                 st.progress(progress / 100)
-                st.caption(f"{progress}% Mastered")
+                st.caption(f"{progress:.0f}% Mastered")
 
-    # Quick Actions
+
+@region('quick actions')
+def render_quick_actions():
+    """Shortcut buttons; only Resume Learning needs a full rerun"""
     st.subheader("⚡ Quick Actions")
     col1, col2, col3, col4 = st.columns(4)
 
@@ -214,25 +231,12 @@ def render_dashboard():
         if st.button("🎮 Practice Games", use_container_width=True):
             st.info("Coding games coming soon!")
 
-    # Weekly Activity Calendar
-    st.subheader("📅 Weekly Activity")
-    cols = st.columns(7)
-    days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    for idx, (col, day) in enumerate(zip(cols, days)):
-        with col:
-            activity_level = random.choice(['🟢', '🟡', '⚪'])  # Mock activity data
-            st.markdown(f"""
-            <div style='text-align: center;'>
-                <p>{day}</p>
-                <h3>{activity_level}</h3>
-            </div>
-            """, unsafe_allow_html=True)
 
 def render_progress():
     """Render the progress tracking page"""
     st.header("Progress Tracker")
 
-    student = st.session_state.student_data[st.session_state.username]
+    student = current_student()
 
     progress_pages = ['Course Progress', 'Test Scores', 'Project Status']
     selected_progress = st.radio("Select View", progress_pages)
@@ -241,7 +245,7 @@ def render_progress():
         st.subheader("Course Completion Status")
         df = pd.DataFrame({
             'Module': list(student['progress'].keys()),
-            'Progress': list(student['progress'].values()),
+            'Progress': [round(p, 1) for p in student['progress'].values()],
             'Status': ['Completed' if p >= 100 else 'In Progress' if p > 0 else 'Not Started'
                        for p in student['progress'].values()]
         })
@@ -256,16 +260,15 @@ def render_progress():
         st.subheader("Project Submissions")
         st.info(f"Current Module: {student['current_module']}")
         current_progress = student['progress'].get(
-            student['current_module'].lower().replace(' ', '_'), 0
-        )
+            current_tenant().course.module_key(student['current_module']), 0)
         st.progress(current_progress / 100)
-        st.caption(f"{current_progress}% Complete")
+        st.caption(f"{current_progress:.0f}% Complete")
 
 
 def render_achievements():
     """Render the achievements page"""
     st.header("Achievements")
-    student = st.session_state.student_data[st.session_state.username]
+    student = current_student()
     if student['achievements']:
         for achievement in student['achievements']:
             st.success(f"🏆 {achievement}")
@@ -299,94 +302,106 @@ def render_resources():
         """)
 
 
-def render_lesson_content(subsection):
-    """Render the lesson content"""
-    st.header(subsection)
+def render_class_analytics():
+    """Render the instructor's class-wide analytics page"""
+    st.header("Class Analytics")
+    if not analytics.is_instructor(st.session_state.username):
+        st.error("This page is only available to instructors.")
+        return
 
-    if subsection == "1.1 Introduction to IDLE":
-        st.write("Welcome to Python programming! Let's start with IDLE...")
-        st.code("""
-        # Your first Python program
-        print("Hello, World!")
-        """)
+    st.metric("Students", analytics.student_count())
 
-        if st.button("Mark Complete"):
-            student_data = st.session_state.student_data[st.session_state.username]
-            progress = student_data['progress']
-            progress['python_basics'] = min(100, progress['python_basics'] + 8.33)  # 100/12 sections
+    st.subheader("Module Progress")
+    st.dataframe(pd.DataFrame(analytics.module_summary()), use_container_width=True)
 
-            # Update progress in database
-            update_student_data(st.session_state.username, 'progress', progress)
+    st.subheader("Section Completion Rates")
+    course = current_tenant().course
+    sections = pd.DataFrame(analytics.section_completion_rates(course))
+    level = st.selectbox("Level", course.levels)
+    level_sections = sections[sections['level'] == level]
+    st.bar_chart(level_sections.set_index('section')['rate'])
 
-            # Update achievements if needed
-            if "First Python Program" not in student_data['achievements']:
-                achievements = student_data['achievements']
-                achievements.append("First Python Program")
-                update_student_data(st.session_state.username, 'achievements', achievements)
+    st.subheader("Test Score Distribution")
+    st.bar_chart(pd.Series(analytics.score_distribution(), name='Scores'))
 
-            # Refresh student data
-            st.session_state.student_data[st.session_state.username] = get_student_data(st.session_state.username)
-            st.success("Progress updated!")
-            st.rerun()
+    st.subheader("⚠️ At-Risk Students")
+    at_risk = analytics.at_risk_students()
+    if at_risk:
+        st.dataframe(pd.DataFrame(at_risk), use_container_width=True)
+    else:
+        st.success("Nobody is falling behind right now.")
 
-    elif subsection == "1.2 Variables and Data Types":
-        st.write("Let's learn about variables and data types in Python...")
-        st.code("""
-        # Variables and data types
-        name = "John"          # string
-        age = 25              # integer
-        height = 1.75         # float
-        is_student = True     # boolean
-        """)
 
-        if st.button("Mark Complete"):
-            student_data = st.session_state.student_data[st.session_state.username]
-            progress = student_data['progress']
-            progress['python_basics'] = min(100, progress['python_basics'] + 8.33)
-            update_student_data(st.session_state.username, 'progress', progress)
-            st.session_state.student_data[st.session_state.username] = get_student_data(st.session_state.username)
-            st.success("Progress updated!")
-            st.rerun()
-    else:
+@region('lesson')
+@tenant_scoped
+def render_lesson_content(subsection):
+    """Render the lesson content"""
+    st.header(subsection)
+
+    if st.session_state.get('last_viewed_section') != subsection:
+        st.session_state.last_viewed_section = subsection
+        activity_log.record(st.session_state.username, activity_log.SECTION_VIEW, subsection)
+
+    tenant = current_tenant()
+    course = tenant.course
+    section = course.by_title(subsection)
+    lesson = tenant.lessons.get(section.id)
+    if lesson is None:
         st.info("Content for this section is being developed...")
-        if st.button("Mark Complete"):
-            student_data = st.session_state.student_data[st.session_state.username]
-            progress = student_data['progress']
-
-            # Determine which module to update based on current level
-            if st.session_state.current_level.startswith("Level 1"):
-                progress['python_basics'] = min(100, progress['python_basics'] + 8.33)
-            elif st.session_state.current_level.startswith("Level 2"):
-                progress['functions'] = min(100, progress['functions'] + 10)
-            elif st.session_state.current_level.startswith("Level 3"):
-                progress['web_dev'] = min(100, progress['web_dev'] + 12.5)
-
-            update_student_data(st.session_state.username, 'progress', progress)
-            st.session_state.student_data[st.session_state.username] = get_student_data(st.session_state.username)
+    else:
+        for kind, content in lesson.blocks:
+            if kind == 'code':
+                st.code(content[0], language=content[1])
+            else:
+                st.markdown(content)
+
+    username = st.session_state.username
+    student_data = current_student()
+    if subsection in student_data['completed_sections'].get(section.level, ()):
+        st.success("✅ Section completed")
+    elif st.button("Mark Complete"):
+        # Record the completion once; the module percentage is recounted
+        # from the ledger in the same commit, so repeat clicks change nothing.
+        with student_writes(username) as batch:
+            complete_section(username, section.level, subsection,
+                             course.progress_key(section.level), len(course.sections(section.level)))
+
+            if lesson and lesson.achievement and lesson.achievement not in student_data['achievements']:
+                add_achievement(username, lesson.achievement)
+
+        if batch.ok:
+            activity_log.record(username, activity_log.COMPLETION, subsection)
             st.success("Progress updated!")
-            st.rerun()
+        else:
+            st.error("Could not save your progress. Please try again.")
 
     # Navigation buttons
-    if st.session_state.current_level:
-        current_sections = COURSE_STRUCTURE[st.session_state.current_level]["sections"]
-        current_index = current_sections.index(st.session_state.current_subsection)
-
-        col1, col2 = st.columns(2)
-        with col1:
-            if current_index > 0:
-                if st.button("← Previous Section"):
-                    st.session_state.current_subsection = current_sections[current_index - 1]
-                    st.rerun()
-        with col2:
-            if current_index < len(current_sections) - 1:
-                if st.button("Next Section →"):
-                    st.session_state.current_subsection = current_sections[current_index + 1]
-                    st.rerun()
+    previous_section, next_section = course.prev(section.id), course.next(section.id)
+    col1, col2 = st.columns(2)
+    with col1:
+        if previous_section and st.button("← Previous Section"):
+            st.session_state.current_subsection = previous_section.title
+            st.rerun()
+    with col2:
+        if next_section and st.button("Next Section →"):
+            st.session_state.current_subsection = next_section.title
+            st.rerun()
+
+
+def render_timings(placeholder):
+    """Last run time and run count of every region, shown when RENDER_TIMINGS=1"""
+    rows = [{'region': name, 'last ms': round(ms, 1), 'runs': runs}
+            for name, (ms, runs) in st.session_state.get('render_timings', {}).items()]
+    with placeholder.container():
+        st.caption("⏱ Render timings")
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
 
 
 def main():
-    # Initialize database
-    init_db()
+    script_start = time.perf_counter()
+
+    # Migrations, warm connections and parsed lessons for every cohort, once per server process
+    bootstrap()
 
     # Initialize login state if not exists
     if 'logged_in' not in st.session_state:
@@ -397,14 +412,22 @@ def main():
     if not login_page():
         return
 
+    # Point this run at the student's cohort: its database, course and lessons
+    tenant = current_tenant()
+    course = tenant.course
+
     # Show logout button in sidebar when logged in
     with st.sidebar:
         if st.button("Logout"):
-            st.session_state.logged_in = False
-            st.session_state.username = None
-            st.session_state.student_data = None
+            logout()
             st.rerun()
 
+    # Re-read the profile every rerun. The shared profile cache serves it from
+    # memory and keeps several tabs of the same student in sync.
+    st.session_state.student_data = {
+        st.session_state.username: get_student_data(st.session_state.username)
+    }
+
     st.title("Python Programming Platform")
 
     # Sidebar
@@ -423,37 +446,34 @@ def main():
         if st.session_state.current_view == 'lessons':
             level = st.radio(
                 "Select Level",
-                options=list(COURSE_STRUCTURE.keys()),
+                options=course.levels,
                 key="level_radio"
             )
 
             if st.session_state.current_level != level:
                 st.session_state.current_level = level
-                st.session_state.current_subsection = COURSE_STRUCTURE[level]["sections"][0]
+                st.session_state.current_subsection = course.sections(level)[0].title
 
             st.subheader(f"Sections in {level}")
             subsection = st.radio(
                 "Select Section",
-                options=COURSE_STRUCTURE[level]["sections"],
+                options=course.titles(level),
                 key="section_radio"
             )
             st.session_state.current_subsection = subsection
 
+        timings_placeholder = st.empty() if SHOW_TIMINGS else None
+
     # Main Content Area
     if st.session_state.current_view == 'portal':
-        render_navigation()
-
-        if st.session_state.current_page == 'dashboard':
-            render_dashboard()
-        elif st.session_state.current_page == 'progress':
-            render_progress()
-        elif st.session_state.current_page == 'achievements':
-            render_achievements()
-        elif st.session_state.current_page == 'resources':
-            render_resources()
+        render_portal()
     else:  # Lessons view
         render_lesson_content(st.session_state.current_subsection)
 
+    record_timing('full script', (time.perf_counter() - script_start) * 1000)
+    if timings_placeholder is not None:
+        render_timings(timings_placeholder)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
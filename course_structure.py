@@ -0,0 +1,136 @@
+# Course structure definition, shared by combo.py and subsections.py.
+# Lesson bodies live in lessons/<section id>.md (see lesson_store.py).
+from collections import namedtuple
+
+from lesson_store import section_id
+
+COURSE_STRUCTURE = {
+    "Level 1: Python Basics": {
+        "sections": [
+            "1.1 Introduction to IDLE",
+            "1.2 Variables and Data Types",
+            "1.3 Basic Operations",
+            "1.4 Input and Output",
+            "1.5 Conditional Statements",
+            "1.6 While Loops",
+            "1.7 For Loops",
+            "1.8 Lists",
+            "1.9 Dictionaries",
+            "1.10 Basic Functions",
+            "1.11 String Operations",
+            "1.12 File Operations"
+        ],
+        "description": "Fundamentals of Python programming",
+        "progress_key": "python_basics"
+    },
+    "Level 2: Functions & Games": {
+        "sections": [
+            "2.1 Function Parameters",
+            "2.2 Return Values",
+            "2.3 Scope",
+            "2.4 Game Planning",
+            "2.5 Game Structure",
+            "2.6 Player Input",
+            "2.7 Game Logic",
+            "2.8 Game States",
+            "2.9 Error Handling",
+            "2.10 Game Testing"
+        ],
+        "description": "Advanced functions and game development",
+        "progress_key": "functions"
+    },
+    "Level 3: Web Development": {
+        "sections": [
+            "3.1 Intro to Streamlit",
+            "3.2 Basic Layouts",
+            "3.3 User Input",
+            "3.4 Data Display",
+            "3.5 Charts and Graphs",
+            "3.6 File Upload/Download",
+            "3.7 Session State",
+            "3.8 App Deployment"
+        ],
+        "description": "Web application development with Streamlit",
+        "progress_key": "web_dev"
+    }
+}
+
+
+# prev_id/next_id are neighbours within the same level, None at either end.
+Section = namedtuple('Section', ['id', 'title', 'level', 'position', 'prev_id', 'next_id'])
+
+
+class CourseRegistry:
+    """Indexes over a course structure, built once.
+
+    Sections are keyed by their stable id ('1.2', the prefix lesson files
+    are named after) and by title, so navigation and progress lookups are
+    dictionary hits however long the curriculum gets.
+    """
+
+    def __init__(self, structure: dict):
+        self.structure = structure
+        self.levels = tuple(structure)
+        self._sections = {}
+        self._ids_by_title = {}
+        self._level_sections = {}
+        self._progress_keys = {}
+        self._module_keys = {}
+
+        for level, info in structure.items():
+            titles = info['sections']
+            ids = [section_id(title) for title in titles]
+            for position, (sid, title) in enumerate(zip(ids, titles)):
+                if sid in self._sections:
+                    raise ValueError(f"Duplicate section id {sid!r} in {level!r}")
+                self._sections[sid] = Section(
+                    sid, title, level, position,
+                    ids[position - 1] if position > 0 else None,
+                    ids[position + 1] if position + 1 < len(ids) else None)
+                self._ids_by_title[title] = sid
+            self._level_sections[level] = tuple(self._sections[sid] for sid in ids)
+
+            key = info.get('progress_key') or _progress_key(level.split(': ', 1)[-1])
+            self._progress_keys[level] = key
+            self._module_keys[level.split(': ', 1)[-1]] = key
+
+    def section(self, sid: str) -> Section:
+        return self._sections[sid]
+
+    def by_title(self, title: str) -> Section:
+        return self._sections[self._ids_by_title[title]]
+
+    def sections(self, level: str) -> tuple:
+        """Sections of a level, in course order."""
+        return self._level_sections[level]
+
+    def titles(self, level: str) -> list:
+        return [section.title for section in self._level_sections[level]]
+
+    def prev(self, sid: str):
+        """The section before this one in its level, or None."""
+        prev_id = self._sections[sid].prev_id
+        return self._sections[prev_id] if prev_id else None
+
+    def next(self, sid: str):
+        """The section after this one in its level, or None."""
+        next_id = self._sections[sid].next_id
+        return self._sections[next_id] if next_id else None
+
+    def parent(self, sid: str) -> str:
+        return self._sections[sid].level
+
+    def progress_key(self, level: str) -> str:
+        """module_progress key a level's completions count towards."""
+        return self._progress_keys[level]
+
+    def module_key(self, module_name: str) -> str:
+        """Progress key for a display name such as a student's current_module."""
+        return self._module_keys.get(module_name) or _progress_key(module_name)
+
+
+def _progress_key(name: str) -> str:
+    return name.lower().replace(' ', '_')
+
+
+COURSE = CourseRegistry(COURSE_STRUCTURE)
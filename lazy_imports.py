@@ -0,0 +1,43 @@
+"""Defer heavy imports until a feature actually needs them.
+
+    np = lazy_import('numpy')          # nothing executed yet
+    ...
+    np.zeros(3)                        # numpy is imported here
+
+The module is located up front, so a missing package still fails at import
+time, but its code only runs on first attribute access. Only top-level
+packages can be deferred: finding scipy.signal means importing scipy (and
+with it numpy), so submodules are imported inside the functions that use
+them instead.
+
+Use benchmarks/profile_imports.py to see what an entry point pays at start-up.
+"""
+import importlib.util
+import sys
+import threading
+
+_lock = threading.Lock()
+
+
+def lazy_import(name: str):
+    """Return top-level module `name`, executing it on first attribute access."""
+    if '.' in name:
+        raise ValueError(f"lazy_import({name!r}): only top-level packages can be deferred; "
+                         "import the submodule where it is used")
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+        # Finding a module can import it (a .pth hook, another thread's import).
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        return module
@@ -0,0 +1,127 @@
+"""Lesson content loaded from lessons/<section id>.md.
+
+Each file starts with a small front matter block followed by Markdown:
+
+    ---
+    title: 1.1 Introduction to IDLE
+    achievement: First Python Program
+    ---
+    Welcome to Python programming!
+
+    ```python
+    print("Hello, World!")
+    ```
+
+Fenced code blocks are split out so the page can render them with st.code.
+"""
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+LESSONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lessons')
+
+# ('markdown', text) or ('code', (source, language)) pieces, in file order.
+Lesson = namedtuple('Lesson', ['section_id', 'title', 'achievement', 'blocks'])
+
+_FENCE = re.compile(r'^```[ \t]*(\w*)[ \t]*\n(.*?)^```[ \t]*$', re.MULTILINE | re.DOTALL)
+
+
+def section_id(title: str) -> str:
+    """'1.2 Variables and Data Types' -> '1.2'"""
+    return title.split(' ', 1)[0]
+
+
+def parse_lesson(sid: str, text: str) -> Lesson:
+    meta = {}
+    if text.startswith('---\n'):
+        header, _, text = text[4:].partition('\n---\n')
+        for line in header.splitlines():
+            key, sep, value = line.partition(':')
+            if sep:
+                meta[key.strip()] = value.strip()
+
+    blocks = []
+    position = 0
+    for match in _FENCE.finditer(text):
+        prose = text[position:match.start()].strip()
+        if prose:
+            blocks.append(('markdown', prose))
+        blocks.append(('code', (match.group(2).rstrip('\n'), match.group(1) or 'python')))
+        position = match.end()
+    prose = text[position:].strip()
+    if prose:
+        blocks.append(('markdown', prose))
+
+    return Lesson(sid, meta.get('title', sid), meta.get('achievement'), tuple(blocks))
+
+
+class LessonStore:
+    """Parsed lessons indexed by section id.
+
+    Files are parsed once per process. get() checks the directory for
+    changes at most every check_interval seconds and re-parses only the
+    files whose modification time moved, so editing a lesson shows up on the
+    next rerun without a restart.
+    """
+
+    def __init__(self, directory: str = LESSONS_DIR, check_interval: float = 1.0):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._index = {}
+        self._mtimes = {}
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            entries = [e for e in os.scandir(self.directory)
+                       if e.is_file() and e.name.endswith('.md')]
+        except FileNotFoundError:
+            entries = []
+
+        index = dict(self._index)
+        mtimes = {}
+        for entry in entries:
+            sid = entry.name[:-3]
+            mtime = entry.stat().st_mtime_ns
+            mtimes[sid] = mtime
+            if self._mtimes.get(sid) != mtime:
+                with open(entry.path, encoding='utf-8') as f:
+                    index[sid] = parse_lesson(sid, f.read())
+        for sid in set(index) - set(mtimes):
+            del index[sid]
+        # Swap in whole dicts so readers never see a half-built index.
+        self._index, self._mtimes = index, mtimes
+
+    def get(self, sid: str):
+        """Return the Lesson for a section id, or None if it has no content yet."""
+        now = time.monotonic()
+        if now >= self._next_check:
+            with self._lock:
+                if now >= self._next_check:
+                    self._refresh()
+                    self._next_check = now + self.check_interval
+        return self._index.get(sid)
+
+    def preload(self) -> int:
+        """Parse every lesson now instead of on first view; returns the count."""
+        with self._lock:
+            self._refresh()
+            self._next_check = time.monotonic() + self.check_interval
+        return len(self._index)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_lesson_store() -> LessonStore:
+    """Return the process-wide lesson store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = LessonStore()
+    return _store
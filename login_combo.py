@@ -1,145 +1,133 @@
-import streamlit as st
-import hmac
-import sqlite3
-from datetime import datetime
-import hashlib
-import json
-
-def init_db():
-    """Initialize SQLite database with users table"""
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users
-        (username TEXT PRIMARY KEY,
-         password_hash TEXT NOT NULL,
-         created_at DATETIME DEFAULT CURRENT_TIMESTAMP)
-    ''')
-
-    # Add student_data table with correct schema
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS student_data
-        (username TEXT PRIMARY KEY,
-         progress TEXT,
-         achievements TEXT,
-         current_module TEXT,
-         test_scores TEXT,
-         FOREIGN KEY (username) REFERENCES users(username))
-    ''')
-    conn.commit()
-    conn.close()
-
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def verify_password(password: str, hash: str) -> bool:
-    return hmac.compare_digest(hash_password(password), hash)
-
-def add_user(username: str, password: str):
-    """Add new user and initialize their student data"""
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    try:
-        c.execute("BEGIN")
-        c.execute(
-            "INSERT INTO users (username, password_hash) VALUES (?, ?)",
-            (username, hash_password(password))
-        )
-
-        # Initialize student data
-        initial_data = {
-            'progress': {
-                'python_basics': 0,
-                'functions': 0,
-                'web_dev': 0,
-                'ai_integration': 0
-            },
-            'achievements': [],
-            'current_module': 'Python Basics',
-            'test_scores': []
-        }
-
-        c.execute(
-            """INSERT INTO student_data 
-               (username, progress, achievements, current_module, test_scores) 
-               VALUES (?, ?, ?, ?, ?)""",
-            (username,
-             json.dumps(initial_data['progress']),
-             json.dumps(initial_data['achievements']),
-             initial_data['current_module'],
-             json.dumps(initial_data['test_scores']))
-        )
-
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
-
-
-def verify_user(username: str, password: str) -> bool:
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("SELECT password_hash FROM users WHERE username = ?", (username,))
-    result = c.fetchone()
-    conn.close()
+import functools
 
-    if result is None:
-        return False
-    return verify_password(password, result[0])
-
-
-def get_student_data(username: str):
-    """Retrieve student data from database"""
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("""
-        SELECT progress, achievements, current_module, test_scores 
-        FROM student_data 
-        WHERE username = ?
-    """, (username,))
-    result = c.fetchone()
-    conn.close()
-
-    if result:
-        return {
-            'name': username,  # Use username as name
-            'progress': json.loads(result[0]),
-            'achievements': json.loads(result[1]),
-            'current_module': result[2],
-            'test_scores': json.loads(result[3])
-        }
-    return None
-
-
-def update_student_data(username: str, data_type: str, new_data):
-    """Update specific student data"""
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    try:
-        if data_type in ['progress', 'achievements', 'test_scores']:
-            c.execute(f"UPDATE student_data SET {data_type} = ? WHERE username = ?",
-                      (json.dumps(new_data), username))
-        elif data_type == 'current_module':
-            c.execute("UPDATE student_data SET current_module = ? WHERE username = ?",
-                      (new_data, username))
-        conn.commit()
-        return True
-    except:
+import streamlit as st
+import activity_log
+import tenants
+from browser_state import (
+    delete_cookie,
+    get_cookie,
+    get_query_param,
+    set_cookie,
+    set_query_params,
+    write_cookies,
+)
+from sessions import SESSION_TTL, get_session_store
+from portal_db import (
+    add_user,
+    verify_user,
+    get_student_data,
+)
+
+
+COHORT_PARAM = 'cohort'
+# The session token lives in this cookie, never in the URL.
+SESSION_COOKIE = 'portal_session'
+COHORT_COOKIE = 'portal_cohort'
+# Older builds put the token in ?session=; such links are revoked on sight.
+LEGACY_SESSION_PARAM = 'session'
+
+
+def _remember_session(token, tenant):
+    """Keep the session token and its cohort in cookies for the next page load."""
+    st.session_state.session_token = token
+    set_cookie(SESSION_COOKIE, token, SESSION_TTL)
+    set_cookie(COHORT_COOKIE, tenant.id, SESSION_TTL)
+
+
+def _forget_session():
+    st.session_state.session_token = None
+    delete_cookie(SESSION_COOKIE)
+    delete_cookie(COHORT_COOKIE)
+
+
+def _resume_session():
+    """Sign in from the session cookie of a refreshed or reconnecting browser.
+
+    The cohort cookie says which database holds the session; sessions from
+    before cohorts existed belong to the default one.
+    """
+    directory = tenants.get_directory()
+    legacy = get_query_param(LEGACY_SESSION_PARAM)
+    if legacy:
+        # A token that was in the URL may have been shared or bookmarked.
+        tenant = directory.get(get_query_param(COHORT_PARAM)) or directory.default
+        tenants.activate(tenant)
+        if get_session_store().validate(legacy):
+            get_session_store().revoke(legacy)
+        set_query_params(**{LEGACY_SESSION_PARAM: None})
+
+    token = get_cookie(SESSION_COOKIE)
+    if not token:
         return False
-    finally:
-        conn.close()
+    tenant = directory.get(get_cookie(COHORT_COOKIE) or directory.default.id)
+    if tenant:
+        tenants.activate(tenant)
+        username = get_session_store().validate(token)
+        if username:
+            st.session_state.session_token = token
+            _start_session(username, tenant)
+            return True
+    _forget_session()
+    return False
+
+
+def current_tenant():
+    """The signed-in student's cohort, with its database active on this thread."""
+    directory = tenants.get_directory()
+    tenant = directory.get(st.session_state.get('tenant')) or directory.default
+    return tenants.activate(tenant)
+
+
+def tenant_scoped(func):
+    """Activate the student's cohort before func runs.
+
+    Stack under @region so a fragment rerun, which skips main(), still reads
+    and writes the right cohort's database.
+    """
+    @functools.wraps(func)
+    def scoped(*args, **kwargs):
+        current_tenant()
+        return func(*args, **kwargs)
+    return scoped
+
+
+def _start_session(username: str, tenant):
+    """Initialize all session state variables for a logged-in user"""
+    st.session_state.logged_in = True
+    st.session_state.username = username
+    st.session_state.tenant = tenant.id
+    st.session_state.student_data = {
+        username: get_student_data(username)
+    }
+
+
+def logout():
+    """End the server-side session and clear the login state"""
+    token = st.session_state.get('session_token')
+    if token:
+        get_session_store().revoke(token)
+    _forget_session()
+    st.session_state.logged_in = False
+    st.session_state.username = None
+    st.session_state.student_data = None
+    st.session_state.tenant = None
 
 
 def login_page():
     """Display login page"""
     st.title("Student Portal Login")
+    write_cookies()
 
     if 'logged_in' in st.session_state and st.session_state.logged_in:
         return True
 
+    # Only the first run of a browser session looks at its cookies: after a
+    # logout the page-load cookie is stale (and already revoked).
+    if not st.session_state.get('resume_checked'):
+        st.session_state.resume_checked = True
+        if _resume_session():
+            return True
+
     with st.container():
         username = st.text_input("Username")
         password = st.text_input("Password", type="password")
@@ -147,13 +135,11 @@ def login_page():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("Login", key="login_button"):
+                tenant = tenants.activate(tenants.get_directory().resolve(username))
                 if verify_user(username, password):
-                    # Initialize all session state variables
-                    st.session_state.logged_in = True
-                    st.session_state.username = username
-                    st.session_state.student_data = {
-                        username: get_student_data(username)
-                    }
+                    activity_log.record(username, activity_log.LOGIN)
+                    _remember_session(get_session_store().create(username), tenant)
+                    _start_session(username, tenant)
                     st.success("Logged in successfully!")
                     st.rerun()
                 else:
@@ -162,6 +148,7 @@ def login_page():
         with col2:
             if st.button("Register", key="register_button"):
                 if username and password:
+                    tenants.activate(tenants.get_directory().resolve(username))
                     if add_user(username, password):
                         st.success("Registration successful! Please login.")
                     else:
@@ -0,0 +1,64 @@
+"""A local mirror of an assistant thread that fetches only the messages a run added."""
+from collections import namedtuple
+
+# Messages per request when catching up.
+PAGE_SIZE = 20
+
+Message = namedtuple('Message', ['id', 'role', 'run_id', 'text'])
+
+
+def message_text(message) -> str:
+    """The text blocks of an API message, joined."""
+    return ''.join(block.text.value for block in message.content if block.type == 'text')
+
+
+class ThreadMirror:
+    """Local copy of a thread's messages, oldest first."""
+
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        self.messages = []
+        self._seen = set()
+
+    @property
+    def last_id(self):
+        return self.messages[-1].id if self.messages else None
+
+    def add(self, message) -> Message:
+        """Record an API message (from messages.create or a stream event)."""
+        mirrored = Message(message.id, message.role, message.run_id, message_text(message))
+        if mirrored.id not in self._seen:
+            self._seen.add(mirrored.id)
+            self.messages.append(mirrored)
+        return mirrored
+
+    def fetch(self, client, run_id: str = None) -> list:
+        """Fetch the messages newer than the last one seen, optionally only a run's."""
+        new, after = [], self.last_id
+        while True:
+            extra = {'after': after} if after else {}
+            if run_id:
+                extra['run_id'] = run_id
+            page = client.beta.threads.messages.list(thread_id=self.thread_id, order='asc',
+                                                     limit=PAGE_SIZE, **extra)
+            new.extend(self.add(message) for message in page.data)
+            if not page.data or not page.has_more:
+                return new
+            after = page.data[-1].id
+
+    def reply(self, client, run_id: str):
+        """The assistant message a run added, fetched if it is not mirrored yet."""
+        for message in reversed(self.messages):
+            if message.run_id == run_id and message.role == 'assistant':
+                return message
+        return next((message for message in reversed(self.fetch(client, run_id))
+                     if message.role == 'assistant'), None)
+
+
+def session_mirror(thread_id: str) -> ThreadMirror:
+    """The current Streamlit session's mirror of a thread."""
+    import streamlit as st
+    mirrors = st.session_state.setdefault('thread_mirrors', {})
+    if thread_id not in mirrors:
+        mirrors[thread_id] = ThreadMirror(thread_id)
+    return mirrors[thread_id]
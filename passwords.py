@@ -0,0 +1,139 @@
+"""Password hashing for the student portal.
+
+Hashes are stored as self-describing strings so cost parameters can change
+without a migration:
+
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+
+Bare 64-character hex strings are the legacy unsalted SHA-256 hashes; they
+still verify, and needs_rehash() reports them so they can be upgraded on the
+next successful login.
+
+Cost parameters come from the environment (see benchmarks/bench_password_cost.py
+for picking them):
+
+    PASSWORD_SCHEME     scrypt (default) or pbkdf2_sha256
+    SCRYPT_N, SCRYPT_R, SCRYPT_P
+    PBKDF2_ITERATIONS
+    PASSWORD_WORKERS    KDF calls allowed to run at once
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SCHEME = os.environ.get('PASSWORD_SCHEME', 'scrypt')
+SCRYPT_N = int(os.environ.get('SCRYPT_N', 2 ** 14))
+SCRYPT_R = int(os.environ.get('SCRYPT_R', 8))
+SCRYPT_P = int(os.environ.get('SCRYPT_P', 1))
+PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', 600_000))
+WORKERS = int(os.environ.get('PASSWORD_WORKERS', min(4, os.cpu_count() or 1)))
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii')
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text.encode('ascii'))
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # maxmem must cover the 128 * n * r bytes scrypt needs, with some headroom.
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * p, dklen=KEY_BYTES)
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations, KEY_BYTES)
+
+
+def hash_password(password: str, scheme: str = None) -> str:
+    """Hash a password with the configured scheme and a fresh salt."""
+    scheme = scheme or SCHEME
+    salt = os.urandom(SALT_BYTES)
+    if scheme == 'scrypt':
+        key = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(key)}"
+    if scheme == 'pbkdf2_sha256':
+        key = _pbkdf2(password, salt, PBKDF2_ITERATIONS)
+        return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(key)}"
+    raise ValueError(f"Unknown password scheme: {scheme}")
+
+
+def legacy_hash_password(password: str) -> str:
+    """The original unsalted SHA-256 hash, kept only to verify old rows."""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check a password against any supported stored hash."""
+    parts = stored.split('$')
+    if len(parts) == 1:
+        return hmac.compare_digest(legacy_hash_password(password), stored)
+    try:
+        if parts[0] == 'scrypt':
+            n, r, p, salt, key = parts[1:]
+            candidate = _scrypt(password, _unb64(salt), int(n), int(r), int(p))
+        elif parts[0] == 'pbkdf2_sha256':
+            iterations, salt, key = parts[1:]
+            candidate = _pbkdf2(password, _unb64(salt), int(iterations))
+        else:
+            return False
+        return hmac.compare_digest(candidate, _unb64(key))
+    except ValueError:
+        return False
+
+
+def needs_rehash(stored: str) -> bool:
+    """True if the stored hash is not in the configured scheme and cost."""
+    parts = stored.split('$')
+    if parts[0] != SCHEME:
+        return True
+    if SCHEME == 'scrypt':
+        return parts[1:4] != [str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+    return parts[1] != str(PBKDF2_ITERATIONS)
+
+
+class HashingPool:
+    """Runs KDF calls on a bounded set of worker threads.
+
+    hashlib's scrypt and pbkdf2 release the GIL, so the workers run in
+    parallel while the script threads that submitted them just wait. The
+    bound keeps a login storm from running hundreds of memory-hard hashes at
+    once; extra logins queue instead of thrashing the box.
+    """
+
+    def __init__(self, workers: int = WORKERS):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='password-hash')
+
+    def hash(self, password: str) -> str:
+        return self._executor.submit(hash_password, password).result()
+
+    def verify(self, password: str, stored: str) -> bool:
+        return self._executor.submit(verify_password, password, stored).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool() -> HashingPool:
+    """Return the process-wide hashing pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool()
+    return _pool
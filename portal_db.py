@@ -0,0 +1,1013 @@
+import atexit
+import contextvars
+import copy
+import functools
+import json
+import os
+import queue
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from passwords import get_hashing_pool, needs_rehash
+from profile_cache import ProfileCache
+from write_buffer import GroupCommitWriter, execute_coalesced
+
+# Path of the portal database. Override with USERS_DB_PATH (e.g. for benchmarks).
+DB_PATH = os.environ.get('USERS_DB_PATH', 'users.db')
+
+# Applied once to every new connection.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",       # readers never block the writer
+    "PRAGMA synchronous = NORMAL",     # safe with WAL, one fsync per checkpoint
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",       # 8 MB page cache per connection
+    "PRAGMA busy_timeout = 5000",
+)
+
+# Size of sqlite3's per-connection prepared statement cache. Statements are
+# module-level constants below so the same SQL text always hits the cache.
+STATEMENT_CACHE_SIZE = 128
+
+# Idle connections kept around for new script threads.
+MAX_IDLE_CONNECTIONS = 32
+# The same for each extra partition (cohort database), see use_partition().
+PARTITION_MAX_IDLE_CONNECTIONS = 4
+
+SQL_CREATE_USERS = '''
+    CREATE TABLE IF NOT EXISTS users
+    (username TEXT PRIMARY KEY,
+     password_hash TEXT NOT NULL,
+     created_at DATETIME DEFAULT CURRENT_TIMESTAMP)
+'''
+SQL_CREATE_STUDENT_DATA = '''
+    CREATE TABLE IF NOT EXISTS student_data
+    (username TEXT PRIMARY KEY,
+     progress TEXT,
+     achievements TEXT,
+     current_module TEXT,
+     test_scores TEXT,
+     FOREIGN KEY (username) REFERENCES users(username))
+'''
+
+# Normalized progress tables. The JSON columns of student_data are kept for
+# older checkouts but are emptied once their contents have been migrated.
+SQL_CREATE_PROGRESS_TABLES = (
+    '''
+    CREATE TABLE IF NOT EXISTS module_progress
+    (username TEXT NOT NULL REFERENCES users(username),
+     module TEXT NOT NULL,
+     progress NUMERIC NOT NULL DEFAULT 0,
+     PRIMARY KEY (username, module)) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS section_completions
+    (username TEXT NOT NULL REFERENCES users(username),
+     level TEXT NOT NULL,
+     section TEXT NOT NULL,
+     completed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+     PRIMARY KEY (username, level, section)) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_section_completions_section "
+    "ON section_completions (level, section)",
+    '''
+    CREATE TABLE IF NOT EXISTS achievements
+    (id INTEGER PRIMARY KEY,
+     username TEXT NOT NULL REFERENCES users(username),
+     achievement TEXT NOT NULL,
+     earned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+     UNIQUE (username, achievement))
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_achievements_achievement ON achievements (achievement)",
+    '''
+    CREATE TABLE IF NOT EXISTS test_scores
+    (id INTEGER PRIMARY KEY,
+     username TEXT NOT NULL REFERENCES users(username),
+     score NUMERIC NOT NULL,
+     recorded_at DATETIME DEFAULT CURRENT_TIMESTAMP)
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_test_scores_username ON test_scores (username, id)",
+    "CREATE INDEX IF NOT EXISTS idx_test_scores_score ON test_scores (score)",
+)
+
+# Class-wide aggregates for instructor analytics. Triggers keep them current
+# inside the same transaction as every progress write, so reading them never
+# touches per-student rows.
+SQL_CREATE_AGGREGATES = (
+    '''
+    CREATE TABLE IF NOT EXISTS agg_module_progress
+    (module TEXT PRIMARY KEY,
+     students INTEGER NOT NULL DEFAULT 0,
+     total_progress REAL NOT NULL DEFAULT 0,
+     started INTEGER NOT NULL DEFAULT 0,
+     completed INTEGER NOT NULL DEFAULT 0)
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS agg_section_completions
+    (level TEXT NOT NULL,
+     section TEXT NOT NULL,
+     completions INTEGER NOT NULL DEFAULT 0,
+     PRIMARY KEY (level, section)) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS agg_score_buckets
+    (bucket INTEGER PRIMARY KEY,
+     scores INTEGER NOT NULL DEFAULT 0)
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS agg_student_summary
+    (username TEXT PRIMARY KEY,
+     sections_completed INTEGER NOT NULL DEFAULT 0,
+     tests_taken INTEGER NOT NULL DEFAULT 0,
+     score_total REAL NOT NULL DEFAULT 0,
+     last_completed_at DATETIME)
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_student_summary_last_completed "
+    "ON agg_student_summary (last_completed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_student_summary_avg_score "
+    "ON agg_student_summary (score_total / tests_taken) WHERE tests_taken > 0",
+
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_agg_student_insert AFTER INSERT ON student_data BEGIN
+        INSERT OR IGNORE INTO agg_student_summary (username) VALUES (NEW.username);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_agg_student_delete AFTER DELETE ON student_data BEGIN
+        DELETE FROM agg_student_summary WHERE username = OLD.username;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_agg_progress_insert AFTER INSERT ON module_progress BEGIN
+        INSERT INTO agg_module_progress (module, students, total_progress, started, completed)
+        VALUES (NEW.module, 1, NEW.progress, NEW.progress > 0, NEW.progress >= 100)
+        ON CONFLICT (module) DO UPDATE SET
+            students = students + 1,
+            total_progress = total_progress + NEW.progress,
+            started = started + (NEW.progress > 0),
+            completed = completed + (NEW.progress >= 100);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_agg_progress_update AFTER UPDATE OF progress ON module_progress BEGIN
+        UPDATE agg_module_progress SET
+            total_progress = total_progress + NEW.progress - OLD.progress,
+            started = started + (NEW.progress > 0) - (OLD.progress > 0),
+            completed = completed + (NEW.progress >= 100) - (OLD.progress >= 100)
+        WHERE module = NEW.module;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_agg_progress_delete AFTER DELETE ON module_progress BEGIN
+        UPDATE agg_module_progress SET
+            students = students - 1,
+            total_progress = total_progress - OLD.progress,
+            started = started - (OLD.progress > 0),
+            completed = completed - (OLD.progress >= 100)
+        WHERE module = OLD.module;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_agg_section_insert AFTER INSERT ON section_completions BEGIN
+        INSERT INTO agg_section_completions (level, section, completions)
+        VALUES (NEW.level, NEW.section, 1)
+        ON CONFLICT (level, section) DO UPDATE SET completions = completions + 1;
+        UPDATE agg_student_summary SET
+            sections_completed = sections_completed + 1,
+            last_completed_at = MAX(IFNULL(last_completed_at, ''), NEW.completed_at)
+        WHERE username = NEW.username;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_agg_section_delete AFTER DELETE ON section_completions BEGIN
+        UPDATE agg_section_completions SET completions = completions - 1
+        WHERE level = OLD.level AND section = OLD.section;
+        UPDATE agg_student_summary SET sections_completed = sections_completed - 1
+        WHERE username = OLD.username;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_agg_score_insert AFTER INSERT ON test_scores BEGIN
+        INSERT INTO agg_score_buckets (bucket, scores)
+        VALUES (MIN(CAST(NEW.score / 10 AS INTEGER), 9) * 10, 1)
+        ON CONFLICT (bucket) DO UPDATE SET scores = scores + 1;
+        UPDATE agg_student_summary SET
+            tests_taken = tests_taken + 1,
+            score_total = score_total + NEW.score
+        WHERE username = NEW.username;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_agg_score_delete AFTER DELETE ON test_scores BEGIN
+        UPDATE agg_score_buckets SET scores = scores - 1
+        WHERE bucket = MIN(CAST(OLD.score / 10 AS INTEGER), 9) * 10;
+        UPDATE agg_student_summary SET
+            tests_taken = tests_taken - 1,
+            score_total = score_total - OLD.score
+        WHERE username = OLD.username;
+    END
+    ''',
+)
+
+# Marks a student active on a UTC day (:day, 'YYYY-MM-DD'). Consecutive days
+# extend the streak, a gap restarts it, and a day already counted is a no-op.
+# SET expressions all see the old row, so the order below does not matter.
+SQL_TOUCH_ACTIVITY = '''
+    UPDATE student_stats SET
+        streak = CASE
+            WHEN last_active_date = :day THEN streak
+            WHEN last_active_date = date(:day, '-1 day') THEN streak + 1
+            ELSE 1 END,
+        longest_streak = MAX(longest_streak, CASE
+            WHEN last_active_date = :day THEN streak
+            WHEN last_active_date = date(:day, '-1 day') THEN streak + 1
+            ELSE 1 END),
+        active_days = active_days + (IFNULL(last_active_date, '') <> :day),
+        last_active_date = :day
+    WHERE username = :username
+      AND (last_active_date IS NULL OR last_active_date <= :day)
+'''
+
+# Per-student dashboard numbers, maintained by triggers as progress,
+# completions and achievements are written.
+SQL_CREATE_STUDENT_STATS = (
+    '''
+    CREATE TABLE IF NOT EXISTS student_stats
+    (username TEXT PRIMARY KEY,
+     total_progress REAL NOT NULL DEFAULT 0,
+     tasks_completed INTEGER NOT NULL DEFAULT 0,
+     achievements INTEGER NOT NULL DEFAULT 0,
+     streak INTEGER NOT NULL DEFAULT 0,
+     longest_streak INTEGER NOT NULL DEFAULT 0,
+     active_days INTEGER NOT NULL DEFAULT 0,
+     last_active_date TEXT)
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_stats_student_insert AFTER INSERT ON student_data BEGIN
+        INSERT OR IGNORE INTO student_stats (username) VALUES (NEW.username);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_stats_student_delete AFTER DELETE ON student_data BEGIN
+        DELETE FROM student_stats WHERE username = OLD.username;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_stats_progress_insert AFTER INSERT ON module_progress BEGIN
+        UPDATE student_stats SET total_progress = total_progress + NEW.progress
+        WHERE username = NEW.username;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_stats_progress_update AFTER UPDATE OF progress ON module_progress BEGIN
+        UPDATE student_stats SET total_progress = total_progress + NEW.progress - OLD.progress
+        WHERE username = NEW.username;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_stats_progress_delete AFTER DELETE ON module_progress BEGIN
+        UPDATE student_stats SET total_progress = total_progress - OLD.progress
+        WHERE username = OLD.username;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_stats_section_insert AFTER INSERT ON section_completions BEGIN
+        UPDATE student_stats SET tasks_completed = tasks_completed + 1
+        WHERE username = NEW.username;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_stats_section_delete AFTER DELETE ON section_completions BEGIN
+        UPDATE student_stats SET tasks_completed = tasks_completed - 1
+        WHERE username = OLD.username;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_stats_achievement_insert AFTER INSERT ON achievements BEGIN
+        UPDATE student_stats SET achievements = achievements + 1
+        WHERE username = NEW.username;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_stats_achievement_delete AFTER DELETE ON achievements BEGIN
+        UPDATE student_stats SET achievements = achievements - 1
+        WHERE username = OLD.username;
+    END
+    ''',
+)
+
+# Append-only activity log plus the per-day counters it is rolled up into.
+SQL_CREATE_ACTIVITY_TABLES = (
+    '''
+    CREATE TABLE IF NOT EXISTS activity_events
+    (id INTEGER PRIMARY KEY,
+     username TEXT NOT NULL,
+     kind TEXT NOT NULL,
+     detail TEXT,
+     occurred_at TEXT NOT NULL)
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_activity_events_occurred ON activity_events (occurred_at)",
+    '''
+    CREATE TABLE IF NOT EXISTS activity_daily
+    (username TEXT NOT NULL,
+     day TEXT NOT NULL,
+     kind TEXT NOT NULL,
+     events INTEGER NOT NULL DEFAULT 0,
+     PRIMARY KEY (username, day, kind)) WITHOUT ROWID
+    ''',
+)
+
+SQL_INSERT_USER = "INSERT INTO users (username, password_hash) VALUES (?, ?)"
+SQL_INSERT_STUDENT_DATA = "INSERT INTO student_data (username, current_module) VALUES (?, ?)"
+SQL_SELECT_PASSWORD_HASH = "SELECT password_hash FROM users WHERE username = ?"
+SQL_UPDATE_PASSWORD_HASH = "UPDATE users SET password_hash = ? WHERE username = ? AND password_hash = ?"
+SQL_SELECT_CURRENT_MODULE = "SELECT current_module, version FROM student_data WHERE username = ?"
+SQL_SELECT_PROGRESS = "SELECT module, progress FROM module_progress WHERE username = ?"
+SQL_SELECT_ACHIEVEMENTS = "SELECT achievement FROM achievements WHERE username = ? ORDER BY id"
+SQL_SELECT_TEST_SCORES = "SELECT score FROM test_scores WHERE username = ? ORDER BY id"
+SQL_SELECT_COMPLETIONS = "SELECT level, section FROM section_completions WHERE username = ?"
+SQL_UPSERT_PROGRESS = """
+    INSERT INTO module_progress (username, module, progress) VALUES (?, ?, ?)
+    ON CONFLICT (username, module) DO UPDATE SET progress = excluded.progress
+"""
+SQL_INSERT_SECTION_COMPLETION = """
+    INSERT OR IGNORE INTO section_completions (username, level, section) VALUES (?, ?, ?)
+"""
+# Module progress is derived from the completion ledger, never accumulated:
+# completed sections of the level / sections in the level, counted over the
+# (username, level) prefix of the primary key. Replaying it is harmless.
+# Progress migrated from the old JSON blob has no ledger rows behind it, so
+# the derived value never lowers a stored one: a student keeps MAX(legacy,
+# derived). The same rule is mirrored by complete_section() for the cached
+# profile.
+SQL_SYNC_MODULE_PROGRESS = """
+    INSERT INTO module_progress (username, module, progress)
+    SELECT :username, :module, MIN(100, COUNT(*) * 100.0 / :total)
+    FROM section_completions WHERE username = :username AND level = :level
+    ON CONFLICT (username, module) DO UPDATE SET progress = MAX(progress, excluded.progress)
+"""
+SQL_INSERT_ACHIEVEMENT = "INSERT OR IGNORE INTO achievements (username, achievement) VALUES (?, ?)"
+SQL_DELETE_ACHIEVEMENTS = "DELETE FROM achievements WHERE username = ?"
+SQL_INSERT_TEST_SCORE = "INSERT INTO test_scores (username, score) VALUES (?, ?)"
+SQL_DELETE_TEST_SCORES = "DELETE FROM test_scores WHERE username = ?"
+SQL_UPDATE_CURRENT_MODULE = "UPDATE student_data SET current_module = ? WHERE username = ?"
+SQL_SELECT_VERSION = "SELECT version FROM student_data WHERE username = ?"
+SQL_BUMP_STUDENT_VERSION = "UPDATE student_data SET version = version + 1 WHERE username = ?"
+
+INITIAL_PROGRESS = {
+    'python_basics': 0,
+    'functions': 0,
+    'web_dev': 0,
+    'ai_integration': 0
+}
+INITIAL_MODULE = 'Python Basics'
+
+
+class _Lease:
+    """Binds a pooled connection to the thread holding it.
+
+    The lease lives in thread-local storage, so when the thread exits the
+    lease is collected and the connection goes back to the pool.
+    """
+
+    def __init__(self, pool, conn):
+        self.conn = conn
+        weakref.finalize(self, pool._release, conn)
+
+
+class ConnectionPool:
+    """Process-wide pool handing out one long-lived connection per thread.
+
+    Streamlit runs every script rerun on a fresh thread, so connections are
+    recycled through an idle queue instead of being opened per call.
+    """
+
+    def __init__(self, path: str = DB_PATH, max_idle: int = MAX_IDLE_CONNECTIONS):
+        self.path = path
+        self._local = threading.local()
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+        self._lock = threading.Lock()
+        self._all = set()
+        self._closed = False
+        self.opened = 0
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=5.0,
+            isolation_level=None,  # transactions are explicit, see transaction()
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._all.add(conn)
+            self.opened += 1
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._all.discard(conn)
+        conn.close()
+
+    def _release(self, conn: sqlite3.Connection):
+        if self._closed or conn.in_transaction:
+            self._discard(conn)
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the connection bound to the calling thread."""
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+            lease = self._local.lease = _Lease(self, conn)
+        return lease.conn
+
+    @contextmanager
+    def transaction(self):
+        """Run a write transaction, committing on success.
+
+        BEGIN IMMEDIATE takes the write lock up front, so concurrent writers
+        wait on busy_timeout instead of failing with 'database is locked'
+        when a read lock cannot be upgraded.
+        """
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def snapshot(self):
+        """Run several reads against one consistent view of the database."""
+        conn = self.connection()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def warm(self, count: int = 4) -> int:
+        """Park up to count ready connections in the idle queue.
+
+        Each one has its pragmas applied and the schema loaded, so the first
+        script threads after start-up skip the open. Returns how many were
+        opened.
+        """
+        opened = 0
+        while opened < count and self._idle.qsize() < count:
+            conn = self._open()
+            conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                self._discard(conn)
+                break
+            opened += 1
+        return opened
+
+    def close(self):
+        """Close every connection opened by this pool."""
+        self._closed = True
+        with self._lock:
+            conns = list(self._all)
+            self._all.clear()
+        for conn in conns:
+            conn.close()
+
+
+# One pool and one group-commit writer per database file. The process has a
+# default database; a thread (a Streamlit script run) can switch to another
+# partition with use_partition(), e.g. a cohort's own database.
+_default_path = DB_PATH
+_partition = contextvars.ContextVar('portal_db_partition', default=None)
+_pools = {}
+_writers = {}
+_pool_lock = threading.Lock()
+
+
+def default_database() -> str:
+    return _default_path
+
+
+def current_database() -> str:
+    """Database file the calling thread reads and writes."""
+    return _partition.get() or _default_path
+
+
+def use_partition(path: str = None):
+    """Send this thread's portal_db calls to another database file.
+
+    Only affects the calling thread (and contexts copied from it); None goes
+    back to the default database.
+    """
+    _partition.set(path)
+
+
+def get_pool(path: str = None) -> ConnectionPool:
+    """Return the process-wide connection pool for a database, creating it on first use."""
+    path = path or current_database()
+    pool = _pools.get(path)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(path)
+            if pool is None:
+                max_idle = (MAX_IDLE_CONNECTIONS if path == _default_path
+                            else PARTITION_MAX_IDLE_CONNECTIONS)
+                pool = _pools[path] = ConnectionPool(path, max_idle)
+    return pool
+
+
+def get_writer(path: str = None) -> GroupCommitWriter:
+    """Return the group-commit writer for a database, creating it on first use."""
+    path = path or current_database()
+    writer = _writers.get(path)
+    if writer is None:
+        with _pool_lock:
+            writer = _writers.get(path)
+            if writer is None:
+                writer = _writers[path] = GroupCommitWriter(
+                    functools.partial(_commit_student_writes, path=path))
+    return writer
+
+
+def use_database(path: str) -> ConnectionPool:
+    """Point the process's default database at another file (CLI tools, benchmarks)."""
+    global _default_path
+    with _pool_lock:
+        writer = _writers.pop(_default_path, None)
+        if writer is not None:
+            writer.close()
+        pool = _pools.pop(_default_path, None)
+        if pool is not None:
+            pool.close()
+        _default_path = path
+    profile_cache.invalidate()
+    return get_pool(path)
+
+
+def _migrate_v1(conn):
+    conn.execute(SQL_CREATE_USERS)
+    conn.execute(SQL_CREATE_STUDENT_DATA)
+
+
+def _migrate_v2(conn):
+    """Move the JSON blobs of student_data into the normalized tables."""
+    for statement in SQL_CREATE_PROGRESS_TABLES:
+        conn.execute(statement)
+    rows = conn.execute(
+        "SELECT username, progress, achievements, test_scores FROM student_data"
+    ).fetchall()
+    for username, progress, achievements, test_scores in rows:
+        progress = json.loads(progress) if progress else {}
+        conn.executemany(SQL_UPSERT_PROGRESS,
+                         [(username, m, v) for m, v in progress.items()])
+        conn.executemany(SQL_INSERT_ACHIEVEMENT,
+                         [(username, a) for a in json.loads(achievements or '[]')])
+        conn.executemany(SQL_INSERT_TEST_SCORE,
+                         [(username, s) for s in json.loads(test_scores or '[]')])
+    conn.execute("UPDATE student_data SET progress = NULL, achievements = NULL, test_scores = NULL")
+
+
+def _migrate_v3(conn):
+    """Version stamp used to keep cached profiles coherent with the database."""
+    conn.execute("ALTER TABLE student_data ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+
+def _migrate_v4(conn):
+    """Materialized class aggregates, backfilled from the existing rows."""
+    for statement in SQL_CREATE_AGGREGATES:
+        conn.execute(statement)
+    conn.execute('''
+        INSERT INTO agg_module_progress (module, students, total_progress, started, completed)
+        SELECT module, COUNT(*), TOTAL(progress), TOTAL(progress > 0), TOTAL(progress >= 100)
+        FROM module_progress GROUP BY module
+    ''')
+    conn.execute('''
+        INSERT INTO agg_section_completions (level, section, completions)
+        SELECT level, section, COUNT(*) FROM section_completions GROUP BY level, section
+    ''')
+    conn.execute('''
+        INSERT INTO agg_score_buckets (bucket, scores)
+        SELECT MIN(CAST(score / 10 AS INTEGER), 9) * 10 AS bucket, COUNT(*)
+        FROM test_scores GROUP BY bucket
+    ''')
+    conn.execute('''
+        INSERT INTO agg_student_summary
+            (username, sections_completed, tests_taken, score_total, last_completed_at)
+        SELECT s.username,
+               (SELECT COUNT(*) FROM section_completions c WHERE c.username = s.username),
+               (SELECT COUNT(*) FROM test_scores t WHERE t.username = s.username),
+               (SELECT TOTAL(score) FROM test_scores t WHERE t.username = s.username),
+               (SELECT MAX(completed_at) FROM section_completions c WHERE c.username = s.username)
+        FROM student_data s
+    ''')
+
+
+def _migrate_v5(conn):
+    """Per-student dashboard stats, backfilled from the existing rows."""
+    for statement in SQL_CREATE_STUDENT_STATS:
+        conn.execute(statement)
+    conn.execute('''
+        INSERT INTO student_stats (username, total_progress, tasks_completed, achievements)
+        SELECT s.username,
+               (SELECT TOTAL(progress) FROM module_progress m WHERE m.username = s.username),
+               (SELECT COUNT(*) FROM section_completions c WHERE c.username = s.username),
+               (SELECT COUNT(*) FROM achievements a WHERE a.username = s.username)
+        FROM student_data s
+    ''')
+    # Replay past completion days in order to rebuild streaks.
+    days = conn.execute('''
+        SELECT DISTINCT username, date(completed_at) AS day
+        FROM section_completions ORDER BY username, day
+    ''').fetchall()
+    for username, day in days:
+        conn.execute(SQL_TOUCH_ACTIVITY, {'username': username, 'day': day})
+
+
+def _migrate_v6(conn):
+    for statement in SQL_CREATE_ACTIVITY_TABLES:
+        conn.execute(statement)
+
+
+def _migrate_v7(conn):
+    """Login sessions (see sessions.py) and a small key/value settings table."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions
+        (session_id TEXT PRIMARY KEY,
+         username TEXT NOT NULL REFERENCES users(username),
+         created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+         expires_at REAL NOT NULL)
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+    conn.execute("CREATE TABLE IF NOT EXISTS app_settings (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+
+def _migrate_v8(conn):
+    """Recount student_stats.total_progress instead of adding float deltas to it.
+
+    Summing a student's few module_progress rows is a primary-key range
+    read, and it keeps the total exact however often progress is rewritten.
+    """
+    for trigger in ('trg_stats_progress_insert', 'trg_stats_progress_update',
+                    'trg_stats_progress_delete'):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for event, row in (('INSERT', 'NEW'), ('UPDATE OF progress', 'NEW'), ('DELETE', 'OLD')):
+        name = event.split()[0].lower()
+        conn.execute(f'''
+            CREATE TRIGGER trg_stats_progress_{name} AFTER {event} ON module_progress BEGIN
+                UPDATE student_stats SET total_progress =
+                    (SELECT TOTAL(progress) FROM module_progress WHERE username = {row}.username)
+                WHERE username = {row}.username;
+            END
+        ''')
+    conn.execute('''
+        UPDATE student_stats SET total_progress =
+            (SELECT TOTAL(progress) FROM module_progress m WHERE m.username = student_stats.username)
+    ''')
+
+
+# Schema migrations, applied in order. PRAGMA user_version records the last
+# one that ran, so init_db() is a single read once the schema is current.
+MIGRATIONS = (
+    _migrate_v1,
+    _migrate_v2,
+    _migrate_v3,
+    _migrate_v4,
+    _migrate_v5,
+    _migrate_v6,
+    _migrate_v7,
+    _migrate_v8,
+)
+
+
+def init_db():
+    """Create or upgrade the portal schema"""
+    pool = get_pool()
+    if pool.connection().execute("PRAGMA user_version").fetchone()[0] >= len(MIGRATIONS):
+        return
+    with pool.transaction() as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, migrate in enumerate(MIGRATIONS[version:], start=version + 1):
+            migrate(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+
+
+def add_user(username: str, password: str):
+    """Add new user and initialize their student data"""
+    # Hash before taking the write lock; the KDF is the slow part.
+    password_hash = get_hashing_pool().hash(password)
+    try:
+        with get_pool().transaction() as conn:
+            conn.execute(SQL_INSERT_USER, (username, password_hash))
+            conn.execute(SQL_INSERT_STUDENT_DATA, (username, INITIAL_MODULE))
+            conn.executemany(SQL_UPSERT_PROGRESS,
+                             [(username, m, v) for m, v in INITIAL_PROGRESS.items()])
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+
+def add_users_bulk(users) -> list:
+    """Create many accounts in one transaction.
+
+    users is a list of (username, password_hash, current_module) with the
+    passwords already hashed. Usernames that already exist are skipped and
+    returned, so an interrupted import can simply be re-run.
+    """
+    users = list(users)
+    with get_pool().transaction() as conn:
+        existing = set()
+        names = [u[0] for u in users]
+        for i in range(0, len(names), 500):
+            chunk = names[i:i + 500]
+            existing.update(r[0] for r in conn.execute(
+                "SELECT username FROM users WHERE username IN (%s)"
+                % ','.join('?' * len(chunk)), chunk))
+        seen = set(existing)
+        new_users = []
+        for user in users:
+            if user[0] not in seen:
+                seen.add(user[0])
+                new_users.append(user)
+        conn.executemany(SQL_INSERT_USER, [(u[0], u[1]) for u in new_users])
+        conn.executemany(SQL_INSERT_STUDENT_DATA,
+                         [(u[0], u[2] or INITIAL_MODULE) for u in new_users])
+        conn.executemany(SQL_UPSERT_PROGRESS,
+                         [(u[0], m, v) for u in new_users for m, v in INITIAL_PROGRESS.items()])
+    return sorted(existing)
+
+
+def verify_user(username: str, password: str) -> bool:
+    result = get_pool().connection().execute(
+        SQL_SELECT_PASSWORD_HASH, (username,)
+    ).fetchone()
+
+    if result is None:
+        return False
+    stored = result[0]
+    hashing = get_hashing_pool()
+    if not hashing.verify(password, stored):
+        return False
+    if needs_rehash(stored):
+        # Upgrade legacy SHA-256 (or outdated cost) hashes while we know the password.
+        new_hash = hashing.hash(password)
+        with get_pool().transaction() as conn:
+            conn.execute(SQL_UPDATE_PASSWORD_HASH, (new_hash, username, stored))
+    return True
+
+
+def _load_student_data(key):
+    path, username = key
+    with get_pool(path).snapshot() as conn:
+        result = conn.execute(SQL_SELECT_CURRENT_MODULE, (username,)).fetchone()
+        if not result:
+            return None, None
+        rows = dict(conn.execute(SQL_SELECT_PROGRESS, (username,)).fetchall())
+        achievements = [r[0] for r in conn.execute(SQL_SELECT_ACHIEVEMENTS, (username,))]
+        test_scores = [r[0] for r in conn.execute(SQL_SELECT_TEST_SCORES, (username,))]
+        completed = {}
+        for level, section in conn.execute(SQL_SELECT_COMPLETIONS, (username,)):
+            completed.setdefault(level, []).append(section)
+
+    # Keep the module order the dashboard was written against.
+    progress = {m: rows.pop(m) for m in INITIAL_PROGRESS if m in rows}
+    progress.update(rows)
+    return {
+        'name': username,  # Use username as name
+        'progress': progress,
+        'achievements': achievements,
+        'current_module': result[0],
+        'test_scores': test_scores,
+        'completed_sections': completed,
+    }, result[1]
+
+
+def _student_version(key):
+    path, username = key
+    result = get_pool(path).connection().execute(SQL_SELECT_VERSION, (username,)).fetchone()
+    return result[0] if result else None
+
+
+# Keyed by (database, username), so cohorts can reuse usernames.
+profile_cache = ProfileCache(_load_student_data, _student_version)
+
+
+def _profile_key(username: str):
+    return current_database(), username
+
+
+def get_student_data(username: str):
+    """Retrieve student data, served from the profile cache when possible"""
+    return profile_cache.get(_profile_key(username))
+
+
+def _student_field_ops(username: str, data_type: str, new_data):
+    if data_type == 'progress':
+        return [(SQL_UPSERT_PROGRESS, (username, m, v)) for m, v in new_data.items()]
+    if data_type == 'achievements':
+        # Lists only ever grow in the app, but a shorter list must still win.
+        return ([(SQL_DELETE_ACHIEVEMENTS, (username,))]
+                + [(SQL_INSERT_ACHIEVEMENT, (username, a)) for a in new_data])
+    if data_type == 'test_scores':
+        return ([(SQL_DELETE_TEST_SCORES, (username,))]
+                + [(SQL_INSERT_TEST_SCORE, (username, s)) for s in new_data])
+    if data_type == 'current_module':
+        return [(SQL_UPDATE_CURRENT_MODULE, (new_data, username))]
+    raise ValueError(f"Unknown student data field: {data_type}")
+
+
+def _apply_student_field(profile, data_type: str, new_data):
+    if data_type == 'progress':
+        profile['progress'].update(new_data)
+    elif data_type == 'current_module':
+        profile['current_module'] = new_data
+    else:
+        profile[data_type] = list(new_data)
+
+
+def _commit_student_writes(groups, path: str = None):
+    """Write a batch of per-student op lists in one transaction.
+
+    Returns the new profile version for each group.
+    """
+    groups = [(username, ops + [(SQL_BUMP_STUDENT_VERSION, (username,))])
+              for username, ops in groups]
+    usernames = list(dict.fromkeys(username for username, _ in groups))
+    with get_pool(path).transaction() as conn:
+        execute_coalesced(conn, groups)
+        versions = {}
+        for i in range(0, len(usernames), 500):
+            chunk = usernames[i:i + 500]
+            versions.update(conn.execute(
+                "SELECT username, version FROM student_data WHERE username IN (%s)"
+                % ','.join('?' * len(chunk)), chunk))
+    return [versions.get(username) for username, _ in groups]
+
+
+@atexit.register
+def _shutdown():
+    # Queued writes need the pools, so drain them before closing them.
+    for writer in list(_writers.values()):
+        writer.close()
+    for pool in list(_pools.values()):
+        pool.close()
+
+
+_batches = threading.local()
+
+
+class _StudentBatch:
+    def __init__(self, username):
+        self.username = username
+        self.ops = []
+        self.mutations = []
+        self.ok = True
+
+
+@contextmanager
+def student_writes(username: str):
+    """Group every write for one student inside the block into a single commit.
+
+    Writes are queued as they are made and committed together when the block
+    exits; batch.ok reports whether the commit succeeded.
+    """
+    batch = _batches.current = _StudentBatch(username)
+    try:
+        yield batch
+    finally:
+        _batches.current = None
+    if batch.ops:
+        batch.ok = _submit(username, batch.ops, batch.mutations)
+
+
+def _submit(username: str, ops, mutations) -> bool:
+    try:
+        version = get_writer().submit(username, ops)
+    except sqlite3.Error:
+        return False
+    if version is not None:
+        profile_cache.patch(_profile_key(username),
+                            lambda profile: [m(profile) for m in mutations], version)
+    return True
+
+
+def _write_and_patch(username: str, ops, mutate) -> bool:
+    """Commit ops with a profile version bump, then patch the cached profile."""
+    batch = getattr(_batches, 'current', None)
+    if batch is not None and batch.username == username:
+        batch.ops.extend(ops)
+        batch.mutations.append(mutate)
+        return True
+    return _submit(username, ops, [mutate])
+
+
+def update_student_data(username: str, data_type: str, new_data):
+    """Update specific student data"""
+    new_data = copy.deepcopy(new_data)
+    try:
+        ops = _student_field_ops(username, data_type, new_data)
+    except ValueError:
+        return False
+    return _write_and_patch(
+        username, ops, lambda profile: _apply_student_field(profile, data_type, new_data))
+
+
+def set_module_progress(username: str, module: str, progress) -> bool:
+    """Upsert a single module's progress percentage"""
+    return _write_and_patch(
+        username,
+        [(SQL_UPSERT_PROGRESS, (username, module, progress))],
+        lambda profile: profile['progress'].__setitem__(module, progress),
+    )
+
+
+def add_achievement(username: str, achievement: str) -> bool:
+    """Record an achievement; earning it twice is a no-op"""
+    def mutate(profile):
+        if achievement not in profile['achievements']:
+            profile['achievements'].append(achievement)
+
+    return _write_and_patch(
+        username, [(SQL_INSERT_ACHIEVEMENT, (username, achievement))], mutate)
+
+
+def add_test_score(username: str, score) -> bool:
+    """Append a test score"""
+    return _write_and_patch(
+        username,
+        [(SQL_INSERT_TEST_SCORE, (username, score))],
+        lambda profile: profile['test_scores'].append(score),
+    )
+
+
+def module_percentage(completed: int, total: int):
+    """Percentage of a module done, as SQL_SYNC_MODULE_PROGRESS computes it"""
+    return min(100, completed * 100 / total)
+
+
+def complete_section(username: str, level: str, section: str,
+                     module: str = None, sections_in_level: int = None) -> bool:
+    """Record that a student finished a section; repeats are ignored.
+
+    With module and sections_in_level, that module's progress is recomputed
+    from the ledger in the same commit. Both statements are idempotent, so
+    a retried write cannot inflate progress.
+    """
+    ops = [(SQL_INSERT_SECTION_COMPLETION, (username, level, section))]
+    if module is not None:
+        ops.append((SQL_SYNC_MODULE_PROGRESS, {
+            'username': username, 'module': module,
+            'level': level, 'total': sections_in_level,
+        }))
+
+    def mutate(profile):
+        done = profile.setdefault('completed_sections', {}).setdefault(level, [])
+        if section not in done:
+            done.append(section)
+        if module is not None:
+            profile['progress'][module] = max(profile['progress'].get(module, 0),
+                                              module_percentage(len(done), sections_in_level))
+
+    return _write_and_patch(username, ops, mutate)
+
+
+def get_student_stats(username: str):
+    """Return the precomputed dashboard numbers for one student"""
+    result = get_pool().connection().execute('''
+        SELECT total_progress, tasks_completed, achievements, streak,
+               longest_streak, active_days, last_active_date
+        FROM student_stats WHERE username = ?
+    ''', (username,)).fetchone()
+    if result is None:
+        return None
+    total_progress, tasks, achievements, streak, longest, active_days, last_active = result
+    # A streak only counts while it is unbroken: active today or yesterday.
+    yesterday = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
+    if not last_active or last_active < yesterday:
+        streak = 0
+    return {
+        'total_progress': total_progress,
+        'level': int(total_progress / 100) + 1,
+        'tasks_completed': tasks,
+        'achievements': achievements,
+        'streak': streak,
+        'longest_streak': longest,
+        'active_days': active_days,
+        'last_active_date': last_active,
+    }
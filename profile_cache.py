@@ -0,0 +1,117 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Entry:
+    __slots__ = ('profile', 'version', 'expires')
+
+    def __init__(self, profile, version, expires):
+        self.profile = profile
+        self.version = version
+        self.expires = expires
+
+
+class ProfileCache:
+    """Process-wide read-through cache of student profiles.
+
+    Entries are keyed by username and stamped with the version counter stored
+    next to the profile in the database. Writes patch the cached copy and move
+    the stamp forward; once an entry outlives its TTL it is revalidated with a
+    cheap version probe and only reloaded when someone else changed it.
+    Least recently used entries are evicted past max_entries.
+
+    loader(username) returns (profile, version), or (None, None) if unknown.
+    probe(username) returns the current version. "username" can be any
+    hashable key both understand; portal_db uses (database, username).
+    """
+
+    def __init__(self, loader, probe, ttl: float = 60.0, max_entries: int = 512):
+        self.loader = loader
+        self.probe = probe
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def get(self, username: str):
+        """Return a private copy of the profile, loading it on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            stale = entry is not None and entry.expires <= now
+        if stale:
+            current_version = self.probe(username)
+        with self._lock:
+            if stale:
+                self.revalidations += 1
+                if current_version == entry.version:
+                    entry.expires = now + self.ttl
+                else:
+                    self._entries.pop(username, None)
+                    entry = None
+            if entry is not None and self._entries.get(username) is entry:
+                self.hits += 1
+                self._entries.move_to_end(username)
+                return copy.deepcopy(entry.profile)
+            self.misses += 1
+
+        profile, version = self.loader(username)
+        if profile is None:
+            return None
+        with self._lock:
+            current = self._entries.get(username)
+            # A concurrent write may already have installed something newer.
+            if current is None or current.version < version:
+                self._store(username, profile, version, now)
+        return copy.deepcopy(profile)
+
+    def _store(self, username, profile, version, now):
+        self._entries[username] = _Entry(profile, version, now + self.ttl)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def patch(self, username: str, mutate, version: int):
+        """Apply a committed write to the cached copy.
+
+        mutate(profile) edits the profile in place. version is the stamp the
+        write produced; if the cached entry is not exactly one behind, another
+        writer got in between and the entry is dropped instead.
+        """
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return
+            if entry.version + 1 != version:
+                del self._entries[username]
+                return
+            mutate(entry.profile)
+            entry.version = version
+            entry.expires = time.monotonic() + self.ttl
+
+    def invalidate(self, username: str = None):
+        """Forget one profile, or every profile when no username is given."""
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(username, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'revalidations': self.revalidations,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,104 @@
+"""Bulk-create student accounts from a roster file.
+
+    python provision_users.py roster.csv
+    python provision_users.py roster.jsonl --db users.db --batch-size 2000
+
+CSV rosters need a header row with `username` and `password` columns;
+JSONL rosters hold one {"username": ..., "password": ...} object per line.
+Either may add `current_module`. Password hashing is spread over worker
+processes, and accounts are written in large batched transactions.
+Usernames that already exist are skipped, so a failed import can be re-run.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import portal_db
+from passwords import hash_password
+
+
+def read_roster(path: str) -> list:
+    """Load (username, password, current_module) rows from CSV or JSONL."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = list(csv.DictReader(f))
+
+    rows = []
+    for number, record in enumerate(records, start=1):
+        username = (record.get('username') or '').strip()
+        password = record.get('password') or ''
+        if not username or not password:
+            raise ValueError(f"{path}: record {number} needs a username and a password")
+        rows.append((username, password, record.get('current_module')))
+    return rows
+
+
+def provision(rows, batch_size: int = 1000, workers: int = None) -> dict:
+    """Hash passwords in parallel and insert accounts batch by batch."""
+    created = 0
+    skipped = []
+    hash_seconds = 0.0
+    insert_seconds = 0.0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            chunksize = max(1, len(batch) // ((workers or os.cpu_count() or 1) * 4))
+
+            t0 = time.perf_counter()
+            hashes = list(executor.map(hash_password, [r[1] for r in batch],
+                                       chunksize=chunksize))
+            t1 = time.perf_counter()
+            existing = portal_db.add_users_bulk(
+                (r[0], h, r[2]) for r, h in zip(batch, hashes))
+            t2 = time.perf_counter()
+
+            hash_seconds += t1 - t0
+            insert_seconds += t2 - t1
+            skipped.extend(existing)
+            created += len({r[0] for r in batch}) - len(existing)
+            print(f"  {start + len(batch)}/{len(rows)} processed", file=sys.stderr)
+
+    return {
+        'created': created,
+        'skipped': skipped,
+        'hash_seconds': hash_seconds,
+        'insert_seconds': insert_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-create student accounts from a roster file.")
+    parser.add_argument('roster', help="CSV or JSONL roster")
+    parser.add_argument('--db', default=portal_db.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="accounts per transaction")
+    parser.add_argument('--workers', type=int, default=None, help="hashing processes (default: CPU count)")
+    args = parser.parse_args()
+
+    try:
+        rows = read_roster(args.roster)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    portal_db.use_database(args.db)
+    portal_db.init_db()
+
+    t0 = time.perf_counter()
+    result = provision(rows, args.batch_size, args.workers)
+    elapsed = time.perf_counter() - t0
+
+    print(f"Created {result['created']} accounts in {elapsed:.2f} s "
+          f"({result['created'] / elapsed if elapsed else 0:.0f} accounts/s)")
+    print(f"  hashing: {result['hash_seconds']:.2f} s, inserts: {result['insert_seconds']:.2f} s")
+    if result['skipped']:
+        print(f"Skipped {len(result['skipped'])} existing usernames: "
+              f"{', '.join(result['skipped'][:10])}{' ...' if len(result['skipped']) > 10 else ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Fragments and per-region timings for the portal pages.
+
+@interactive marks a widget-driven part of a page as a Streamlit fragment
+(st.fragment), so a click inside it reruns just that function instead of
+the whole page. Fragments may be nested, as the portal's regions are.
+
+@region(name) is @interactive plus a timer: each run of the region is
+recorded in st.session_state.render_timings, and RENDER_TIMINGS=1 prints
+the time under the region so you can see which parts a click reran.
+
+Set RENDER_CACHE=0 to turn fragments off.
+"""
+import functools
+import os
+import time
+
+import streamlit as st
+
+ENABLED = os.environ.get('RENDER_CACHE', '1') != '0'
+SHOW_TIMINGS = os.environ.get('RENDER_TIMINGS') == '1'
+
+
+def interactive(func):
+    """Rerun only this function when a widget inside it changes."""
+    return st.fragment(func) if ENABLED else func
+
+
+def region(name: str):
+    """@interactive, timing every run of the region under the given name."""
+    def decorate(func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = (time.perf_counter() - start) * 1000
+            runs = record_timing(name, elapsed)
+            if SHOW_TIMINGS:
+                st.caption(f"⏱ {name}: {elapsed:.1f} ms (run {runs})")
+            return result
+        return interactive(timed)
+    return decorate
+
+
+def record_timing(name: str, elapsed_ms: float) -> int:
+    """Store the latest time for a region; returns how often it has run this session."""
+    timings = st.session_state.setdefault('render_timings', {})
+    runs = timings.get(name, (0.0, 0))[1] + 1
+    timings[name] = (elapsed_ms, runs)
+    return runs
@@ -0,0 +1,158 @@
+"""Polling an assistant run until it ends, for when streaming is not available.
+
+Every finished wait is recorded in RUN_LATENCY (see RUN_LATENCY.summary()).
+"""
+import bisect
+import itertools
+import random
+import threading
+import time
+
+TERMINAL = {'completed', 'failed', 'cancelled', 'expired', 'incomplete'}
+
+# Upper bounds (seconds) of the latency histogram buckets; the last is open.
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class RunFailed(Exception):
+    """The run ended without a reply."""
+
+    def __init__(self, status: str, error=None):
+        super().__init__(f"Run {status}" + (f": {error.message}" if error else ''))
+        self.status = status
+        self.error = error
+
+
+class RunTimeout(RunFailed):
+    """The run passed its deadline and was cancelled."""
+
+
+class LatencyHistogram:
+    """Counts of run latencies per bucket, plus polls per run."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.by_status = {}
+        self.runs = 0
+        self.polls = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, polls: int, status: str):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.by_status[status] = self.by_status.get(status, 0) + 1
+            self.runs += 1
+            self.polls += polls
+
+    def percentile(self, q: float):
+        """Upper bound of the bucket holding the q-th quantile (None if open-ended)."""
+        with self._lock:
+            target, seen = q * self.runs, 0
+            for bound, count in zip(self.buckets + (None,), self.counts):
+                seen += count
+                if count and seen >= target:
+                    return bound
+        return None
+
+    def summary(self) -> dict:
+        return {'runs': self.runs, 'polls_per_run': self.polls / self.runs if self.runs else 0.0,
+                'p50_s': self.percentile(0.5), 'p90_s': self.percentile(0.9),
+                'p99_s': self.percentile(0.99), 'by_status': dict(self.by_status)}
+
+
+RUN_LATENCY = LatencyHistogram()
+
+
+class RunWaiter:
+    """Polls a run with exponential backoff until it needs the caller or ends."""
+
+    def __init__(self, client, first_delay: float = 0.25, backoff: float = 1.5, fast_probes: int = 2,
+                 settle_delay: float = 1.0, stretch: float = 0.03, max_delay: float = 5.0,
+                 jitter: float = 0.1, timeout: float = 120.0, histogram: LatencyHistogram = RUN_LATENCY):
+        self.client = client
+        self.first_delay = first_delay
+        self.backoff = backoff
+        self.fast_probes = fast_probes
+        self.settle_delay = settle_delay
+        self.stretch = stretch
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.timeout = timeout
+        self.histogram = histogram
+
+    def schedule(self):
+        """Offsets (seconds from the start of a wait) at which to probe the run.
+
+        fast_probes probes, first_delay apart and growing by `backoff`; then
+        one every settle_delay, or every `stretch` times the time waited if
+        that is longer, capped at max_delay. Each offset moves by up to
+        +-jitter of its interval, without shifting the ones after it.
+        """
+        offset, delay = 0.0, self.first_delay
+        for probe in itertools.count():
+            if probe >= self.fast_probes:
+                delay = min(max(self.settle_delay, offset * self.stretch), self.max_delay)
+            offset += delay
+            yield offset + delay * random.uniform(-self.jitter, self.jitter)
+            delay *= self.backoff
+
+    def _poll(self, thread_id: str, run_id: str, deadline: float, probes: list):
+        """Return the run once it is completed or requires_action; counts probes in probes[0]."""
+        runs = self.client.beta.threads.runs
+        start = time.monotonic()
+        for offset in self.schedule():
+            if time.monotonic() >= deadline:
+                runs.cancel(thread_id=thread_id, run_id=run_id)
+                raise RunTimeout('timed out')
+            time.sleep(max(0.0, min(start + offset, deadline) - time.monotonic()))
+            run = runs.retrieve(thread_id=thread_id, run_id=run_id)
+            probes[0] += 1
+            if run.status == 'completed' or run.status == 'requires_action':
+                return run
+            if run.status in TERMINAL:
+                raise RunFailed(run.status, run.last_error)
+
+    def wait(self, thread_id: str, run_id: str, handle_action=None):
+        """Wait for the run to complete, answering tool calls on the way.
+
+        `handle_action(run)` returns the tool_outputs for a requires_action
+        run; without it a requires_action run is returned to the caller.
+        Raises RunFailed for the other terminal states, and RunTimeout
+        (after cancelling the run) once `timeout` seconds have passed.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        polls, status = [0], 'completed'
+        try:
+            while True:
+                run = self._poll(thread_id, run_id, deadline, polls)
+                if run.status != 'requires_action' or handle_action is None:
+                    status = run.status
+                    return run
+                self.client.beta.threads.runs.submit_tool_outputs(
+                    thread_id=thread_id, run_id=run_id, tool_outputs=handle_action(run))
+        except RunFailed as error:
+            status = error.status
+            raise
+        finally:
+            self.histogram.record(time.monotonic() - start, polls[0], status)
+
+    def clear(self, thread_id: str):
+        """Wait until the thread has no active run, so a new run can be created.
+
+        A leftover run waiting for tool outputs has nobody left to answer
+        it, so it is cancelled. Runs that end badly are ignored.
+        """
+        runs = self.client.beta.threads.runs
+        for run in runs.list(thread_id=thread_id, limit=1).data:
+            if run.status in TERMINAL:
+                return
+            try:
+                if run.status != 'requires_action':
+                    run = self.wait(thread_id, run.id)
+                if run.status == 'requires_action':
+                    runs.cancel(thread_id=thread_id, run_id=run.id)
+                    self.wait(thread_id, run.id)
+            except RunFailed:
+                pass
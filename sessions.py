@@ -0,0 +1,135 @@
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+
+from portal_db import current_database, default_database, get_pool
+
+# How long a login stays valid without signing in again.
+SESSION_TTL = 7 * 24 * 3600
+# How often expired rows are swept from the sessions table.
+SWEEP_INTERVAL = 600
+
+
+class SessionStore:
+    """Signed session tokens backed by the sessions table.
+
+    A token is '<session id>.<HMAC of the id>'. Validation checks the
+    signature with a constant-time compare and then looks the id up in an
+    in-memory map, falling back to a primary-key read after a restart, so
+    reconnecting clients never go through password verification again.
+
+    Sessions live in the calling thread's database (portal_db.use_partition),
+    and the in-memory map is keyed by database too, so a token from one
+    cohort never resolves in another.
+    """
+
+    def __init__(self, secret: bytes, ttl: int = SESSION_TTL,
+                 sweep_interval: int = SWEEP_INTERVAL):
+        self.secret = secret
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.time() + sweep_interval
+
+    def _sign(self, session_id: str) -> str:
+        return hmac.new(self.secret, session_id.encode(), hashlib.sha256).hexdigest()
+
+    def create(self, username: str) -> str:
+        """Start a session for a freshly authenticated user and return its token."""
+        session_id = secrets.token_urlsafe(24)
+        expires_at = time.time() + self.ttl
+        with get_pool().transaction() as conn:
+            conn.execute(
+                "INSERT INTO sessions (session_id, username, expires_at) VALUES (?, ?, ?)",
+                (session_id, username, expires_at))
+        with self._lock:
+            self._cache[current_database(), session_id] = (username, expires_at)
+        self._maybe_sweep()
+        return f"{session_id}.{self._sign(session_id)}"
+
+    def validate(self, token: str):
+        """Return the username a token belongs to, or None."""
+        session_id, _, signature = (token or '').partition('.')
+        if not session_id or not hmac.compare_digest(self._sign(session_id), signature):
+            return None
+        now = time.time()
+        key = (current_database(), session_id)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is None:
+            row = get_pool().connection().execute(
+                "SELECT username, expires_at FROM sessions WHERE session_id = ?",
+                (session_id,)).fetchone()
+            if row is None:
+                return None
+            cached = (row[0], row[1])
+            with self._lock:
+                self._cache[key] = cached
+        username, expires_at = cached
+        self._maybe_sweep()
+        if expires_at <= now:
+            return None
+        return username
+
+    def revoke(self, token: str):
+        """End a session (logout)."""
+        session_id = (token or '').partition('.')[0]
+        with self._lock:
+            self._cache.pop((current_database(), session_id), None)
+        with get_pool().transaction() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def _maybe_sweep(self):
+        now = time.time()
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + self.sweep_interval
+        self.sweep(now)
+
+    def sweep(self, now: float = None) -> int:
+        """Delete expired sessions from the table and the in-memory map.
+
+        Only the calling thread's database is swept; each partition is swept
+        by its own users' requests.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            for key in [k for k, (_, exp) in self._cache.items() if exp <= now]:
+                del self._cache[key]
+        with get_pool().transaction() as conn:
+            return conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+
+
+def _load_secret() -> bytes:
+    """SESSION_SECRET from the environment, else one generated and kept in the database.
+
+    Persisting it means tokens survive a server restart. It is always kept in
+    the default database, whichever partition asks first.
+    """
+    secret = os.environ.get('SESSION_SECRET')
+    if secret:
+        return secret.encode()
+    with get_pool(default_database()).transaction() as conn:
+        conn.execute("INSERT OR IGNORE INTO app_settings (name, value) VALUES ('session_secret', ?)",
+                     (secrets.token_hex(32),))
+        return conn.execute(
+            "SELECT value FROM app_settings WHERE name = 'session_secret'").fetchone()[0].encode()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide session store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore(_load_secret())
+    return _store
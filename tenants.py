@@ -0,0 +1,136 @@
+"""Cohorts (tenants) served from one portal process.
+
+Each cohort has its own curriculum, lesson folder and database file. The
+cohorts are described in a JSON file named by PORTAL_COHORTS:
+
+    {
+      "default": "main",
+      "cohorts": {
+        "main":      {"name": "Coders University"},
+        "spring-25": {"name": "Spring 2025",
+                      "course": "courses/spring-25.json",
+                      "lessons": "lessons/spring-25",
+                      "database": "cohorts/spring-25.db",
+                      "members": ["alice", "bob"]}
+      }
+    }
+
+"course" is a file shaped like course_structure.COURSE_STRUCTURE; omitted
+fields fall back to the built-in course, lessons/ and the default database.
+Logins listed under "members" belong to that cohort and everyone else to
+the default one. Without PORTAL_COHORTS there is a single default cohort.
+
+The directory is loaded once per process. Course registries and lesson
+stores are shared between cohorts that point at the same files, and
+sessions only keep a cohort id, so memory does not grow with the number of
+sessions or with cohorts that share a curriculum.
+"""
+import json
+import os
+import threading
+from collections import namedtuple
+
+import portal_db
+from course_structure import COURSE, CourseRegistry
+from lesson_store import LESSONS_DIR, LessonStore, get_lesson_store
+
+COHORTS_FILE = os.environ.get('PORTAL_COHORTS')
+DEFAULT_TENANT = 'main'
+
+Tenant = namedtuple('Tenant', ['id', 'name', 'course', 'lessons', 'database'])
+
+
+class TenantDirectory:
+    """Cohorts by id plus the login -> cohort map, both read-only after load."""
+
+    def __init__(self, tenants: dict, members: dict, default: str):
+        if default not in tenants:
+            raise ValueError(f"Default cohort {default!r} is not defined")
+        self._tenants = dict(tenants)
+        self._members = dict(members)
+        self.default = tenants[default]
+
+    def __iter__(self):
+        return iter(self._tenants.values())
+
+    def get(self, tenant_id: str):
+        """The cohort with this id, or None."""
+        return self._tenants.get(tenant_id)
+
+    def resolve(self, username: str) -> Tenant:
+        """The cohort a login belongs to."""
+        return self._tenants[self._members.get(username, self.default.id)]
+
+
+def _relative(base: str, path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def load_directory(path: str = None) -> TenantDirectory:
+    """Build the directory from a cohorts file, or the single default cohort."""
+    path = path or COHORTS_FILE
+    if not path:
+        default = Tenant(DEFAULT_TENANT, DEFAULT_TENANT, COURSE, get_lesson_store(),
+                         portal_db.default_database())
+        return TenantDirectory({default.id: default}, {}, default.id)
+
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    courses, lesson_stores = {}, {}
+    tenants, members = {}, {}
+
+    for tenant_id, spec in config['cohorts'].items():
+        course = COURSE
+        if spec.get('course'):
+            course_path = _relative(base, spec['course'])
+            if course_path not in courses:
+                with open(course_path, encoding='utf-8') as f:
+                    courses[course_path] = CourseRegistry(json.load(f))
+            course = courses[course_path]
+
+        lessons = get_lesson_store()
+        if spec.get('lessons'):
+            lessons_dir = os.path.abspath(_relative(base, spec['lessons']))
+            if lessons_dir != LESSONS_DIR:
+                if lessons_dir not in lesson_stores:
+                    lesson_stores[lessons_dir] = LessonStore(lessons_dir)
+                lessons = lesson_stores[lessons_dir]
+
+        database = (_relative(base, spec['database']) if spec.get('database')
+                    else portal_db.default_database())
+        tenants[tenant_id] = Tenant(tenant_id, spec.get('name', tenant_id), course, lessons, database)
+        for username in spec.get('members', ()):
+            if members.setdefault(username, tenant_id) != tenant_id:
+                raise ValueError(f"{username!r} is listed in two cohorts")
+
+    return TenantDirectory(tenants, members, config.get('default', DEFAULT_TENANT))
+
+
+_directory = None
+_prepared = set()
+_lock = threading.Lock()
+
+
+def get_directory() -> TenantDirectory:
+    """Return the process-wide cohort directory, loading it on first use."""
+    global _directory
+    if _directory is None:
+        with _lock:
+            if _directory is None:
+                _directory = load_directory()
+    return _directory
+
+
+def activate(tenant: Tenant) -> Tenant:
+    """Point this thread's database calls at the cohort's database.
+
+    The first activation of a database in the process runs its migrations.
+    """
+    portal_db.use_partition(tenant.database)
+    if tenant.database not in _prepared:
+        with _lock:
+            if tenant.database not in _prepared:
+                portal_db.init_db()
+                _prepared.add(tenant.database)
+    return tenant
@@ -0,0 +1,139 @@
+"""Running an assistant's tool calls concurrently, with argument validation and per-call timeouts."""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+# Seconds a tool call may take before the run is told it timed out.
+TOOL_TIMEOUT = float(os.environ.get('TOOL_TIMEOUT', '30'))
+# Threads shared by every registry in the process.
+WORKERS = int(os.environ.get('TOOL_WORKERS', '16'))
+
+_TYPES = {'object': (dict,), 'array': (list,), 'string': (str,), 'boolean': (bool,),
+          'integer': (int,), 'number': (int, float), 'null': (type(None),)}
+
+
+def validate(value, schema: dict, path: str = 'arguments') -> list:
+    """Check value against the JSON-schema subset used for function parameters.
+
+    Covers type, enum, properties, required, additionalProperties (false)
+    and items; returns a list of error strings, empty when valid.
+    """
+    expected = schema.get('type')
+    if expected is not None:
+        types = expected if isinstance(expected, list) else [expected]
+        python_types = tuple(t for name in types for t in _TYPES.get(name, (object,)))
+        # JSON has no separate boolean numbers.
+        if not isinstance(value, python_types) or (isinstance(value, bool) and 'boolean' not in types):
+            return [f"{path} should be {' or '.join(types)}"]
+    if 'enum' in schema and value not in schema['enum']:
+        return [f"{path} should be one of {schema['enum']}"]
+    errors = []
+    if isinstance(value, dict):
+        properties = schema.get('properties', {})
+        errors += [f"{path}.{name} is required" for name in schema.get('required', ()) if name not in value]
+        for name, item in value.items():
+            if name in properties:
+                errors += validate(item, properties[name], f"{path}.{name}")
+            elif schema.get('additionalProperties') is False:
+                errors.append(f"{path}.{name} is not allowed")
+    elif isinstance(value, list) and 'items' in schema:
+        for index, item in enumerate(value):
+            errors += validate(item, schema['items'], f"{path}[{index}]")
+    return errors
+
+
+def per_thread(factory):
+    """A function returning the calling thread's own factory() result, built on first use."""
+    local = threading.local()
+
+    def get():
+        if not hasattr(local, 'value'):
+            local.value = factory()
+        return local.value
+    return get
+
+
+class ToolRegistry:
+    """Tool name -> function, parameter schema and timeout."""
+
+    def __init__(self, timeout: float = TOOL_TIMEOUT):
+        self.timeout = timeout
+        self._tools = {}
+
+    @classmethod
+    def from_specs(cls, specs: list, functions: dict, timeout: float = TOOL_TIMEOUT) -> 'ToolRegistry':
+        """Registry for `functions`, validated against the matching entries of a `tools` list."""
+        registry = cls(timeout)
+        parameters = {spec['function']['name']: spec['function'].get('parameters')
+                      for spec in specs or () if spec.get('type') == 'function'}
+        for name, func in functions.items():
+            registry.register(name, func, parameters.get(name))
+        return registry
+
+    def register(self, name: str, func, parameters: dict = None, timeout: float = None):
+        """Add a tool; `parameters` is its JSON schema, `timeout` overrides the default."""
+        self._tools[name] = (func, parameters, self.timeout if timeout is None else timeout)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __bool__(self) -> bool:
+        return bool(self._tools)
+
+    def _prepare(self, tool_call):
+        """(func, arguments, timeout) for a call, or the error output it gets instead."""
+        name = tool_call.function.name
+        if name not in self._tools:
+            return {'error': f"Unknown tool {name!r}"}
+        func, parameters, timeout = self._tools[name]
+        try:
+            arguments = json.loads(tool_call.function.arguments or '{}')
+        except ValueError as e:
+            return {'error': f"Arguments are not valid JSON: {e}"}
+        errors = validate(arguments, parameters) if parameters else []
+        if not isinstance(arguments, dict):
+            errors = errors or ['arguments should be object']
+        if errors:
+            return {'error': 'Invalid arguments: ' + '; '.join(errors)}
+        return func, arguments, timeout
+
+    def dispatch(self, tool_calls) -> list:
+        """Run the tool calls concurrently; returns tool_outputs in call order."""
+        executor = get_executor()
+        results, pending = [], {}
+        for index, tool_call in enumerate(tool_calls):
+            prepared = self._prepare(tool_call)
+            results.append(prepared)
+            if isinstance(prepared, tuple):
+                func, arguments, timeout = prepared
+                pending[index] = (executor.submit(func, **arguments), time.monotonic() + timeout)
+
+        for index, (future, deadline) in pending.items():
+            try:
+                results[index] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except TimeoutError:
+                # The worker cannot be interrupted; its late result is dropped.
+                future.cancel()
+                results[index] = {'error': f"{tool_calls[index].function.name} timed out"}
+            except Exception as e:
+                results[index] = {'error': f"{tool_calls[index].function.name} failed: {e}"}
+
+        return [{'tool_call_id': tool_call.id,
+                 'output': result if isinstance(result, str) else json.dumps(result, default=str)}
+                for tool_call, result in zip(tool_calls, results)]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide tool worker pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='tool')
+    return _executor
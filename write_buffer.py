@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def execute_coalesced(conn, groups):
+    """Execute several ordered write groups with as few executemany calls as possible.
+
+    groups is a list of (key, ops) where ops is a list of (sql, params). Ops
+    for the same key keep their order; ops for different keys are independent,
+    so each round runs one statement for every key whose next ops use it.
+    """
+    queues = OrderedDict()
+    for key, ops in groups:
+        queues.setdefault(key, []).extend(ops)
+    positions = dict.fromkeys(queues, 0)
+
+    while positions:
+        sql = None
+        rows = []
+        for key, pos in list(positions.items()):
+            ops = queues[key]
+            if sql is None:
+                sql = ops[pos][0]
+            while pos < len(ops) and ops[pos][0] == sql:
+                rows.append(ops[pos][1])
+                pos += 1
+            if pos == len(ops):
+                del positions[key]
+            else:
+                positions[key] = pos
+        conn.executemany(sql, rows)
+
+
+class _Request:
+    __slots__ = ('key', 'ops', 'done', 'result', 'error')
+
+    def __init__(self, key, ops):
+        self.key = key
+        self.ops = ops
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class GroupCommitWriter:
+    """Funnel writes from many script threads into shared transactions.
+
+    submit() queues a write group and blocks until the transaction holding it
+    has committed, so callers keep their durability guarantee. Commits are
+    made by the submitting threads themselves: a write that finds no commit
+    in progress is committed at once on the caller's thread, with no
+    hand-off and no waiting. Writes that arrive while a commit is running
+    queue up, and the first of them to run next commits the whole queue (up
+    to `max_batch` groups) in one transaction through commit_batch(groups),
+    which must return one result per group. Only while writes keep piling up
+    behind commits (several writers at once) does that thread first collect
+    for up to `window` seconds.
+
+    If a batch fails, its groups are retried one at a time so a single bad
+    write cannot take the rest of the classroom down with it.
+    """
+
+    def __init__(self, commit_batch, window: float = 0.01, max_batch: int = 256):
+        self.commit_batch = commit_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._cond = threading.Condition()
+        self._committing = False
+        # Set while writes queue behind commits; cleared by an uncontended commit.
+        self._contended = False
+        self._closed = False
+        self.groups = 0
+        self.commits = 0
+
+    def submit(self, key, ops):
+        """Queue one write group and wait for it to commit."""
+        request = _Request(key, ops)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            self._pending.append(request)
+            self.groups += 1
+        while not request.done.is_set():
+            self._lead(request)
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _lead(self, request=None):
+        """Commit the next batch, or wait while another thread commits one."""
+        with self._cond:
+            if self._committing:
+                self._cond.wait()
+                return
+            if (request is not None and request.done.is_set()) or not self._pending:
+                return
+            self._committing = True
+            if self._contended:
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+        try:
+            self._commit(batch)
+        finally:
+            with self._cond:
+                self._contended = len(batch) > 1 or bool(self._pending)
+                self._committing = False
+                self._cond.notify_all()
+
+    def _commit(self, batch):
+        try:
+            results = self.commit_batch([(r.key, r.ops) for r in batch])
+            self.commits += 1
+        except Exception as error:
+            if len(batch) > 1:
+                for request in batch:
+                    self._commit([request])
+                return
+            batch[0].error = error
+            batch[0].done.set()
+            return
+        for request, result in zip(batch, results):
+            request.result = result
+            request.done.set()
+
+    def flush(self):
+        """Commit everything queued so far without waiting out the window."""
+        with self._cond:
+            self._contended = False
+        while True:
+            with self._cond:
+                if not self._pending and not self._committing:
+                    return
+            self._lead()
+
+    def close(self):
+        """Commit outstanding writes and refuse new ones."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            'groups': self.groups,
+            'commits': self.commits,
+            'groups_per_commit': self.groups / self.commits if self.commits else 0.0,
+        }